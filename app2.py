@@ -1,62 +1,162 @@
-import string
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-import random
+import math
+from flask import Flask, Response, render_template, stream_template, request, url_for, g, jsonify
 import os
+import threading
+import itertools
 import json
 import revista_clases as rc
-from revista_clases import Revista
+import instantanea
+import sistema_sqlite
+import recarga
+from cache_respuestas import CacheRespuestas
+from metricas_app import MetricasApp
+import widgets as wg
+import appCSV
+import emparejamiento
+from membresias import Membresias
 
 app = Flask(__name__)
 
-sistema = rc.sistema_de_busqueda()
-
-# Cargar datos
-with open('Scimago.json', encoding='utf-8') as f:
-    data = json.load(f)
-
-for item in data:
-    revista = Revista(
-        title=item.get("title", ""),
-        url=item.get("url", ""),
-        h_index=item.get("h-index", "N/A"),
-        subject_area=",".join(item.get("subject_area", [])),
-        publisher=item.get("publisher", ""),
-        issn=item.get("issn", ""),
-        publication_type=item.get("publication_type", ""),
-        search_url=item.get("search_url", ""),
-        widget_url=item.get("widget_url", ""),
-        widget_html=item.get("widget_html", "")
-    )
-    sistema.agregar_revista(revista)
+# Revistas por página en /catalogo
+POR_PAGINA = 50
+MAX_POR_PAGINA = 500
+# Resultados ordenados por relevancia que se muestran antes de las coincidencias exactas
+LIMITE_RELEVANTES = 50
+# Tamaño aproximado de cada bloque enviado al exportar el catálogo completo
+BLOQUE_EXPORTACION = 16 * 1024
+# Sugerencias que devuelve /api/sugerencias por defecto y como máximo
+SUGERENCIAS = 10
+MAX_SUGERENCIAS = 20
+# Títulos más ISSN que se aceptan en una sola petición a /api/revistas/lookup
+MAX_LOTE = 1000
+# Títulos por página en /filtro y /api/filtro
+POR_PAGINA_FILTRO = 100
+
+RUTA_JSON = 'Scimago.json'
+# Motor de búsqueda: 'memoria' (por defecto) o 'sqlite'
+MOTOR_BUSQUEDA = os.environ.get('MOTOR_BUSQUEDA', 'memoria')
+RUTA_SQLITE = os.environ.get('RUTA_SQLITE', sistema_sqlite.RUTA_SQLITE)
+# Segundos entre revisiones de Scimago.json; 0 desactiva la recarga automática
+INTERVALO_RECARGA = float(os.environ.get('INTERVALO_RECARGA', '5'))
+# Páginas renderizadas que se guardan en la caché de respuestas; 0 la desactiva
+CACHE_RESPUESTAS = int(os.environ.get('CACHE_RESPUESTAS', '512'))
+# Fracción de peticiones que se perfilan con cProfile (0 = desactivado) y
+# cuántos perfiles de las peticiones más lentas se guardan en perfiles/
+PERFILAR = float(os.environ.get('PERFILAR', '0'))
+PERFILES_LENTOS = int(os.environ.get('PERFILES_LENTOS', '10'))
+# Imágenes de widget servidas desde una copia local (WIDGETS_LOCALES=0 solo
+# enlaza las de Scimago); PRECARGAR_WIDGETS=1 descarga todas al arrancar
+WIDGETS_LOCALES = os.environ.get('WIDGETS_LOCALES', '1') == '1'
+PRECARGAR_WIDGETS = os.environ.get('PRECARGAR_WIDGETS', '0') == '1'
+
+# Cargar datos: con el motor 'sqlite' se consulta una base generada a partir
+# del JSON. En memoria, si hay una instantánea generada a partir del JSON
+# actual (python instantanea.py) se mapea y el arranque es inmediato; si no,
+# se construye el sistema leyendo el JSON
+def cargar_sistema(ruta, ruta_instantanea=instantanea.RUTA_INSTANTANEA):
+    if MOTOR_BUSQUEDA == 'sqlite':
+        return sistema_sqlite.cargar_sistema(ruta, RUTA_SQLITE)
+    if instantanea.vigente(ruta_instantanea, ruta):
+        return instantanea.cargar_sistema(ruta_instantanea)
+    sistema = rc.cargar_json(ruta)
+    # Los órdenes del catálogo se calculan al cargar y no en la primera visita
+    for orden in rc.ORDENES:
+        sistema.ordenadas(orden)
+    return sistema
+
+def preparar_indices(sistema):
+    # Las sugerencias tardan menos en construirse, así que van primero
+    sistema.preparar_sugerencias()
+    sistema.preparar_buscador()
+
+# Cada sistema cargado recibe un número de versión; la caché de respuestas
+# solo sirve páginas generadas con la versión actual
+versiones = itertools.count(1)
+
+sistema = cargar_sistema(RUTA_JSON)
+sistema.version = next(versiones)
+# Los índices de relevancia y de sugerencias tardan en construirse: se
+# preparan en segundo plano y mientras tanto /buscar responde solo con las
+# coincidencias exactas y /api/sugerencias con una lista vacía
+threading.Thread(target=preparar_indices, args=(sistema,), daemon=True).start()
+
+def cargar_para_recarga(ruta):
+    # En la recarga ya se está en un hilo aparte: el sistema nuevo llega completo
+    nuevo = cargar_sistema(ruta)
+    preparar_indices(nuevo)
+    nuevo.version = next(versiones)
+    return nuevo
+
+def reemplazar_sistema(nuevo):
+    # El sistema nuevo ya está completo; asignar la variable es atómico, así que
+    # las peticiones en curso terminan con el anterior y las nuevas usan el nuevo
+    global sistema
+    anterior, sistema = sistema, nuevo
+    # Con el motor sqlite se cierran las conexiones libres del sistema anterior
+    if hasattr(anterior, 'cerrar'):
+        anterior.cerrar()
+
+widgets = wg.CacheWidgets() if WIDGETS_LOCALES else None
+if widgets and PRECARGAR_WIDGETS:
+    threading.Thread(target=lambda: widgets.precargar(r.widget_url for r in sistema.ordenadas()),
+                     daemon=True).start()
+
+# Cuando el scraper actualiza Scimago.json los índices se reconstruyen en un
+# hilo aparte, sin reiniciar el servidor ni detener las peticiones
+vigilante = None
+if INTERVALO_RECARGA > 0:
+    vigilante = recarga.Vigilante(RUTA_JSON, cargar_para_recarga, reemplazar_sistema, INTERVALO_RECARGA).iniciar()
+
+# Catálogos (CONACYT, JCR...) y áreas de cada título según revistas.json de
+# appCSV, como mapas de bits para /filtro y la página de cada revista. Los
+# títulos del CSV se traducen a los de Scimago con el emparejamiento que genera
+# emparejamiento.py; se recarga si cambia cualquiera de los dos archivos
+def cargar_membresias(ruta_revistas=appCSV.RUTA_JSON, ruta_emparejamiento=emparejamiento.RUTA_EMPAREJAMIENTO):
+    nuevas = Membresias.desde_json(ruta_revistas, emparejamiento=emparejamiento.cargar(ruta_emparejamiento))
+    nuevas.version = next(versiones)
+    return nuevas
+
+def reemplazar_membresias(nuevas):
+    global membresias
+    membresias = nuevas
+
+membresias = cargar_membresias() if os.path.exists(appCSV.RUTA_JSON) else None
+vigilantes_membresias = []
+if INTERVALO_RECARGA > 0:
+    # Cualquiera de los dos archivos que cambie reconstruye las membresías con ambos
+    vigilantes_membresias = [recarga.Vigilante(ruta, lambda _: cargar_membresias(), reemplazar_membresias,
+                                               INTERVALO_RECARGA).iniciar()
+                             for ruta in (appCSV.RUTA_JSON, emparejamiento.RUTA_EMPAREJAMIENTO)]
+
+@app.before_request
+def fijar_sistema():
+    # Toda la petición consulta el mismo sistema aunque haya una recarga a la mitad
+    g.sistema = sistema
+    g.membresias = membresias
+
+cache = CacheRespuestas(CACHE_RESPUESTAS)
+# Latencia, tiempo de plantillas y tamaño de respuesta por ruta, en /metrics
+metricas = MetricasApp(PERFILAR, PERFILES_LENTOS).instalar(app)
+
+def version_datos():
+    # Las páginas de revista también muestran los catálogos de cada una. Ambos
+    # números salen del mismo contador, así que el mayor crece con cualquier recarga
+    return max(g.sistema.version, g.membresias.version if g.membresias else 0)
 
 # Función auxiliar para extraer áreas únicas
 def get_areas():
-    areas = set()
-    for journal in data:
-        for sa in journal.get("subject_area", []):
-            for area in sa.split(','):
-                areas.add(area.strip())
-    return sorted(areas)
+    return g.sistema.areas()
 
 # Funcion que devuelve una lista de revistas por área
 def get_revistas_por_area(area_buscada):
-    revistas = []
-    for journal in data:
-        for sa in journal.get("subject_area", []):
-            if area_buscada in [a.strip() for a in sa.split(",")]:
-                revistas.append({
-                    "title": journal.get("title"),
-                    "url": journal.get("url", "#"),
-                    "h_index": journal.get("h-index", "Desconocido")
-                })
-                break
-    return revistas
+    return g.sistema.buscar_por_area(area_buscada)
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/area')
+@cache.cachear(version_datos)
 def area():
     selected_area = request.args.get("area")
     areas = get_areas()
@@ -64,33 +164,184 @@ def area():
     return render_template("area.html", areas=areas, journals=journals, selected=selected_area)
     
 @app.route('/area/<nombre_area>')
+@cache.cachear(version_datos)
 def revistas_por_area(nombre_area):
     journals = get_revistas_por_area(nombre_area)
     return render_template('revistas_por_area.html', area=nombre_area, journals=journals)
 
+# Mientras se construye el índice de relevancia los resultados son parciales y no se guardan
 @app.route('/buscar')
+@cache.cachear(version_datos, condicion=lambda: g.sistema.buscador_listo())
 def buscar():
-    query = request.args.get('q', '').strip().lower().replace(" ", "")
-    
-    with open('Scimago.json', encoding='utf-8') as f:
-        revistas = json.load(f)  # Asegúrate de que sea una lista de diccionarios
+    consulta = request.args.get('q', '').strip()
+    query = consulta.lower().replace(" ", "")
 
     if not query:
         return render_template('buscar.html', revistas=[], query=query)
 
-    resultados = [
-        revista for revista in revistas
-        if query in revista.get('title', '').strip().lower().replace(" ", "")
-    ]
+    # Primero los títulos más relevantes (sin acentos y tolerando errores)
+    resultados = []
+    if g.sistema.buscador_listo():
+        resultados = g.sistema.buscar_relevantes(consulta, LIMITE_RELEVANTES)
+    # Después las coincidencias exactas del índice de n-gramas que no estén ya
+    vistos = {(revista['title'], revista['url']) for revista in resultados}
+    resultados += [revista for revista in g.sistema.buscar_por_titulo(query, ignorar_espacios=True)
+                   if (revista['title'], revista['url']) not in vistos]
 
     return render_template('buscar.html', revistas=resultados, query=query)
 
+@app.route('/api/sugerencias')
+def api_sugerencias():
+    # Autocompletado del buscador: títulos que empiezan con q, de mayor a menor h-index
+    consulta = request.args.get('q', '')
+    cantidad = min(max(request.args.get('k', SUGERENCIAS, type=int), 1), MAX_SUGERENCIAS)
+    if not consulta.strip() or not g.sistema.sugerencias_listas():
+        return jsonify([])
+    return jsonify(g.sistema.sugerir(consulta, cantidad))
+
+def lista_de_textos(datos, nombre):
+    valores = datos.get(nombre, [])
+    if not isinstance(valores, list) or not all(isinstance(valor, str) for valor in valores):
+        raise ValueError(f"'{nombre}' debe ser una lista de textos")
+    return valores
+
+@app.route('/api/revistas/lookup', methods=['POST'])
+def api_revistas_lookup():
+    # Consulta por lote: {"titulos": [...], "issns": [...], "campos": [...]}.
+    # Devuelve cada consulta con su revista (o null) en el mismo orden; con
+    # ?formato=ndjson o Accept: application/x-ndjson se envía una línea por consulta
+    datos = request.get_json(silent=True)
+    if not isinstance(datos, dict):
+        return jsonify({"error": "Se esperaba un objeto JSON"}), 400
+    try:
+        titulos = lista_de_textos(datos, "titulos")
+        issns = lista_de_textos(datos, "issns")
+        campos = lista_de_textos(datos, "campos") or None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if len(titulos) + len(issns) > MAX_LOTE:
+        return jsonify({"error": f"Máximo {MAX_LOTE} consultas por petición"}), 413
+
+    def recortar(revista):
+        if revista is None or campos is None:
+            return revista
+        return {campo: revista[campo] for campo in campos if campo in revista}
+
+    resultados = {
+        "titulos": [{"consulta": titulo, "revista": recortar(revista)}
+                    for titulo, revista in zip(titulos, g.sistema.obtener_varias_por_titulo(titulos))],
+        "issns": [{"consulta": issn, "revista": recortar(revista)}
+                  for issn, revista in zip(issns, g.sistema.obtener_varias_por_issn(issns))],
+    }
+
+    ndjson = request.args.get('formato') == 'ndjson' or \
+        request.accept_mimetypes.best == 'application/x-ndjson'
+    if ndjson:
+        lineas = (json.dumps({"tipo": tipo, **resultado}, ensure_ascii=False) + '\n'
+                  for tipo, nombre in (("titulo", "titulos"), ("issn", "issns"))
+                  for resultado in resultados[nombre])
+        return app.response_class(en_bloques(lineas), mimetype='application/x-ndjson')
+    encontradas = sum(resultado["revista"] is not None
+                      for lista in resultados.values() for resultado in lista)
+    return jsonify({**resultados, "encontradas": encontradas, "total": len(titulos) + len(issns)})
+
+def filtrar_membresias():
+    # Evalúa ?q= y une cada título con su revista de Scimago (si la hay).
+    # Lanza ValueError si la expresión no es válida
+    expresion = request.args.get('q', '').strip()
+    desde = max(request.args.get('desde', 0, type=int), 0)
+    limite = min(max(request.args.get('limite', POR_PAGINA_FILTRO, type=int), 1), MAX_LOTE)
+    total, encontrados = g.membresias.filtrar(expresion, limite, desde)
+    revistas = g.sistema.obtener_varias_por_titulo([g.membresias.titulo_scimago(titulo)
+                                                    for titulo, _ in encontrados])
+    resultados = [{"titulo": titulo, "conjuntos": conjuntos,
+                   "revista": {campo: revista[campo] for campo in ("title", "h_index", "url")} if revista else None}
+                  for (titulo, conjuntos), revista in zip(encontrados, revistas)]
+    return expresion, desde, limite, total, resultados
+
+@app.route('/api/filtro')
+def api_filtro():
+    # ?q=JCR & SCOPUS & !CONACYT & ING; sin q devuelve los catálogos y áreas disponibles
+    if g.membresias is None:
+        return jsonify({"error": f"No existe {appCSV.RUTA_JSON}; genéralo con appCSV.py"}), 503
+    if not request.args.get('q', '').strip():
+        return jsonify({"conjuntos": g.membresias.conjuntos()})
+    try:
+        expresion, desde, limite, total, resultados = filtrar_membresias()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"expresion": expresion, "total": total, "desde": desde, "titulos": resultados})
 
+@app.route('/filtro')
+def filtro():
+    if g.membresias is None:
+        return f"No existe {appCSV.RUTA_JSON}; genéralo con appCSV.py", 503
+    contexto = {"expresion": request.args.get('q', '').strip(), "conjuntos": g.membresias.conjuntos(),
+                "resultados": [], "total": 0, "desde": 0, "limite": POR_PAGINA_FILTRO, "error": None}
+    if contexto["expresion"]:
+        try:
+            (contexto["expresion"], contexto["desde"], contexto["limite"],
+             contexto["total"], contexto["resultados"]) = filtrar_membresias()
+        except ValueError as e:
+            contexto["error"] = str(e)
+    return render_template('filtro.html', **contexto)
 
+@app.route('/api/cache')
+def api_cache():
+    # Aciertos, fallos y ocupación de la caché de respuestas
+    return jsonify(cache.estadisticas())
+
+@app.route('/metrics')
+def metrics():
+    # Formato de exposición de Prometheus
+    estadisticas = cache.estadisticas()
+    adicionales = {
+        'app_cache_aciertos_total': ('counter', estadisticas['aciertos']),
+        'app_cache_fallos_total': ('counter', estadisticas['fallos']),
+        'app_cache_no_modificadas_total': ('counter', estadisticas['no_modificadas']),
+        'app_cache_entradas': ('gauge', estadisticas['entradas']),
+        'app_cache_bytes': ('gauge', estadisticas['bytes']),
+        'app_recargas_total': ('counter', vigilante.recargas if vigilante else 0),
+    }
+    return Response(metricas.prometheus(adicionales), mimetype='text/plain; version=0.0.4')
+
+def en_bloques(partes, tamano=BLOQUE_EXPORTACION):
+    # Jinja entrega cada fila en varios fragmentos pequeños; se agrupan para
+    # no hacer una escritura al socket por fragmento
+    bloque, acumulado = [], 0
+    for parte in partes:
+        bloque.append(parte)
+        acumulado += len(parte)
+        if acumulado >= tamano:
+            yield ''.join(bloque)
+            bloque, acumulado = [], 0
+    if bloque:
+        yield ''.join(bloque)
+
+def obtener_orden():
+    orden = request.args.get('orden', 'titulo')
+    return orden if orden in rc.ORDENES else 'titulo'
 
 @app.route('/catalogo')
+@cache.cachear(version_datos)
 def catalogo():
-    return render_template('catalogo.html', revistas=data)
+    orden = obtener_orden()
+    por_pagina = min(max(request.args.get('por_pagina', POR_PAGINA, type=int), 1), MAX_POR_PAGINA)
+    total = g.sistema.total()
+    paginas = max(1, math.ceil(total / por_pagina))
+    pagina = min(max(request.args.get('pagina', 1, type=int), 1), paginas)
+    revistas = g.sistema.pagina(orden, (pagina - 1) * por_pagina, por_pagina)
+    return render_template('catalogo.html', revistas=revistas, total=total, orden=orden,
+                           pagina=pagina, paginas=paginas, por_pagina=por_pagina)
+
+@app.route('/catalogo/completo')
+def catalogo_completo():
+    # Exportación de todo el catálogo: la tabla se envía por partes conforme se
+    # genera, sin construir la página completa en memoria
+    orden = obtener_orden()
+    partes = stream_template('catalogo.html', revistas=iter(g.sistema.ordenadas(orden)),
+                             total=g.sistema.total(), orden=orden, completo=True)
+    return app.response_class(en_bloques(partes), mimetype='text/html')
 
 @app.route('/explorar')
 def explorar():
@@ -98,18 +349,57 @@ def explorar():
     return render_template('explorar.html', letras=letras)
 
 @app.route('/explorar/<letra>')
+@cache.cachear(version_datos)
 def explorar_por_letra(letra):
     letra = letra.lower().strip()
-    revistas = [revista for revista in sistema.revista if revista.title.strip().lower().startswith(letra)]
+    revistas = g.sistema.buscar_por_letra(letra)
     return render_template('revistas_por_letra.html', letra=letra, revistas=revistas)
 
 @app.route('/revista/<nombre_revista>')
+@cache.cachear(version_datos)
 def mostrar_revista(nombre_revista):
-    for revista in sistema.revista:
-        if revista.title.strip().lower() == nombre_revista.strip().lower():
-            return render_template('revista.html', revista=revista.to_dict())
+    revista = g.sistema.obtener_por_titulo(nombre_revista)
+    if revista:
+        conjuntos = g.membresias.de_revista(revista.title) if g.membresias else []
+        return render_template('revista.html', revista=revista.to_dict(), widget=fuente_widget(revista.widget_url),
+                               conjuntos=conjuntos)
     return f"No se encontró la revista con el nombre: {nombre_revista}", 404
 
+def fuente_widget(widget_url):
+    # Con la copia local la página apunta siempre a /widget/<id>, así puede
+    # guardarse en la caché de respuestas antes de que la imagen se descargue.
+    # Sin copia local no se muestra la imagen: solo queda el enlace a Scimago
+    id_widget = wg.id_widget(widget_url)
+    if widgets and id_widget:
+        return url_for('widget', id_widget=int(id_widget))
+    return None
+
+def ids_widgets(sistema):
+    # Ids de widget de las revistas cargadas; se calculan una vez por sistema
+    ids = getattr(sistema, 'ids_widgets', None)
+    if ids is None:
+        ids = frozenset(wg.id_widget(revista.widget_url) for revista in sistema.ordenadas()) - {None}
+        sistema.ids_widgets = ids
+    return ids
+
+@app.route('/widget/<int:id_widget>')
+def widget(id_widget):
+    # Solo se descargan los widgets de revistas del catálogo
+    if widgets is None or str(id_widget) not in ids_widgets(g.sistema):
+        return "Widget no encontrado", 404
+    imagen = widgets.leer(str(id_widget))
+    if imagen is None:
+        # La descarga quedó pedida en segundo plano; la página oculta la imagen
+        respuesta = Response("Widget en descarga", status=503, mimetype='text/plain')
+        respuesta.retry_after = 60
+        return respuesta
+    contenido, tipo = imagen
+    respuesta = Response(contenido, mimetype=tipo)
+    respuesta.add_etag()
+    respuesta.cache_control.public = True
+    respuesta.cache_control.max_age = wg.TTL_WIDGETS
+    return respuesta.make_conditional(request)
+
 @app.route('/creditos')
 def creditos():
     return render_template('creditos.html')
@@ -1,80 +1,203 @@
+import argparse
 import csv
 import glob
+import hashlib
 import os
 import json
-
-def columnas_areas(ruta):
-    resultado = {}  
-
-    archivos_csv = glob.glob(os.path.join(ruta, '*.csv')) #se utilizo ia para leer los archivos con terminacion en .csv
-
-    for ruta in archivos_csv:
-        area_nombre = os.path.splitext(os.path.basename(ruta))[0]  
-        print(f"Procesando: {ruta} como área: {area_nombre}")
-        with open(ruta, newline='', encoding='latin-1') as archivo:
-            lector = csv.DictReader(archivo)
-            for fila in lector:
-                try:
-                    titulo = fila['TITULO:'].strip().lower()
-                    if titulo not in resultado:
-                        resultado[titulo] = {'areas': [], 'catalogos': []}
-                    if area_nombre not in resultado[titulo]['areas']:
-                        resultado[titulo]['areas'].append(area_nombre)
-                except KeyError:
-                    print(f"⚠️ Columna 'TITULO:' no encontrada en: {ruta}")
-    return resultado
-
-def columnas_catalogos(ruta):
-    resultado = {}
-
-    archivos_csv = glob.glob(os.path.join(ruta, '*.csv'))
-
-    for ruta in archivos_csv:
-        catalogo_nombre = os.path.splitext(os.path.basename(ruta))[0]
-        print(f"Procesando: {ruta} como catálogo: {catalogo_nombre}")
-        with open(ruta, newline='', encoding='latin-1') as archivo:
-            lector = csv.DictReader(archivo)
-            for fila in lector:
-                try:
-                    titulo = fila['TITULO:'].strip().lower()
-                    if titulo not in resultado:
-                        resultado[titulo] = {'areas': [], 'catalogos': []}
-                    if catalogo_nombre not in resultado[titulo]['catalogos']:
-                        resultado[titulo]['catalogos'].append(catalogo_nombre)
-                except KeyError:
-                    print(f"⚠️ Columna 'TITULO:' no encontrada en: {ruta}")
-    return resultado
-
-def revista_total(area, catalogos):
+from concurrent.futures import ProcessPoolExecutor
+
+RUTA_JSON = 'datos/json/revistas.json'
+# Firma (mtime, tamaño y hash) de cada CSV usado en la última construcción
+RUTA_MANIFIESTO = 'datos/json/revistas.manifiesto.json'
+
+def archivos_csv(ruta):
+    # Orden fijo para que las listas de áreas y catálogos no dependan del sistema de archivos
+    return sorted(glob.glob(os.path.join(ruta, '*.csv'))) #se utilizo ia para leer los archivos con terminacion en .csv
+
+def nombre_csv(ruta):
+    return os.path.splitext(os.path.basename(ruta))[0]
+
+def leer_titulos(ruta):
+    # Devuelve los títulos del CSV uno por uno, sin cargar el archivo completo
+    with open(ruta, newline='', encoding='latin-1') as archivo:
+        lector = csv.DictReader(archivo)
+        for fila in lector:
+            try:
+                yield fila['TITULO:'].strip().lower()
+            except KeyError:
+                print(f"⚠️ Columna 'TITULO:' no encontrada en: {ruta}")
+                return
+
+def leer_parcial(fuente):
+    """
+    Lee un CSV y devuelve su resultado parcial (tipo, nombre, títulos). Los
+    títulos repetidos dentro del archivo se descartan con un diccionario, que
+    conserva el orden de aparición. Se ejecuta en un proceso aparte cuando la
+    lectura es en paralelo.
+    """
+    ruta, tipo = fuente
+    print(f"Procesando: {ruta} como {'área' if tipo == 'areas' else 'catálogo'}: {nombre_csv(ruta)}")
+    return tipo, nombre_csv(ruta), list(dict.fromkeys(leer_titulos(ruta)))
+
+def leer_parciales(fuentes, procesos=1):
+    # Con varios procesos cada CSV se lee en su propio proceso; map conserva
+    # el orden de las fuentes, así que el resultado no depende de cuál termina antes
+    if procesos > 1 and len(fuentes) > 1:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(fuentes))) as pool:
+            return list(pool.map(leer_parcial, fuentes))
+    return map(leer_parcial, fuentes)
+
+def revista_total(parciales):
+    """
+    Combina los resultados parciales en el diccionario titulo -> {areas, catalogos}.
+    Cada parcial ya viene sin títulos repetidos, así que el nombre del CSV se
+    agrega sin buscarlo en la lista.
+    """
     revistas = {}
+    for tipo, nombre, titulos in parciales:
+        for titulo in titulos:
+            datos = revistas.get(titulo)
+            if datos is None:
+                datos = revistas[titulo] = {'areas': [], 'catalogos': []}
+            datos[tipo].append(nombre)
+    return revistas
 
-    for titulo, datos in revistas_areas.items():
-        revistas[titulo] = {'areas': datos['areas'], 'catalogos': []}
+def columnas_areas(ruta, procesos=1):
+    return revista_total(leer_parciales([(r, 'areas') for r in archivos_csv(ruta)], procesos))
 
-    for titulo, datos in revistas_catalogos.items():
-        if titulo in revistas:
-            revistas[titulo]['catalogos'] = datos['catalogos']
-        else:
-            revistas[titulo] = {'areas': [], 'catalogos': datos['catalogos']}
-    return revistas
+def columnas_catalogos(ruta, procesos=1):
+    return revista_total(leer_parciales([(r, 'catalogos') for r in archivos_csv(ruta)], procesos))
 
-def revista_json(revista):
-    os.makedirs('datos/json', exist_ok=True)
+def fuentes_csv(ruta_areas, ruta_catalogos):
+    fuentes = [(ruta, 'areas') for ruta in archivos_csv(ruta_areas)]
+    fuentes += [(ruta, 'catalogos') for ruta in archivos_csv(ruta_catalogos)]
+    return fuentes
 
-    ruta_json = 'datos/json/revistas.json'
+def construir_completo(ruta_areas, ruta_catalogos, procesos=1):
+    return revista_total(leer_parciales(fuentes_csv(ruta_areas, ruta_catalogos), procesos))
+
+def revista_json(revista, ruta_json=RUTA_JSON):
+    os.makedirs(os.path.dirname(ruta_json), exist_ok=True)
 
     with open(ruta_json, 'w', encoding='latin-1') as f:
        json.dump(revista, f, ensure_ascii=False, indent=4)
 
     print(f"✅ Diccionario guardado en: {ruta_json}")
 
+def hash_archivo(ruta):
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+def leer_json(ruta, encoding):
+    try:
+        with open(ruta, encoding=encoding) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def guardar_manifiesto(manifiesto, ruta_manifiesto=RUTA_MANIFIESTO):
+    with open(ruta_manifiesto, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=4)
+
+def firmar(ruta, tipo, anterior=None):
+    """
+    Devuelve la firma del CSV. El hash solo se recalcula si cambió la fecha de
+    modificación o el tamaño respecto a la firma anterior.
+    """
+    estado = os.stat(ruta)
+    firma = {'tipo': tipo, 'mtime': estado.st_mtime, 'tamano': estado.st_size}
+    if anterior and anterior['mtime'] == firma['mtime'] and anterior['tamano'] == firma['tamano']:
+        firma['hash'] = anterior['hash']
+    else:
+        firma['hash'] = hash_archivo(ruta)
+    return firma
+
+def quitar_columna(revistas, tipo, nombre, conservar=()):
+    # Quita el nombre del CSV de los títulos que ya no aparecen en él y elimina
+    # los títulos que se quedan sin áreas ni catálogos
+    for titulo in list(revistas):
+        datos = revistas[titulo]
+        if nombre in datos[tipo] and titulo not in conservar:
+            datos[tipo].remove(nombre)
+            if not datos['areas'] and not datos['catalogos']:
+                del revistas[titulo]
+
+def parchear_columna(revistas, parcial, orden):
+    """
+    Actualiza el diccionario combinado con el contenido actual de un CSV
+
+    Args:
+        revistas: Diccionario titulo -> {'areas', 'catalogos'} a modificar
+        parcial: Resultado de leer_parcial del CSV que cambió
+        orden: Nombres de los CSV del mismo tipo en el orden de la construcción
+            completa, para que las listas queden igual que al reconstruir
+    """
+    tipo, nombre, titulos = parcial
+    quitar_columna(revistas, tipo, nombre, conservar=set(titulos))
+    posicion = {n: i for i, n in enumerate(orden)}
+    for titulo in titulos:
+        datos = revistas.setdefault(titulo, {'areas': [], 'catalogos': []})
+        if nombre not in datos[tipo]:
+            datos[tipo].append(nombre)
+            datos[tipo].sort(key=lambda n: posicion.get(n, len(posicion)))
+
+def construir_incremental(ruta_areas, ruta_catalogos, ruta_json=RUTA_JSON,
+                          ruta_manifiesto=RUTA_MANIFIESTO, completo=False, procesos=1):
+    """
+    Genera revistas.json volviendo a leer solo los CSV que cambiaron desde la
+    última construcción. Si no hay manifiesto o JSON previo (o completo=True)
+    se reconstruye todo. Devuelve el diccionario combinado, o None si ningún
+    CSV cambió (en ese caso revistas.json ni siquiera se lee). Con procesos > 1
+    los CSV a leer se reparten entre varios procesos.
+    """
+    fuentes = fuentes_csv(ruta_areas, ruta_catalogos)
+
+    manifiesto = {} if completo else (leer_json(ruta_manifiesto, 'utf-8') or {})
+    nuevo_manifiesto = {ruta: firmar(ruta, tipo, manifiesto.get(ruta)) for ruta, tipo in fuentes}
+    cambiados = [(ruta, tipo) for ruta, tipo in fuentes
+                 if ruta not in manifiesto or manifiesto[ruta]['hash'] != nuevo_manifiesto[ruta]['hash']]
+    eliminados = [ruta for ruta in manifiesto if ruta not in nuevo_manifiesto]
+
+    revistas = None
+    if manifiesto and not (cambiados or eliminados) and os.path.exists(ruta_json):
+        print("Los CSV no cambiaron desde la última construcción")
+        # Se guarda para registrar las nuevas fechas de modificación
+        guardar_manifiesto(nuevo_manifiesto, ruta_manifiesto)
+        return None
+    if manifiesto:
+        revistas = leer_json(ruta_json, 'latin-1')
+
+    if revistas is None:
+        print("Construcción completa de revistas.json")
+        revistas = construir_completo(ruta_areas, ruta_catalogos, procesos)
+        revista_json(revistas, ruta_json)
+        guardar_manifiesto(nuevo_manifiesto, ruta_manifiesto)
+        return revistas
+
+    orden = {tipo: [nombre_csv(ruta) for ruta, t in fuentes if t == tipo] for tipo in ('areas', 'catalogos')}
+    for ruta in eliminados:
+        print(f"Eliminado: {ruta}")
+        quitar_columna(revistas, manifiesto[ruta]['tipo'], nombre_csv(ruta))
+    print(f"{len(cambiados)} CSV cambiaron desde la última construcción")
+    for parcial in leer_parciales(cambiados, procesos):
+        parchear_columna(revistas, parcial, orden[parcial[0]])
+    revista_json(revistas, ruta_json)
+    guardar_manifiesto(nuevo_manifiesto, ruta_manifiesto)
+    return revistas
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Combina los CSV de áreas y catálogos en revistas.json")
+    parser.add_argument("--completo", action="store_true",
+                        help="Reconstruye revistas.json desde cero aunque los CSV no hayan cambiado")
+    parser.add_argument("--procesos", type=int, default=1,
+                        help="Procesos para leer los CSV en paralelo (0 = uno por núcleo)")
+    args = parser.parse_args()
+
     ruta_areas = 'datos/csv/areas'
     ruta_catalogos = 'datos/csv/catalogos'
 
-    revistas_areas = columnas_areas(ruta_areas)
-    revistas_catalogos = columnas_catalogos(ruta_catalogos)
-
-    revista = revista_total(revistas_areas, revistas_catalogos)
-
-    revista_json(revista)
+    procesos = args.procesos or os.cpu_count() or 1
+    construir_incremental(ruta_areas, ruta_catalogos, completo=args.completo, procesos=procesos)
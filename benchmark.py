@@ -0,0 +1,315 @@
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import quote
+
+# Catálogos sintéticos con la misma forma que Scimago.json
+TAMANOS = (1000, 10000, 100000)
+AREAS = [
+    "Agricultural and Biological Sciences", "Arts and Humanities", "Biochemistry, Genetics and Molecular Biology",
+    "Business, Management and Accounting", "Chemical Engineering", "Chemistry", "Computer Science",
+    "Decision Sciences", "Dentistry", "Earth and Planetary Sciences", "Economics, Econometrics and Finance",
+    "Energy", "Engineering", "Environmental Science", "Health Professions", "Immunology and Microbiology",
+    "Materials Science", "Mathematics", "Medicine", "Multidisciplinary", "Neuroscience", "Nursing",
+    "Pharmacology, Toxicology and Pharmaceutics", "Physics and Astronomy", "Psychology", "Social Sciences",
+    "Veterinary",
+]
+PRIMERAS = ["Journal of", "Revista de", "Acta", "Annals of", "International Journal of", "Revista Brasileira de",
+            "Cuadernos de", "Estudios de", "Archives of", "Advances in", "Bulletin of", "Letters in"]
+PALABRAS = ["Applied", "Clinical", "Agrícola", "Ciencias", "Química", "Economía", "Historia", "Physics",
+            "Materials", "Medicine", "Ingeniería", "Veterinaria", "Psychology", "Biología", "Molecular",
+            "Environmental", "Social", "Educación", "Matemáticas", "Research", "Energy", "Computing",
+            "Nutrición", "Pecuaria", "Neurociencia", "Geografía", "Law", "Politics", "Engineering", "Studies"]
+EDITORIALES = ["Elsevier", "Springer Nature", "Wiley-Blackwell", "Taylor and Francis", "SciELO", "UNAM", "MDPI"]
+TIPOS = ["Journals", "Journals", "Journals", "Book Series", "Conferences and Proceedings", "Trade Journals"]
+# Límite de tiempo por ruta: las páginas grandes se miden con menos peticiones
+SEGUNDOS_POR_RUTA = 3.0
+
+
+def generar_catalogo(n, semilla=0):
+    """
+    Lista de n revistas sintéticas con los campos del JSON del scraper
+    """
+    azar = random.Random(semilla)
+    revistas = []
+    for i in range(n):
+        titulo = " ".join([azar.choice(PRIMERAS)] + azar.sample(PALABRAS, azar.randint(1, 4)))
+        # Algunos títulos se repiten en Scimago; el número evita que se repitan todos
+        if azar.random() < 0.9:
+            titulo += f" {i}"
+        h_index = str(int(azar.paretovariate(1.2) * 3)) if azar.random() > 0.01 else "N/A"
+        issn = ", ".join(f"{azar.randint(0, 99999999):08d}" for _ in range(azar.randint(0, 2)))
+        revistas.append({
+            "title": titulo.upper() if azar.random() < 0.5 else titulo,
+            "url": f"https://www.scimagojr.com/journalsearch.php?q={i}&tip=sid&clean=0",
+            "h-index": h_index,
+            "subject_area": azar.sample(AREAS, azar.randint(1, 3)),
+            "publisher": azar.choice(EDITORIALES),
+            "issn": issn,
+            "publication_type": azar.choice(TIPOS),
+            "search_url": f"https://www.scimagojr.com/journalsearch.php?q={quote(titulo)}",
+            "widget_url": f"https://www.scimagojr.com/journal_img.php?id={i}",
+            "widget_html": f'<a href="https://www.scimagojr.com/journalsearch.php?q={i}&amp;tip=sid&amp;exact=no" '
+                           f'title="SCImago Journal &amp; Country Rank"><img border="0" '
+                           f'src="https://www.scimagojr.com/journal_img.php?id={i}" '
+                           f'alt="SCImago Journal &amp; Country Rank"  /></a>',
+        })
+    return revistas
+
+
+def percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def resumir_tiempos(tiempos, duracion):
+    # tiempos en segundos; duracion es el tiempo de pared total de la medición
+    ordenados = sorted(tiempos)
+    return {
+        "peticiones": len(tiempos),
+        "por_segundo": round(len(tiempos) / duracion, 1) if duracion else 0.0,
+        "media_ms": round(sum(tiempos) / len(tiempos) * 1000, 3) if tiempos else 0.0,
+        "p50_ms": round(percentil(ordenados, 50) * 1000, 3),
+        "p99_ms": round(percentil(ordenados, 99) * 1000, 3),
+    }
+
+
+def medir(funciones, repeticiones, segundos=SEGUNDOS_POR_RUTA):
+    """
+    Ejecuta las funciones en rotación hasta completar las repeticiones o
+    agotar el tiempo (siempre al menos una vuelta completa)
+    """
+    for funcion in funciones:
+        funcion()  # calentamiento
+    tiempos = []
+    inicio = time.perf_counter()
+    for i in range(repeticiones):
+        antes = time.perf_counter()
+        funciones[i % len(funciones)]()
+        tiempos.append(time.perf_counter() - antes)
+        if antes - inicio > segundos and i >= len(funciones):
+            break
+    return resumir_tiempos(tiempos, time.perf_counter() - inicio)
+
+
+def consultas_de_prueba(datos, semilla=0):
+    # Títulos, palabras, áreas y letras tomados del propio catálogo
+    azar = random.Random(semilla)
+    muestra = azar.sample(datos, min(20, len(datos)))
+    palabras = sorted({palabra for revista in muestra for palabra in revista["title"].split()[1:3]
+                       if not palabra.isdigit()})
+    return {
+        "titulos": [revista["title"] for revista in muestra],
+        "palabras": palabras[:10],
+        "areas": AREAS[::3],
+        "letras": list("acjr"),
+        "prefijos": ["re", "jour", "acta ", "int", "cuadernos de"],
+        "issns": [revista["issn"].split(",")[0] for revista in muestra if revista["issn"]],
+    }
+
+
+def microbenchmarks(sistema, consultas, repeticiones):
+    pruebas = {
+        "buscar_por_titulo": [lambda p=p: sistema.buscar_por_titulo(p.lower().replace(" ", ""), ignorar_espacios=True)
+                              for p in consultas["palabras"]],
+        "buscar_por_area": [lambda a=a: sistema.buscar_por_area(a) for a in consultas["areas"]],
+        "buscar_por_letra": [lambda l=l: sistema.buscar_por_letra(l) for l in consultas["letras"]],
+        "obtener_por_titulo": [lambda t=t: sistema.obtener_por_titulo(t) for t in consultas["titulos"]],
+        "buscar_relevantes": [lambda p=p: sistema.buscar_relevantes(p, 50) for p in consultas["palabras"]],
+        "sugerir": [lambda p=p: sistema.sugerir(p, 10) for p in consultas["prefijos"]],
+        "pagina_h_index": [lambda i=i: sistema.pagina("h_index", i * 50, 50) for i in range(0, 100, 7)],
+    }
+    return {nombre: medir(funciones, repeticiones) for nombre, funciones in pruebas.items()}
+
+
+def rutas_de_prueba(consultas):
+    # nombre -> lista de peticiones (método, url, cuerpo JSON)
+    lote = {"titulos": consultas["titulos"] * 5, "issns": consultas["issns"]}
+    return {
+        "inicio": [("GET", "/", None)],
+        "area": [("GET", "/area", None)],
+        "area_consulta": [("GET", f"/area?area={quote(a)}", None) for a in consultas["areas"]],
+        "area_nombre": [("GET", f"/area/{quote(a)}", None) for a in consultas["areas"]],
+        "buscar": [("GET", f"/buscar?q={quote(p)}", None) for p in consultas["palabras"]],
+        "catalogo": [("GET", f"/catalogo?pagina={p}", None) for p in (1, 2, 5, 10, 50)],
+        "catalogo_h_index": [("GET", f"/catalogo?orden=h_index&pagina={p}", None) for p in (1, 3, 20)],
+        "catalogo_completo": [("GET", "/catalogo/completo", None)],
+        "explorar": [("GET", "/explorar", None)],
+        "explorar_letra": [("GET", f"/explorar/{l}", None) for l in consultas["letras"]],
+        "revista": [("GET", f"/revista/{quote(t)}", None) for t in consultas["titulos"]],
+        "creditos": [("GET", "/creditos", None)],
+        "api_sugerencias": [("GET", f"/api/sugerencias?q={quote(p)}", None) for p in consultas["prefijos"]],
+        "api_lookup": [("POST", "/api/revistas/lookup", lote)],
+    }
+
+
+def prueba_de_carga(app, peticiones, repeticiones, hilos=1, segundos=SEGUNDOS_POR_RUTA):
+    """
+    Envía las peticiones con el cliente de prueba de Flask desde varios
+    hilos; devuelve peticiones por segundo y latencias p50/p99
+    """
+    errores = []
+
+    def enviar(cliente, i):
+        metodo, url, cuerpo = peticiones[i % len(peticiones)]
+        respuesta = cliente.open(url, method=metodo, json=cuerpo)
+        respuesta.get_data()  # consume también las respuestas por partes
+        if respuesta.status_code >= 400:
+            errores.append(f"{metodo} {url}: {respuesta.status_code}")
+
+    cliente = app.test_client()
+    for i in range(len(peticiones)):
+        enviar(cliente, i)  # calentamiento
+    tiempos = []
+    inicio = time.perf_counter()
+
+    def trabajador(numero):
+        cliente = app.test_client()
+        for i in range(numero, repeticiones, hilos):
+            antes = time.perf_counter()
+            enviar(cliente, i)
+            tiempos.append(time.perf_counter() - antes)
+            if antes - inicio > segundos and i >= len(peticiones):
+                break
+
+    with ThreadPoolExecutor(hilos) as ejecutor:
+        list(ejecutor.map(trabajador, range(hilos)))
+    resultado = resumir_tiempos(tiempos, time.perf_counter() - inicio)
+    if errores:
+        resultado["errores"] = sorted(set(errores))
+    return resultado
+
+
+def cargar_app(directorio, motor):
+    # app2 lee Scimago.json del directorio actual al importarse: se importa
+    # dentro del directorio temporal y sin recarga automática
+    os.environ["INTERVALO_RECARGA"] = "0"
+    os.environ["MOTOR_BUSQUEDA"] = motor
+    os.chdir(directorio)
+    with open("Scimago.json", "w", encoding="utf-8") as f:
+        json.dump(generar_catalogo(10), f)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app2
+    return app2
+
+
+def version_git():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ejecutar(tamanos, repeticiones, hilos, motor, con_cache):
+    resultados = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": version_git(),
+        "python": platform.python_version(),
+        "motor": motor,
+        "hilos": hilos,
+        "tamanos": {},
+    }
+    with tempfile.TemporaryDirectory() as directorio:
+        original = os.getcwd()
+        try:
+            app2 = cargar_app(directorio, motor)
+            for n in tamanos:
+                datos = generar_catalogo(n)
+                ruta = os.path.join(directorio, f"catalogo_{n}.json")
+                with open(ruta, "w", encoding="utf-8") as f:
+                    json.dump(datos, f, ensure_ascii=False)
+                inicio = time.perf_counter()
+                sistema = app2.cargar_para_recarga(ruta)
+                carga = time.perf_counter() - inicio
+                app2.reemplazar_sistema(sistema)
+                print(f"\n📚 {n} revistas (carga e índices en {carga:.2f} s)")
+
+                consultas = consultas_de_prueba(datos)
+                resultado = {"carga_s": round(carga, 3), "micro": microbenchmarks(sistema, consultas, repeticiones)}
+                for nombre, medida in resultado["micro"].items():
+                    print(f"  {nombre:<22}{medida['p50_ms']:>10.3f} ms p50{medida['p99_ms']:>10.3f} ms p99")
+
+                modos = {"rutas": 0}
+                if con_cache:
+                    modos["rutas_cache"] = app2.CACHE_RESPUESTAS
+                for modo, capacidad in modos.items():
+                    app2.cache.capacidad = capacidad
+                    resultado[modo] = {}
+                    for nombre, peticiones in rutas_de_prueba(consultas).items():
+                        medida = prueba_de_carga(app2.app, peticiones, repeticiones, hilos)
+                        resultado[modo][nombre] = medida
+                        print(f"  {modo + ' ' + nombre:<34}{medida['por_segundo']:>10.1f}/s"
+                              f"{medida['p50_ms']:>10.2f} ms p50{medida['p99_ms']:>10.2f} ms p99"
+                              + (f"  ⚠️ {medida['errores']}" if "errores" in medida else ""))
+                resultados["tamanos"][str(n)] = resultado
+        finally:
+            os.chdir(original)
+    return resultados
+
+
+def comparar(anterior, actual, tolerancia=0.10):
+    """
+    Imprime el cambio de p50 entre dos resultados y devuelve las mediciones
+    que empeoraron más que la tolerancia
+    """
+    regresiones = []
+    for n, resultado in actual["tamanos"].items():
+        previo = anterior.get("tamanos", {}).get(n)
+        if not previo:
+            continue
+        print(f"\n📊 {n} revistas ({anterior.get('commit')} → {actual.get('commit')})")
+        for seccion in ("micro", "rutas", "rutas_cache"):
+            for nombre, medida in resultado.get(seccion, {}).items():
+                antes = previo.get(seccion, {}).get(nombre)
+                if not antes or not antes["p50_ms"]:
+                    continue
+                cambio = medida["p50_ms"] / antes["p50_ms"] - 1
+                marca = ""
+                if cambio > tolerancia:
+                    marca = "  ⚠️"
+                    regresiones.append((n, seccion, nombre, cambio))
+                print(f"  {seccion + ' ' + nombre:<34}{antes['p50_ms']:>10.3f} →{medida['p50_ms']:>10.3f} ms"
+                      f"{cambio:>+9.1%}{marca}")
+    return regresiones
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mide las búsquedas y las rutas de la aplicación con catálogos sintéticos")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=list(TAMANOS),
+                        help="Número de revistas de cada catálogo sintético")
+    parser.add_argument("--repeticiones", type=int, default=200,
+                        help="Repeticiones máximas por medición")
+    parser.add_argument("--hilos", type=int, default=1,
+                        help="Hilos que envían peticiones al mismo tiempo en la prueba de carga")
+    parser.add_argument("--motor", choices=["memoria", "sqlite"], default="memoria",
+                        help="Motor de búsqueda de la aplicación")
+    parser.add_argument("--con-cache", action="store_true",
+                        help="Mide también las rutas con la caché de respuestas activa")
+    parser.add_argument("--salida", default="benchmark.json",
+                        help="Archivo JSON donde se guardan los resultados")
+    parser.add_argument("--comparar", metavar="ANTERIOR",
+                        help="Resultados de otro commit contra los que se comparan los nuevos")
+    args = parser.parse_args()
+
+    resultados = ejecutar(args.tamanos, args.repeticiones, args.hilos, args.motor, args.con_cache)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ Resultados guardados en: {os.path.abspath(args.salida)}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regresiones = comparar(json.load(f), resultados)
+        if regresiones:
+            print(f"\n⚠️ {len(regresiones)} mediciones más lentas que en {args.comparar}")
+            sys.exit(1)
@@ -0,0 +1,114 @@
+import json
+import os
+
+
+def clave_titulo(titulo):
+    return (titulo or '').strip().lower()
+
+
+def escribir_json_atomico(ruta, datos):
+    """
+    Escribe el JSON en un archivo temporal y lo renombra, así una caída a
+    mitad de la escritura nunca deja el archivo final truncado
+    """
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, indent=4, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+
+
+def combinar(existentes, nuevas):
+    """
+    Une dos listas de revistas sin repetir títulos. Si un título aparece en
+    ambas se conserva la versión de 'nuevas' (una revista vuelta a consultar)
+    en la posición original.
+    """
+    por_titulo = {}
+    for revista in existentes + nuevas:
+        por_titulo[clave_titulo(revista.get('title'))] = revista
+    return list(por_titulo.values())
+
+
+class BitacoraScrapper:
+    """
+    Bitácora de solo anexado para el scraper.
+
+    Cada revista obtenida se agrega como una línea a '<salida>.jsonl' y cada
+    título procesado (con o sin éxito) a '<salida>.procesados'. Ambas
+    escrituras se sincronizan con fsync, así que tras una caída se pierde como
+    mucho la revista en curso. Al terminar, compactar() genera el JSON final.
+
+    Args:
+        ruta_salida: Ruta del JSON final (por ejemplo datos/json/Scimago.json)
+    """
+    def __init__(self, ruta_salida):
+        self.ruta_salida = ruta_salida
+        base = os.path.splitext(ruta_salida)[0]
+        self.ruta_registros = base + '.jsonl'
+        self.ruta_procesados = base + '.procesados'
+        self._archivos = {}
+
+    def _leer_lineas(self, ruta):
+        if not os.path.exists(ruta):
+            return []
+        valores = []
+        with open(ruta, encoding='utf-8') as f:
+            for linea in f:
+                try:
+                    valores.append(json.loads(linea))
+                except json.JSONDecodeError:
+                    # Línea incompleta por una caída durante la escritura
+                    continue
+        return valores
+
+    def registros(self):
+        return self._leer_lineas(self.ruta_registros)
+
+    def procesados(self):
+        return set(self._leer_lineas(self.ruta_procesados))
+
+    def _anexar(self, ruta, valor):
+        archivo = self._archivos.get(ruta)
+        if archivo is None:
+            archivo = open(ruta, 'a+b')
+            # Si la última línea quedó a medias se empieza en una línea nueva
+            if archivo.tell() > 0:
+                archivo.seek(-1, os.SEEK_END)
+                if archivo.read(1) != b'\n':
+                    archivo.write(b'\n')
+            self._archivos[ruta] = archivo
+        archivo.write(json.dumps(valor, ensure_ascii=False).encode('utf-8') + b'\n')
+        archivo.flush()
+        os.fsync(archivo.fileno())
+
+    def registrar(self, titulo, info):
+        """
+        Anota el resultado de un título: primero la revista (si la hay) y
+        después la marca de procesado
+        """
+        if info:
+            self._anexar(self.ruta_registros, info)
+        self._anexar(self.ruta_procesados, clave_titulo(titulo))
+
+    def cerrar(self):
+        for archivo in self._archivos.values():
+            archivo.close()
+        self._archivos = {}
+
+    def reiniciar(self):
+        self.cerrar()
+        for ruta in (self.ruta_registros, self.ruta_procesados):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
+    def compactar(self, existentes):
+        """
+        Escribe el JSON final con las revistas existentes más las de la
+        bitácora y vacía la bitácora. Devuelve la lista resultante.
+        """
+        datos = combinar(existentes, self.registros())
+        escribir_json_atomico(self.ruta_salida, datos)
+        self.reiniciar()
+        return datos
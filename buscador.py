@@ -0,0 +1,183 @@
+import heapq
+import math
+import re
+import sys
+import time
+import unicodedata
+from collections import Counter
+
+# Parámetros de BM25
+K1 = 1.2
+B = 0.75
+# Distancia de edición máxima que se tolera (solo en palabras largas)
+DISTANCIA_MAXIMA = 2
+PALABRA = re.compile(r'\w+')
+
+
+def plegar(texto):
+    """
+    Minúsculas y sin acentos: 'ACTA AGRÍCOLA' -> 'acta agricola'
+    """
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+def tokenizar(texto):
+    return PALABRA.findall(plegar(texto or ''))
+
+
+def limite_edicion(palabra):
+    # Las palabras cortas solo se buscan exactas; las largas toleran más errores
+    if len(palabra) < 4:
+        return 0
+    if len(palabra) < 10:
+        return 1
+    return DISTANCIA_MAXIMA
+
+
+def borrados(palabra, distancia):
+    # Todas las variantes de la palabra con hasta 'distancia' letras borradas
+    resultado = {palabra}
+    frontera = {palabra}
+    for _ in range(distancia):
+        frontera = {p[:i] + p[i + 1:] for p in frontera if len(p) > 1 for i in range(len(p))}
+        resultado |= frontera
+    return resultado
+
+
+def distancia_edicion(a, b, maximo):
+    """
+    Distancia de Damerau-Levenshtein (transposiciones adyacentes) entre a y b,
+    o maximo + 1 si es mayor que maximo
+    """
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    anterior2 = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            costo = 0 if a[i - 1] == b[j - 1] else 1
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + costo)
+            if anterior2 and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                actual[j] = min(actual[j], anterior2[j - 2] + 1)
+        if min(actual) > maximo:
+            return maximo + 1
+        anterior2, anterior = anterior, actual
+    return anterior[-1]
+
+
+class Buscador:
+    """
+    Índice invertido de títulos con ranking BM25, plegado de acentos y
+    tolerancia a errores de escritura mediante un índice de borrados.
+
+    Args:
+        titulos: Títulos en el orden de las posiciones que devolverá buscar()
+    """
+    def __init__(self, titulos):
+        frecuencias = {}
+        longitudes = []
+        for posicion, titulo in enumerate(titulos):
+            tokens = tokenizar(titulo)
+            longitudes.append(len(tokens))
+            for token, frecuencia in Counter(tokens).items():
+                frecuencias.setdefault(token, []).append((posicion, frecuencia))
+        total = len(longitudes)
+        promedio = (sum(longitudes) / total) if total else 0.0
+
+        # palabra -> [(posición, peso BM25)]; el peso ya incluye idf y la
+        # normalización por longitud, así una consulta solo suma
+        self.postings = {}
+        for token, lista in frecuencias.items():
+            idf = math.log(1 + (total - len(lista) + 0.5) / (len(lista) + 0.5))
+            self.postings[token] = [
+                (posicion, idf * frecuencia * (K1 + 1) /
+                 (frecuencia + K1 * (1 - B + B * longitudes[posicion] / promedio)))
+                for posicion, frecuencia in lista]
+
+        # variante con letras borradas -> palabra del vocabulario que la genera,
+        # o tupla de palabras si son varias (la mayoría tiene una sola)
+        self.indice_borrados = {}
+        for palabra in self.postings:
+            for variante in borrados(palabra, limite_edicion(palabra)):
+                actual = self.indice_borrados.get(variante)
+                if actual is None:
+                    self.indice_borrados[variante] = palabra
+                elif isinstance(actual, tuple):
+                    self.indice_borrados[variante] = actual + (palabra,)
+                else:
+                    self.indice_borrados[variante] = (actual, palabra)
+
+    def parecidas(self, palabra):
+        """
+        Palabras del vocabulario a distancia de edición tolerable de la
+        palabra (incluida ella misma si existe), como pares (palabra, distancia)
+        """
+        encontradas = {palabra: 0} if palabra in self.postings else {}
+        maximo = limite_edicion(palabra)
+        if maximo == 0:
+            return list(encontradas.items())
+        # Como en SymSpell: dos palabras a distancia <= maximo comparten alguna
+        # variante con hasta maximo letras borradas
+        for variante in borrados(palabra, maximo):
+            candidatas = self.indice_borrados.get(variante, ())
+            if isinstance(candidatas, str):
+                candidatas = (candidatas,)
+            for candidata in candidatas:
+                if candidata in encontradas:
+                    continue
+                distancia = distancia_edicion(palabra, candidata, min(maximo, limite_edicion(candidata)))
+                if distancia <= min(maximo, limite_edicion(candidata)):
+                    encontradas[candidata] = distancia
+        return list(encontradas.items())
+
+    def puntajes(self, consulta):
+        """
+        Puntaje BM25 de cada posición que coincide con al menos una palabra
+        """
+        puntajes = {}
+        for palabra in dict.fromkeys(tokenizar(consulta)):
+            # Un término encontrado a distancia d pesa 1 / (1 + d)
+            variantes = self.parecidas(palabra)
+            if len(variantes) == 1:
+                termino, distancia = variantes[0]
+                factor = 1 / (1 + distancia)
+                for posicion, peso in self.postings[termino]:
+                    puntajes[posicion] = puntajes.get(posicion, 0.0) + peso * factor
+                continue
+            # Para cada título cuenta solo la mejor variante de la palabra
+            mejores = {}
+            for termino, distancia in variantes:
+                factor = 1 / (1 + distancia)
+                for posicion, peso in self.postings[termino]:
+                    puntaje = peso * factor
+                    if puntaje > mejores.get(posicion, 0.0):
+                        mejores[posicion] = puntaje
+            for posicion, puntaje in mejores.items():
+                puntajes[posicion] = puntajes.get(posicion, 0.0) + puntaje
+        return puntajes
+
+    def buscar(self, consulta, limite=50):
+        """
+        Devuelve hasta 'limite' pares (posición, puntaje) ordenados por relevancia
+        """
+        puntajes = self.puntajes(consulta)
+        return heapq.nlargest(limite, puntajes.items(), key=lambda par: (par[1], -par[0]))
+
+
+if __name__ == '__main__':
+    # Uso: python buscador.py Scimago.json "consulta" ...
+    import json
+    with open(sys.argv[1], encoding='utf-8') as f:
+        titulos = [item.get("title", "") for item in json.load(f)]
+    inicio = time.perf_counter()
+    buscador = Buscador(titulos)
+    print(f"Índice de {len(titulos)} títulos en {(time.perf_counter() - inicio) * 1000:.0f} ms "
+          f"({len(buscador.postings)} palabras, {len(buscador.indice_borrados)} variantes)")
+    for consulta in sys.argv[2:]:
+        inicio = time.perf_counter()
+        resultados = buscador.buscar(consulta, 10)
+        print(f"\n'{consulta}' ({(time.perf_counter() - inicio) * 1000:.2f} ms)")
+        for posicion, puntaje in resultados:
+            print(f"  {puntaje:6.2f}  {titulos[posicion]}")
@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+import requests
+
+
+class FueraDeCacheError(requests.exceptions.RequestException):
+    """La URL no está en caché y el modo sin conexión impide descargarla"""
+
+
+class RespuestaCacheada:
+    """
+    Respuesta reconstruida desde el disco con la misma interfaz mínima que
+    usa el scraper de un requests.Response (text, content, status_code...)
+    """
+    desde_cache = True
+
+    def __init__(self, url, content, encoding, headers):
+        self.url = url
+        self.content = content
+        self.encoding = encoding
+        self.headers = headers
+        self.status_code = 200
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def raise_for_status(self):
+        pass
+
+
+def _sha256(datos):
+    return hashlib.sha256(datos).hexdigest()
+
+
+class CacheHTTP:
+    """
+    Caché persistente de respuestas HTTP en disco.
+
+    Los cuerpos se guardan por el hash de su contenido en 'objetos/' y cada URL
+    tiene un archivo de metadatos en 'urls/' con el hash del cuerpo, la fecha de
+    descarga y los encabezados ETag/Last-Modified para revalidar.
+
+    Args:
+        directorio: Carpeta donde se guarda la caché
+        ttl: Segundos que una respuesta se considera fresca sin revalidar
+        max_bytes: Tamaño máximo de los cuerpos guardados; al superarlo se
+            eliminan las entradas usadas hace más tiempo
+        offline: Si es True nunca se accede a la red (repetición desde caché)
+    """
+    def __init__(self, directorio, ttl=30 * 24 * 3600, max_bytes=2 * 1024 ** 3, offline=False):
+        self.directorio = directorio
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._dir_objetos = os.path.join(directorio, 'objetos')
+        self._dir_urls = os.path.join(directorio, 'urls')
+        os.makedirs(self._dir_objetos, exist_ok=True)
+        os.makedirs(self._dir_urls, exist_ok=True)
+        self._lock = threading.Lock()
+        self._tamano = None
+
+    def _ruta_meta(self, url):
+        return os.path.join(self._dir_urls, _sha256(url.encode('utf-8')) + '.json')
+
+    def _ruta_objeto(self, digest):
+        return os.path.join(self._dir_objetos, digest)
+
+    def _escribir(self, ruta, datos):
+        temporal = f"{ruta}.{threading.get_ident()}.tmp"
+        with open(temporal, 'wb') as f:
+            f.write(datos)
+        os.replace(temporal, ruta)
+
+    def _leer_meta(self, url):
+        try:
+            with open(self._ruta_meta(url), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _respuesta(self, meta):
+        try:
+            with open(self._ruta_objeto(meta['cuerpo']), 'rb') as f:
+                contenido = f.read()
+        except FileNotFoundError:
+            return None
+        # Se marca el uso para que la expulsión conserve las entradas recientes
+        try:
+            os.utime(self._ruta_meta(meta['url']))
+        except FileNotFoundError:
+            pass
+        return RespuestaCacheada(meta['url'], contenido, meta.get('encoding'), meta.get('headers', {}))
+
+    def leer(self, url):
+        """
+        Devuelve la respuesta guardada para la URL o None, sin acceder a la red
+        """
+        meta = self._leer_meta(url)
+        return self._respuesta(meta) if meta else None
+
+    def vigente(self, url):
+        """
+        Indica si la URL está guardada y todavía no supera el ttl
+        """
+        meta = self._leer_meta(url)
+        return bool(meta) and time.time() - meta['guardado'] < self.ttl
+
+    def guardar(self, url, respuesta):
+        contenido = respuesta.content
+        digest = _sha256(contenido)
+        ruta_objeto = self._ruta_objeto(digest)
+        meta = {
+            'url': url,
+            'cuerpo': digest,
+            'encoding': respuesta.encoding,
+            'guardado': time.time(),
+            'headers': {k: v for k, v in respuesta.headers.items()
+                        if k.lower() in ('content-type', 'etag', 'last-modified')},
+        }
+        # El cuerpo y su URL se escriben juntos con el candado tomado para que
+        # la expulsión nunca vea un cuerpo nuevo sin su URL. El cuerpo anterior
+        # de la URL queda huérfano y se borra en la siguiente expulsión
+        with self._lock:
+            nuevo = not os.path.exists(ruta_objeto)
+            if nuevo:
+                self._escribir(ruta_objeto, contenido)
+            self._escribir(self._ruta_meta(url), json.dumps(meta).encode('utf-8'))
+            if nuevo:
+                self._sumar(len(contenido))
+
+    def _renovar(self, meta):
+        meta['guardado'] = time.time()
+        self._escribir(self._ruta_meta(meta['url']), json.dumps(meta).encode('utf-8'))
+
+    def get(self, url, descargar):
+        """
+        Obtiene la URL desde la caché o, si no está fresca, con descargar(url, headers)
+
+        Args:
+            url: URL solicitada
+            descargar: Función que hace la petición real y devuelve un requests.Response
+        """
+        meta = self._leer_meta(url)
+        if meta and (self.offline or time.time() - meta['guardado'] < self.ttl):
+            respuesta = self._respuesta(meta)
+            if respuesta:
+                return respuesta
+        if self.offline:
+            raise FueraDeCacheError(f"Sin conexión y sin copia en caché: {url}")
+
+        # Revalidación condicional con los validadores guardados
+        headers = {}
+        if meta:
+            guardados = {k.lower(): v for k, v in meta.get('headers', {}).items()}
+            if 'etag' in guardados:
+                headers['If-None-Match'] = guardados['etag']
+            if 'last-modified' in guardados:
+                headers['If-Modified-Since'] = guardados['last-modified']
+
+        respuesta = descargar(url, headers)
+        if respuesta.status_code == 304 and meta:
+            cacheada = self._respuesta(meta)
+            if cacheada:
+                self._renovar(meta)
+                return cacheada
+            # El cuerpo fue expulsado: se pide de nuevo sin validadores
+            respuesta = descargar(url, {})
+        if respuesta.status_code == 200:
+            self.guardar(url, respuesta)
+        return respuesta
+
+    def _sumar(self, bytes_nuevos):
+        # Se llama con el candado tomado
+        if self._tamano is None:
+            self._tamano = sum(e.stat().st_size for e in os.scandir(self._dir_objetos)
+                               if not e.name.endswith('.tmp'))
+        else:
+            self._tamano += bytes_nuevos
+        if self._tamano > self.max_bytes:
+            self._expulsar()
+
+    def _expulsar(self):
+        """
+        Borra los cuerpos que ya no referencia ninguna URL (los que quedan al
+        guardar una URL con un contenido nuevo) y, si no alcanza, elimina las
+        URLs usadas hace más tiempo hasta quedar en el 90% del límite
+        """
+        entradas = sorted((e for e in os.scandir(self._dir_urls) if e.name.endswith('.json')),
+                          key=lambda e: e.stat().st_mtime)
+        objetivo = self.max_bytes * 0.9
+        cuerpos = {}
+        for entrada in entradas:
+            try:
+                with open(entrada.path, encoding='utf-8') as f:
+                    cuerpos[entrada.path] = json.load(f)['cuerpo']
+            except (OSError, ValueError, KeyError):
+                cuerpos[entrada.path] = None
+        referencias = Counter(cuerpos.values())
+
+        # guardar escribe cuerpo y URL con el candado tomado, así que aquí todo
+        # cuerpo sin referencias es de verdad un huérfano
+        for objeto in os.scandir(self._dir_objetos):
+            if objeto.name.endswith('.tmp') or objeto.name in referencias:
+                continue
+            try:
+                tamano = objeto.stat().st_size
+                os.remove(objeto.path)
+                self._tamano -= tamano
+            except FileNotFoundError:
+                pass
+
+        for entrada in entradas:
+            if self._tamano <= objetivo:
+                break
+            digest = cuerpos[entrada.path]
+            os.remove(entrada.path)
+            referencias[digest] -= 1
+            if digest and referencias[digest] == 0:
+                ruta = self._ruta_objeto(digest)
+                if os.path.exists(ruta):
+                    self._tamano -= os.path.getsize(ruta)
+                    os.remove(ruta)
@@ -0,0 +1,131 @@
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import make_response, request
+
+
+class CacheRespuestas:
+    """
+    Caché LRU en memoria de páginas ya renderizadas. La clave es la ruta con
+    sus parámetros y la versión de los datos con la que se generó la página;
+    cuando llega una versión mayor (recarga de Scimago.json) se vacía completa.
+    Las versiones solo avanzan: una petición que empezó antes de la recarga
+    y trae una versión menor no usa la caché ni la vacía.
+    Cada entrada lleva un ETag fuerte calculado sobre el contenido, así el
+    navegador puede revalidar y recibir 304 sin que se vuelva a enviar la página.
+
+    Args:
+        capacidad: Número máximo de páginas guardadas
+        max_bytes: Tamaño total máximo de las páginas guardadas
+    """
+    def __init__(self, capacidad=512, max_bytes=64 * 1024 * 1024):
+        self.capacidad = capacidad
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.no_modificadas = 0
+        self.invalidaciones = 0
+
+    def _cambiar_version(self, version):
+        # Se llama con el candado tomado; devuelve False si la versión es
+        # anterior a la actual
+        if self._version is not None and version < self._version:
+            return False
+        if version != self._version:
+            if self._entradas:
+                self.invalidaciones += 1
+            self._entradas.clear()
+            self._bytes = 0
+            self._version = version
+        return True
+
+    def obtener(self, clave, version):
+        with self._candado:
+            if not self._cambiar_version(version):
+                self.fallos += 1
+                return None
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada
+
+    def guardar(self, clave, version, cuerpo, mimetype):
+        entrada = (cuerpo, hashlib.sha256(cuerpo).hexdigest()[:32], mimetype)
+        if self.capacidad <= 0 or len(cuerpo) > self.max_bytes:
+            return entrada
+        with self._candado:
+            # Una página generada con datos anteriores a una recarga no se guarda
+            if self._cambiar_version(version):
+                anterior = self._entradas.pop(clave, None)
+                if anterior is not None:
+                    self._bytes -= len(anterior[0])
+                self._entradas[clave] = entrada
+                self._bytes += len(cuerpo)
+                while len(self._entradas) > self.capacidad or self._bytes > self.max_bytes:
+                    _, (viejo, _, _) = self._entradas.popitem(last=False)
+                    self._bytes -= len(viejo)
+        return entrada
+
+    def estadisticas(self):
+        with self._candado:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "capacidad": self.capacidad,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+                "no_modificadas": self.no_modificadas,
+                "invalidaciones": self.invalidaciones,
+            }
+
+    def cachear(self, version, condicion=None):
+        """
+        Decorador para vistas de Flask de solo lectura. Solo se guardan las
+        respuestas 200.
+
+        Args:
+            version: Función que devuelve la versión actual de los datos
+                (un número que crece con cada recarga)
+            condicion: Función opcional; si devuelve False la petición no usa la caché
+        """
+        def decorador(vista):
+            @functools.wraps(vista)
+            def envoltura(*args, **kwargs):
+                if condicion is not None and not condicion():
+                    return vista(*args, **kwargs)
+                actual = version()
+                clave = (request.path, tuple(sorted(request.args.items(multi=True))))
+                entrada = self.obtener(clave, actual)
+                estado = 'HIT'
+                if entrada is None:
+                    respuesta = make_response(vista(*args, **kwargs))
+                    if respuesta.status_code != 200 or respuesta.is_streamed:
+                        return respuesta
+                    entrada = self.guardar(clave, actual, respuesta.get_data(), respuesta.mimetype)
+                    estado = 'MISS'
+                cuerpo, etag, mimetype = entrada
+                respuesta = make_response(cuerpo)
+                respuesta.mimetype = mimetype
+                respuesta.set_etag(etag)
+                # El navegador guarda la página pero la revalida con el ETag en cada visita
+                respuesta.headers['Cache-Control'] = 'no-cache'
+                respuesta.headers['X-Cache'] = estado
+                respuesta = respuesta.make_conditional(request)
+                if respuesta.status_code == 304:
+                    with self._candado:
+                        self.no_modificadas += 1
+                return respuesta
+            return envoltura
+        return decorador
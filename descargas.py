@@ -0,0 +1,91 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+class LimitadorDeTasa:
+    """
+    Limita el número de peticiones por segundo compartido entre todos los hilos.
+    Cada llamada a esperar() reserva el siguiente turno libre y duerme hasta él.
+    """
+    def __init__(self, peticiones_por_segundo):
+        self.intervalo = 1.0 / peticiones_por_segundo if peticiones_por_segundo > 0 else 0.0
+        self._siguiente = time.monotonic()
+        self._lock = threading.Lock()
+
+    def esperar(self):
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(self._siguiente, ahora)
+            self._siguiente = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+def crear_sesion(conexiones=10):
+    """
+    Crea una sesión de requests con un pool de conexiones reutilizables
+    """
+    sesion = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=conexiones, pool_maxsize=conexiones)
+    sesion.mount('http://', adaptador)
+    sesion.mount('https://', adaptador)
+    sesion.headers['User-Agent'] = USER_AGENT
+    return sesion
+
+
+class Descargador:
+    """
+    Realiza peticiones GET desde varios hilos respetando una tasa global
+    y un máximo de peticiones simultáneas por host.
+
+    Args:
+        peticiones_por_segundo: Tasa máxima de peticiones para todo el proceso
+        limite_por_host: Peticiones simultáneas permitidas contra un mismo host
+        conexiones: Tamaño del pool de conexiones de la sesión compartida
+        timeout: Segundos máximos de espera por respuesta
+    """
+    def __init__(self, peticiones_por_segundo=1.0, limite_por_host=2, conexiones=10, timeout=30):
+        self.sesion = crear_sesion(conexiones)
+        self.limitador = LimitadorDeTasa(peticiones_por_segundo)
+        self.limite_por_host = limite_por_host
+        self.timeout = timeout
+        self._semaforos = {}
+        self._lock = threading.Lock()
+
+    def _semaforo(self, host):
+        with self._lock:
+            if host not in self._semaforos:
+                self._semaforos[host] = threading.BoundedSemaphore(self.limite_por_host)
+            return self._semaforos[host]
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        inicio = time.perf_counter()
+        with self._semaforo(urlparse(url).netloc):
+            self.limitador.esperar()
+            espera = time.perf_counter() - inicio
+            respuesta = self.sesion.get(url, **kwargs)
+        # Tiempo detenido por el límite por host y la tasa, para separarlo de la red en las métricas
+        respuesta.espera_tasa = espera
+        return respuesta
+
+    def cerrar(self):
+        self.sesion.close()
+
+
+def procesar_en_paralelo(elementos, funcion, trabajadores=4):
+    """
+    Ejecuta funcion(elemento) en un pool de hilos y devuelve pares
+    (elemento, resultado) conforme van terminando
+    """
+    with ThreadPoolExecutor(max_workers=trabajadores) as pool:
+        futuros = {pool.submit(funcion, elemento): elemento for elemento in elementos}
+        for futuro in as_completed(futuros):
+            yield futuros[futuro], futuro.result()
@@ -0,0 +1,278 @@
+import bisect
+import heapq
+import json
+import math
+import os
+import re
+import sys
+import time
+from difflib import SequenceMatcher, get_close_matches
+
+from buscador import plegar
+from revista_clases import normalizar_issn
+
+RUTA_EMPAREJAMIENTO = os.path.join('datos', 'json', 'emparejamiento.json')
+# Puntaje mínimo para aceptar una pareja por similitud
+UMBRAL = 0.82
+# Las palabras que aparecen en más títulos que esto no sirven como bloque
+MAX_BLOQUE = 2000
+# Palabras raras de cada título que se usan como bloque y candidatos que se
+# comparan carácter a carácter
+PALABRAS_BLOQUE = 3
+CANDIDATOS_FINALES = 5
+# Similitud de caracteres mínima de un candidato
+MIN_CARACTERES = 0.75
+# Similitud mínima entre dos palabras para considerarlas la misma con una errata
+UMBRAL_ERRATA = 0.8
+# Si el segundo mejor candidato queda a menos de esto del primero, la pareja
+# es ambigua ("Physics Letters" frente a "Physics Letters A" y "B")
+MARGEN = 0.02
+
+PALABRA = re.compile(r'\w+')
+PARENTESIS = re.compile(r'\([^)]*\)|\[[^\]]*\]')
+ARTICULO = re.compile(r'^(the|la|el|le|les|los|las|der|die|das) ')
+VACIAS = {'the', 'of', 'and', 'for', 'in', 'on', 'an', 'de', 'la', 'el', 'los', 'las', 'del', 'y', 'e',
+          'en', 'da', 'do', 'das', 'dos', 'des', 'du', 'le', 'les', 'et', 'der', 'die', 'und', 'fur', 'i', 'di'}
+# Abreviaturas de una letra que no son prefijos útiles
+ABREVIATURAS = {'j': 'journal'}
+
+
+def normalizar_nombre(titulo):
+    # Sin acentos, en minúsculas, "&" como "and" y sin puntuación
+    texto = plegar(titulo or '').replace('&', ' and ')
+    return ' '.join(PALABRA.findall(texto))
+
+
+def palabras(nombre):
+    # Palabras significativas de un nombre ya normalizado
+    return frozenset(ABREVIATURAS.get(p, p) for p in nombre.split() if p not in VACIAS)
+
+
+def claves_de(titulo):
+    """
+    Claves alternativas de un título: sin lo que está entre paréntesis y cada
+    parte de los títulos alternativos separados por "/", y todas ellas sin
+    artículo inicial
+    """
+    titulo = titulo or ''
+    claves = {normalizar_nombre(PARENTESIS.sub(' ', titulo))}
+    if '/' in titulo:
+        claves.update(normalizar_nombre(parte) for parte in titulo.split('/'))
+    # Sin artículo inicial: "The Lancet" y "Lancet"
+    claves.update(ARTICULO.sub('', clave) for clave in list(claves) + [normalizar_nombre(titulo)])
+    return claves - {normalizar_nombre(titulo), ''}
+
+
+def _coincide(palabra, otras):
+    # Igual, o una es abreviatura de la otra (prefijo de al menos 3 letras)
+    if palabra in otras:
+        return True
+    if len(palabra) >= 3:
+        return any(otra.startswith(palabra) or (len(otra) >= 3 and palabra.startswith(otra)) for otra in otras)
+    return False
+
+
+class Emparejador:
+    """
+    Resuelve títulos (de los CSV de appCSV) contra los registros de Scimago:
+    primero por ISSN y por claves exactas normalizadas, y si no hay, compara
+    con los registros que comparten alguna palabra poco común (bloques) usando
+    las palabras en común ponderadas por idf y la similitud de caracteres.
+
+    Args:
+        revistas: Registros de Scimago (diccionarios con title e issn)
+    """
+    def __init__(self, revistas):
+        self.revistas = list(revistas)
+        self.por_nombre = {}
+        # Las claves alternativas que comparten varios registros no se usan (None)
+        self.por_clave = {}
+        self.por_issn = {}
+        self.por_palabra = {}
+        self.nombres = []
+        self.palabras = []
+        for posicion, revista in enumerate(self.revistas):
+            titulo = revista.get('title') or ''
+            nombre = normalizar_nombre(titulo)
+            self.por_nombre.setdefault(nombre, posicion)
+            for clave in claves_de(titulo):
+                self.por_clave[clave] = None if clave in self.por_clave else posicion
+            for issn in (revista.get('issn') or '').split(','):
+                issn = normalizar_issn(issn)
+                if issn:
+                    self.por_issn.setdefault(issn, posicion)
+            self.nombres.append(nombre)
+            self.palabras.append(palabras(nombre))
+            for palabra in self.palabras[-1]:
+                self.por_palabra.setdefault(palabra, []).append(posicion)
+        total = max(len(self.revistas), 1)
+        self.idf = {palabra: math.log(total / len(posiciones)) + 1
+                    for palabra, posiciones in self.por_palabra.items()}
+        # Peso de una palabra que no aparece en ningún registro
+        self.idf_desconocida = math.log(total) + 1
+        # Las letras sueltas suelen distinguir series ("Physics Letters A" y
+        # "B"); todas pesan lo máximo para que no gane la más rara
+        for palabra in self.idf:
+            if len(palabra) == 1:
+                self.idf[palabra] = self.idf_desconocida
+        # Vocabulario ordenado (para buscar prefijos) y agrupado por longitud
+        # (para buscar erratas)
+        self.vocabulario = sorted(self.por_palabra)
+        self.por_longitud = {}
+        for palabra in self.vocabulario:
+            self.por_longitud.setdefault(len(palabra), []).append(palabra)
+
+    def con_prefijo(self, prefijo):
+        inicio = bisect.bisect_left(self.vocabulario, prefijo)
+        fin = bisect.bisect_left(self.vocabulario, prefijo + '\uffff')
+        return self.vocabulario[inicio:fin]
+
+    def corregir(self, conjunto):
+        """
+        Sustituye las palabras que no están en ningún registro ni son
+        abreviatura de otra por la más parecida del vocabulario (erratas)
+        """
+        corregido = set()
+        for palabra in conjunto:
+            if palabra in self.por_palabra or len(palabra) < 5 or self.con_prefijo(palabra):
+                corregido.add(palabra)
+                continue
+            parecidas = [otra for longitud in range(len(palabra) - 2, len(palabra) + 3)
+                         for otra in self.por_longitud.get(longitud, [])]
+            cercanas = get_close_matches(palabra, parecidas, n=1, cutoff=UMBRAL_ERRATA)
+            corregido.add(cercanas[0] if cercanas else palabra)
+        return frozenset(corregido)
+
+    def _peso(self, conjunto):
+        return sum(self.idf.get(palabra, self.idf_desconocida) for palabra in conjunto)
+
+    def similitud_palabras(self, a, b):
+        # Dice ponderado por idf: peso de las palabras de cada lado que
+        # coinciden con alguna del otro, entre el peso total de ambos
+        total = self._peso(a) + self._peso(b)
+        if not total:
+            return 0.0
+        comunes = a & b
+        resto_a, resto_b = a - comunes, b - comunes
+        coinciden = 2 * self._peso(comunes)
+        coinciden += sum(self.idf.get(p, self.idf_desconocida) for p in resto_a if _coincide(p, resto_b))
+        coinciden += sum(self.idf.get(p, self.idf_desconocida) for p in resto_b if _coincide(p, resto_a))
+        return coinciden / total
+
+    def candidatos(self, conjunto):
+        # Registros que comparten alguna de las palabras más raras del título
+        conocidas = sorted((len(self.por_palabra[p]), p) for p in conjunto if p in self.por_palabra)
+        bloques = [p for n, p in conocidas if n <= MAX_BLOQUE][:PALABRAS_BLOQUE] or [p for _, p in conocidas[:1]]
+        encontrados = set()
+        for palabra in bloques:
+            encontrados.update(self.por_palabra[palabra])
+        # Las abreviaturas (sin coincidencia exacta) se buscan como prefijo
+        if len(bloques) < PALABRAS_BLOQUE:
+            for palabra in conjunto - set(self.por_palabra):
+                if len(palabra) >= 3:
+                    for otra in self.con_prefijo(palabra):
+                        if len(self.por_palabra[otra]) <= MAX_BLOQUE:
+                            encontrados.update(self.por_palabra[otra])
+        return encontrados
+
+    def resolver(self, titulo, issn=None):
+        """
+        Devuelve (posición, puntaje, método) del registro que corresponde al
+        título, o None. El método es 'issn', 'exacto' o 'similitud'.
+        """
+        for clave in (issn or '').split(','):
+            clave = normalizar_issn(clave)
+            if clave in self.por_issn:
+                return self.por_issn[clave], 1.0, 'issn'
+        nombre = normalizar_nombre(titulo)
+        if nombre in self.por_nombre:
+            return self.por_nombre[nombre], 1.0, 'exacto'
+        # Claves alternativas: solo si apuntan a un único registro
+        for clave in claves_de(titulo) | {nombre}:
+            if clave in self.por_clave and self.por_clave[clave] is None:
+                continue
+            posiciones = {self.por_nombre.get(clave), self.por_clave.get(clave)} - {None}
+            if len(posiciones) == 1:
+                return posiciones.pop(), 1.0, 'exacto'
+
+        conjunto = self.corregir(palabras(nombre))
+        if not conjunto:
+            return None
+        puntajes = ((self.similitud_palabras(conjunto, self.palabras[posicion]), posicion)
+                    for posicion in self.candidatos(conjunto))
+        finales = []
+        for puntaje_palabras, posicion in heapq.nlargest(CANDIDATOS_FINALES, puntajes):
+            caracteres = SequenceMatcher(None, nombre, self.nombres[posicion], autojunk=False).ratio()
+            # Las abreviaturas no bastan si el texto se parece poco ("TET" y "TETHYS")
+            if caracteres >= MIN_CARACTERES:
+                finales.append((0.6 * puntaje_palabras + 0.4 * caracteres, posicion))
+        finales.sort(reverse=True)
+        if not finales or finales[0][0] < UMBRAL:
+            return None
+        puntaje, posicion = finales[0]
+        if any(otro > puntaje - MARGEN and self.nombres[otra] != self.nombres[posicion]
+               for otro, otra in finales[1:]):
+            return None
+        return posicion, round(puntaje, 4), 'similitud'
+
+
+def emparejar(entradas, revistas):
+    """
+    Empareja cada título de revistas.json (titulo -> {areas, catalogos[, issn]})
+    con los registros de Scimago. Devuelve el diccionario que se guarda en
+    RUTA_EMPAREJAMIENTO.
+    """
+    emparejador = Emparejador(revistas)
+    parejas = {}
+    sin_pareja = []
+    for titulo, valor in entradas.items():
+        issn = valor.get('issn') if isinstance(valor, dict) else None
+        resultado = emparejador.resolver(titulo, issn)
+        if resultado is None:
+            sin_pareja.append(titulo)
+            continue
+        posicion, puntaje, metodo = resultado
+        revista = emparejador.revistas[posicion]
+        parejas[titulo] = {"title": revista.get('title'), "url": revista.get('url'),
+                           "puntaje": puntaje, "metodo": metodo}
+    return {"generado": time.time(), "parejas": parejas, "sin_pareja": sin_pareja}
+
+
+def guardar(resultado, ruta=RUTA_EMPAREJAMIENTO):
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=1)
+    os.replace(temporal, ruta)
+
+
+def cargar(ruta=RUTA_EMPAREJAMIENTO):
+    """
+    Diccionario título del CSV -> título de Scimago, o vacío si no existe el archivo
+    """
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            resultado = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {titulo: pareja['title'] for titulo, pareja in resultado.get('parejas', {}).items()}
+
+
+if __name__ == '__main__':
+    # Uso: python emparejamiento.py [revistas.json] [Scimago.json] [emparejamiento.json]
+    ruta_entradas = sys.argv[1] if len(sys.argv) > 1 else os.path.join('datos', 'json', 'revistas.json')
+    ruta_scimago = sys.argv[2] if len(sys.argv) > 2 else 'Scimago.json'
+    ruta = sys.argv[3] if len(sys.argv) > 3 else RUTA_EMPAREJAMIENTO
+    # appCSV guarda revistas.json en latin-1
+    with open(ruta_entradas, encoding='latin-1') as f:
+        entradas = json.load(f)
+    with open(ruta_scimago, encoding='utf-8') as f:
+        revistas = json.load(f)
+    inicio = time.perf_counter()
+    resultado = emparejar(entradas, revistas)
+    guardar(resultado, ruta)
+    metodos = {}
+    for pareja in resultado['parejas'].values():
+        metodos[pareja['metodo']] = metodos.get(pareja['metodo'], 0) + 1
+    print(f"✅ {len(resultado['parejas'])} de {len(entradas)} títulos emparejados {metodos}, "
+          f"{len(resultado['sin_pareja'])} sin pareja, en {time.perf_counter() - inicio:.1f} s: {ruta}")
@@ -0,0 +1,305 @@
+import bisect
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+
+import revista_clases as rc
+
+# Formato de la instantánea binaria del catálogo
+#
+#   encabezado: MAGIA, versión, número de secciones, mtime y tamaño del JSON de origen
+#   tabla:      (nombre, desplazamiento, longitud) por sección
+#   secciones:  arreglos de enteros sin signo alineados a 8 bytes
+#
+# Todos los textos (títulos, URLs, áreas, n-gramas...) están una sola vez en
+# la tabla de cadenas; los registros e índices guardan solo números de cadena o
+# posiciones de revista. Al cargar se mapea el archivo en memoria y nada se
+# decodifica hasta que se consulta, así que varios procesos comparten las
+# mismas páginas y el arranque no depende del tamaño del catálogo.
+MAGIA = b'RVSTSNP1'
+VERSION = 1
+ENCABEZADO = struct.Struct('<8sIIqq')
+ENTRADA = struct.Struct('<16sQQ')
+# Número de cadena que representa None
+NULO = 0xFFFFFFFF
+CAMPOS = rc.Revista.__slots__
+
+RUTA_INSTANTANEA = 'Scimago.snap'
+
+
+_PENDIENTE = object()
+
+
+class Secuencia(Sequence):
+    """
+    Secuencia de solo lectura cuyos elementos se calculan al pedirlos
+
+    Args:
+        longitud: Número de elementos
+        obtener: Función que calcula el elemento i
+        recordar: Si es True cada elemento se calcula una sola vez y se conserva
+    """
+    def __init__(self, longitud, obtener, recordar=False):
+        self._longitud = longitud
+        self._obtener = obtener
+        if recordar:
+            memoria = [_PENDIENTE] * longitud
+
+            def obtener_recordado(i):
+                valor = memoria[i]
+                if valor is _PENDIENTE:
+                    valor = memoria[i] = obtener(i)
+                return valor
+            self._obtener = obtener_recordado
+
+    def __len__(self):
+        return self._longitud
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self._obtener(i) for i in range(*indice.indices(self._longitud))]
+        if indice < 0:
+            indice += self._longitud
+        if not 0 <= indice < self._longitud:
+            raise IndexError(indice)
+        return self._obtener(indice)
+
+    def __iter__(self):
+        for i in range(self._longitud):
+            yield self._obtener(i)
+
+
+class TablaOrdenada(Mapping):
+    """
+    Diccionario de solo lectura sobre claves ordenadas; las búsquedas son
+    binarias sobre la secuencia de claves
+    """
+    def __init__(self, claves, valor):
+        self._claves = claves
+        self._valor = valor
+
+    def __getitem__(self, clave):
+        i = bisect.bisect_left(self._claves, clave)
+        if i < len(self._claves) and self._claves[i] == clave:
+            return self._valor(i)
+        raise KeyError(clave)
+
+    def __iter__(self):
+        return iter(self._claves)
+
+    def __len__(self):
+        return len(self._claves)
+
+
+class Instantanea:
+    """
+    Archivo de instantánea mapeado en memoria
+
+    Args:
+        ruta: Archivo generado con construir()
+    """
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(ruta, 'rb') as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magia, version, n, self.origen_mtime, self.origen_tamano = ENCABEZADO.unpack_from(self._mapa, 0)
+        if magia != MAGIA or version != VERSION:
+            raise ValueError(f"{ruta} no es una instantánea válida (versión {version})")
+        vista = memoryview(self._mapa)
+        self._secciones = {}
+        for i in range(n):
+            nombre, desplazamiento, longitud = ENTRADA.unpack_from(self._mapa, ENCABEZADO.size + i * ENTRADA.size)
+            self._secciones[nombre.rstrip(b'\0').decode('ascii')] = vista[desplazamiento:desplazamiento + longitud]
+        self._desp_cadenas = self.enteros('cad_desp', 'Q')
+        self._cadenas = self._secciones['cadenas']
+
+    def enteros(self, nombre, tipo='I'):
+        return self._secciones[nombre].cast(tipo)
+
+    def cadena(self, numero):
+        if numero == NULO:
+            return None
+        return str(self._cadenas[self._desp_cadenas[numero]:self._desp_cadenas[numero + 1]], 'utf-8')
+
+    def cadenas(self, nombre, recordar=False):
+        numeros = self.enteros(nombre)
+        return Secuencia(len(numeros), lambda i: self.cadena(numeros[i]), recordar)
+
+    def listas(self, prefijo, valor=None):
+        """
+        Índice clave -> lista de posiciones guardado en las secciones
+        <prefijo>_claves, <prefijo>_desp y <prefijo>_pos
+        """
+        desp = self.enteros(prefijo + '_desp')
+        pos = self.enteros(prefijo + '_pos')
+        valor = valor or (lambda i: pos[desp[i]:desp[i + 1]])
+        return TablaOrdenada(self.cadenas(prefijo + '_claves'), valor)
+
+
+def cargar_sistema(ruta=RUTA_INSTANTANEA):
+    """
+    Crea un sistema_de_busqueda de solo lectura respaldado por la instantánea.
+    Cada revista se construye la primera vez que se consulta y se conserva,
+    así las consultas repetidas no vuelven a decodificarla. No admite
+    agregar_revista.
+    """
+    datos = Instantanea(ruta)
+    registros = datos.enteros('revistas')
+    total = len(registros) // len(CAMPOS)
+
+    def construir_revista(posicion):
+        inicio = posicion * len(CAMPOS)
+        return rc.Revista(*(datos.cadena(n) for n in registros[inicio:inicio + len(CAMPOS)]))
+
+    sistema = rc.sistema_de_busqueda()
+    sistema.instantanea = datos
+    sistema.revista = Secuencia(total, construir_revista, recordar=True)
+    revista = sistema.revista.__getitem__
+    sistema.titulos_normalizados = datos.cadenas('normalizados', recordar=True)
+    # El buscador pliega mayúsculas, así que basta con las claves en minúsculas
+    # y no hace falta construir cada Revista para indexar los títulos
+    sistema.titulos_busqueda = datos.cadenas('claves_titulo')
+    # Igual para las sugerencias: el h-index se lee directo del registro
+    campo_h_index = CAMPOS.index('h_index')
+    sistema.h_indices_busqueda = Secuencia(
+        total, lambda posicion: datos.cadena(registros[posicion * len(CAMPOS) + campo_h_index]))
+    sistema.indice_ngramas = datos.listas('ng')
+    sistema.por_area = datos.listas('area')
+
+    tit_pos = datos.enteros('tit_pos')
+    sistema.por_titulo = TablaOrdenada(datos.cadenas('tit_claves'), lambda i: revista(tit_pos[i]))
+    issn_pos = datos.enteros('issn_pos')
+    sistema.por_issn = TablaOrdenada(datos.cadenas('issn_claves'), lambda i: revista(issn_pos[i]))
+
+    claves_titulo = datos.enteros('claves_titulo')
+    letra_desp = datos.enteros('letra_desp')
+    letra_pos = datos.enteros('letra_pos')
+
+    def letra(i):
+        posiciones = letra_pos[letra_desp[i]:letra_desp[i + 1]]
+        return (Secuencia(len(posiciones), lambda j: datos.cadena(claves_titulo[posiciones[j]])),
+                Secuencia(len(posiciones), lambda j: revista(posiciones[j])))
+    sistema.por_letra = datos.listas('letra', letra)
+
+    for orden in rc.ORDENES:
+        posiciones = datos.enteros('orden_' + orden)
+        sistema._ordenes[orden] = Secuencia(total, lambda i, p=posiciones: revista(p[i]))
+    return sistema
+
+
+class _Escritor:
+    # Acumula la tabla de cadenas y las secciones mientras se construye el archivo
+    def __init__(self):
+        self.numeros = {}
+        self.textos = []
+        self.secciones = []
+
+    def cadena(self, texto):
+        if texto is None:
+            return NULO
+        texto = str(texto)
+        numero = self.numeros.get(texto)
+        if numero is None:
+            numero = self.numeros[texto] = len(self.textos)
+            self.textos.append(texto.encode('utf-8'))
+        return numero
+
+    def seccion(self, nombre, datos):
+        self.secciones.append((nombre, datos))
+
+    def enteros(self, nombre, valores, tipo='I'):
+        self.seccion(nombre, array(tipo, valores).tobytes())
+
+    def listas(self, prefijo, indice, posicion=lambda valor: valor):
+        claves = sorted(indice)
+        desp = [0]
+        pos = array('I')
+        for clave in claves:
+            pos.extend(posicion(valor) for valor in indice[clave])
+            desp.append(len(pos))
+        self.enteros(prefijo + '_claves', [self.cadena(clave) for clave in claves])
+        self.enteros(prefijo + '_desp', desp)
+        self.seccion(prefijo + '_pos', pos.tobytes())
+
+    def escribir(self, ruta, origen_mtime, origen_tamano):
+        desp = [0]
+        for texto in self.textos:
+            desp.append(desp[-1] + len(texto))
+        self.enteros('cad_desp', desp, 'Q')
+        self.seccion('cadenas', b''.join(self.textos))
+
+        temporal = ruta + '.tmp'
+        with open(temporal, 'wb') as f:
+            inicio = ENCABEZADO.size + ENTRADA.size * len(self.secciones)
+            tabla = []
+            desplazamiento = inicio
+            for nombre, datos in self.secciones:
+                desplazamiento += -desplazamiento % 8
+                tabla.append((nombre, desplazamiento, len(datos)))
+                desplazamiento += len(datos)
+            f.write(ENCABEZADO.pack(MAGIA, VERSION, len(tabla), origen_mtime, origen_tamano))
+            for nombre, desplazamiento, longitud in tabla:
+                f.write(ENTRADA.pack(nombre.encode('ascii'), desplazamiento, longitud))
+            for (nombre, datos), (_, desplazamiento, _) in zip(self.secciones, tabla):
+                f.write(b'\0' * (desplazamiento - f.tell()))
+                f.write(datos)
+        os.replace(temporal, ruta)
+
+
+def construir(ruta_json, ruta=RUTA_INSTANTANEA):
+    """
+    Genera la instantánea a partir del JSON del scraper. Los índices se toman
+    de un sistema_de_busqueda construido en memoria, así las consultas sobre la
+    instantánea devuelven lo mismo que sobre el JSON.
+    """
+    estado = os.stat(ruta_json)
+    sistema = rc.cargar_json(ruta_json)
+    posicion = {id(revista): i for i, revista in enumerate(sistema.revista)}
+    escritor = _Escritor()
+
+    escritor.enteros('revistas', [escritor.cadena(getattr(revista, campo))
+                                  for revista in sistema.revista for campo in CAMPOS])
+    escritor.enteros('normalizados', [escritor.cadena(t) for t in sistema.titulos_normalizados])
+    escritor.enteros('claves_titulo', [escritor.cadena(r.title.strip().lower()) for r in sistema.revista])
+    escritor.listas('ng', sistema.indice_ngramas)
+    escritor.listas('area', sistema.por_area)
+    escritor.listas('letra', {letra: revistas for letra, (_, revistas) in sistema.por_letra.items()},
+                    lambda revista: posicion[id(revista)])
+    for nombre, tabla in (('tit', sistema.por_titulo), ('issn', sistema.por_issn)):
+        claves = sorted(tabla)
+        escritor.enteros(nombre + '_claves', [escritor.cadena(clave) for clave in claves])
+        escritor.enteros(nombre + '_pos', [posicion[id(tabla[clave])] for clave in claves])
+    for orden in rc.ORDENES:
+        escritor.enteros('orden_' + orden, [posicion[id(r)] for r in sistema.ordenadas(orden)])
+
+    escritor.escribir(ruta, estado.st_mtime_ns, estado.st_size)
+    return len(sistema.revista)
+
+
+def vigente(ruta, ruta_json):
+    """
+    Indica si la instantánea existe y se generó a partir del JSON actual
+    (o si solo existe la instantánea)
+    """
+    if not os.path.exists(ruta):
+        return False
+    if not os.path.exists(ruta_json):
+        return True
+    try:
+        with open(ruta, 'rb') as f:
+            magia, version, _, mtime, tamano = ENCABEZADO.unpack(f.read(ENCABEZADO.size))
+    except struct.error:
+        return False
+    estado = os.stat(ruta_json)
+    return magia == MAGIA and version == VERSION and (mtime, tamano) == (estado.st_mtime_ns, estado.st_size)
+
+
+if __name__ == '__main__':
+    # Uso: python instantanea.py [Scimago.json] [Scimago.snap]
+    ruta_json = sys.argv[1] if len(sys.argv) > 1 else 'Scimago.json'
+    ruta = sys.argv[2] if len(sys.argv) > 2 else RUTA_INSTANTANEA
+    total = construir(ruta_json, ruta)
+    print(f"✅ Instantánea de {total} revistas guardada en: {ruta} ({os.path.getsize(ruta)} bytes)")
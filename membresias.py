@@ -0,0 +1,207 @@
+import json
+import re
+import sys
+import time
+
+# Los CSV se llaman "JCR_RadGridExport.csv" o "ING RadGridExport.csv"
+SUFIJO_CSV = re.compile(r'[\s_]*RadGridExport$', re.IGNORECASE)
+TOKEN = re.compile(r'\s*([()&|!-]|[^\s()&|!]+)')
+Y, O, NO = {'and', 'y'}, {'or', 'o'}, {'not', 'no'}
+# Paréntesis y negaciones anidados que admite una expresión
+MAX_PROFUNDIDAD = 50
+
+
+def nombre_conjunto(nombre_csv):
+    # "JCR_RadGridExport" -> "JCR"
+    return SUFIJO_CSV.sub('', nombre_csv).strip().upper()
+
+
+def posiciones_de(mapa, limite=None, desde=0):
+    """
+    Posiciones de los bits encendidos del entero mapa, de menor a mayor
+    """
+    # bin() invertido deja el bit i en el carácter i; find recorre en C
+    bits = bin(mapa)[:1:-1]
+    posiciones = []
+    i = bits.find('1')
+    saltados = 0
+    while i != -1 and (limite is None or len(posiciones) < limite):
+        if saltados < desde:
+            saltados += 1
+        else:
+            posiciones.append(i)
+        i = bits.find('1', i + 1)
+    return posiciones
+
+
+class Membresias:
+    """
+    Pertenencia de cada título a los catálogos (CONACYT, JCR...) y áreas
+    (CIENCIAS_BIO, ING...) de revistas.json como mapas de bits: cada conjunto
+    es un entero cuyo bit i indica si contiene al título i. Una combinación
+    como "JCR & SCOPUS & !CONACYT & ING" se resuelve con operaciones de bits
+    sobre todo el catálogo a la vez.
+
+    Args:
+        revistas: Diccionario titulo -> {'areas': [...], 'catalogos': [...]} de appCSV
+        emparejamiento: Diccionario título del CSV -> título de Scimago
+            (emparejamiento.py); los títulos sin pareja se buscan tal cual
+    """
+    def __init__(self, revistas, emparejamiento=None):
+        self.titulos = sorted(revistas)
+        self.emparejamiento = emparejamiento or {}
+        # nombre -> ('catalogo' | 'area'); primero los catálogos
+        self.tipos = {}
+        miembros = {}
+        for tipo, campo in (('catalogo', 'catalogos'), ('area', 'areas')):
+            for posicion, titulo in enumerate(self.titulos):
+                for nombre in revistas[titulo].get(campo, []):
+                    nombre = nombre_conjunto(nombre)
+                    self.tipos.setdefault(nombre, tipo)
+                    miembros.setdefault(nombre, []).append(posicion)
+        self.nombres = sorted(self.tipos, key=lambda nombre: (self.tipos[nombre] != 'catalogo', nombre))
+        # Los bits se encienden en un bytearray y se convierten una sola vez,
+        # así no se copia el entero completo por cada título
+        self.mapas = {}
+        tamano = (len(self.titulos) + 7) // 8
+        for nombre, posiciones in miembros.items():
+            bits = bytearray(tamano)
+            for posicion in posiciones:
+                bits[posicion >> 3] |= 1 << (posicion & 7)
+            self.mapas[nombre] = int.from_bytes(bits, 'little')
+        self.universo = (1 << len(self.titulos)) - 1
+        # Máscara por título: bit j encendido si pertenece al conjunto self.nombres[j]
+        self.mascaras = [0] * len(self.titulos)
+        for j, nombre in enumerate(self.nombres):
+            for posicion in posiciones_de(self.mapas[nombre]):
+                self.mascaras[posicion] |= 1 << j
+        # Título de Scimago en minúsculas -> máscara de todos los títulos del
+        # CSV que le corresponden (puede haber varios, p. ej. con y sin "The")
+        self.por_scimago = {}
+        for posicion, titulo in enumerate(self.titulos):
+            clave = self.titulo_scimago(titulo).lower()
+            self.por_scimago[clave] = self.por_scimago.get(clave, 0) | self.mascaras[posicion]
+
+    @classmethod
+    def desde_json(cls, ruta, encoding='latin-1', emparejamiento=None):
+        # appCSV guarda revistas.json en latin-1
+        with open(ruta, encoding=encoding) as f:
+            return cls(json.load(f), emparejamiento)
+
+    def titulo_scimago(self, titulo):
+        return self.emparejamiento.get(titulo, titulo)
+
+    def conjuntos(self):
+        return {nombre: {"tipo": self.tipos[nombre], "titulos": self.mapas[nombre].bit_count()}
+                for nombre in self.nombres}
+
+    def mapa(self, nombre):
+        try:
+            return self.mapas[nombre.upper()]
+        except KeyError:
+            raise ValueError(f"Catálogo o área desconocido: {nombre} "
+                             f"(disponibles: {', '.join(self.nombres)})") from None
+
+    def evaluar(self, expresion):
+        """
+        Mapa de bits de una expresión con nombres de conjuntos, & (y/and),
+        | (o/or), ! o - (no/not) y paréntesis. Dos nombres seguidos se
+        combinan con &. Lanza ValueError si la expresión no es válida.
+        """
+        tokens = []
+        posicion = 0
+        expresion = expresion.strip()
+        while posicion < len(expresion):
+            coincidencia = TOKEN.match(expresion, posicion)
+            if not coincidencia:
+                raise ValueError(f"Expresión no válida cerca de: {expresion[posicion:]}")
+            simbolo = next(grupo for grupo in coincidencia.groups() if grupo)
+            palabra = simbolo.lower()
+            if palabra in Y:
+                simbolo = '&'
+            elif palabra in O:
+                simbolo = '|'
+            elif palabra in NO or simbolo == '-':
+                simbolo = '!'
+            tokens.append(simbolo)
+            posicion = coincidencia.end()
+        if not tokens:
+            raise ValueError("La expresión está vacía")
+        mapa, siguiente = self._o(tokens, 0, 0)
+        if siguiente != len(tokens):
+            raise ValueError(f"Expresión no válida cerca de: {tokens[siguiente]}")
+        return mapa
+
+    def _o(self, tokens, i, profundidad):
+        mapa, i = self._y(tokens, i, profundidad)
+        while i < len(tokens) and tokens[i] == '|':
+            otro, i = self._y(tokens, i + 1, profundidad)
+            mapa |= otro
+        return mapa, i
+
+    def _y(self, tokens, i, profundidad):
+        mapa, i = self._no(tokens, i, profundidad)
+        while i < len(tokens) and tokens[i] not in ('|', ')'):
+            if tokens[i] == '&':
+                i += 1
+            otro, i = self._no(tokens, i, profundidad)
+            mapa &= otro
+        return mapa, i
+
+    def _no(self, tokens, i, profundidad):
+        if i >= len(tokens):
+            raise ValueError("La expresión termina antes de tiempo")
+        if profundidad > MAX_PROFUNDIDAD:
+            # Se corta antes de agotar la pila de Python con "((((..." o "!!!!..."
+            raise ValueError(f"La expresión anida más de {MAX_PROFUNDIDAD} paréntesis o negaciones")
+        if tokens[i] == '!':
+            mapa, i = self._no(tokens, i + 1, profundidad + 1)
+            return self.universo & ~mapa, i
+        if tokens[i] == '(':
+            mapa, i = self._o(tokens, i + 1, profundidad + 1)
+            if i >= len(tokens) or tokens[i] != ')':
+                raise ValueError("Falta cerrar un paréntesis")
+            return mapa, i + 1
+        if tokens[i] in ('&', '|', ')'):
+            raise ValueError(f"Expresión no válida cerca de: {tokens[i]}")
+        return self.mapa(tokens[i]), i + 1
+
+    def pertenece(self, posicion):
+        return self._nombres_de(self.mascaras[posicion])
+
+    def de_revista(self, titulo_scimago):
+        """
+        Catálogos y áreas de una revista de Scimago, según los títulos del CSV
+        emparejados con ella
+        """
+        return self._nombres_de(self.por_scimago.get((titulo_scimago or '').lower(), 0))
+
+    def _nombres_de(self, mascara):
+        return [nombre for j, nombre in enumerate(self.nombres) if mascara >> j & 1]
+
+    def filtrar(self, expresion, limite=100, desde=0):
+        """
+        Devuelve (total, [(titulo, conjuntos a los que pertenece)]) de los
+        títulos que cumplen la expresión, en orden alfabético
+        """
+        mapa = self.evaluar(expresion)
+        resultados = [(self.titulos[posicion], self.pertenece(posicion))
+                      for posicion in posiciones_de(mapa, limite, desde)]
+        return mapa.bit_count(), resultados
+
+
+if __name__ == '__main__':
+    # Uso: python membresias.py datos/json/revistas.json "JCR & SCOPUS & !CONACYT & ING" ...
+    inicio = time.perf_counter()
+    membresias = Membresias.desde_json(sys.argv[1])
+    print(f"{len(membresias.titulos)} títulos en {(time.perf_counter() - inicio) * 1000:.0f} ms: "
+          f"{membresias.conjuntos()}")
+    for expresion in sys.argv[2:]:
+        inicio = time.perf_counter()
+        for _ in range(1000):
+            mapa = membresias.evaluar(expresion)
+        evaluacion = (time.perf_counter() - inicio) * 1000
+        total, resultados = membresias.filtrar(expresion, 5)
+        print(f"\n'{expresion}': {total} títulos ({evaluacion:.1f} µs por evaluación)")
+        for titulo, conjuntos in resultados:
+            print(f"  {titulo}  {conjuntos}")
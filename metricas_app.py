@@ -0,0 +1,174 @@
+import bisect
+import cProfile
+import heapq
+import itertools
+import os
+import pstats
+import random
+import threading
+import time
+
+from flask import g, request, before_render_template, template_rendered
+
+# Límites superiores de las cubetas de los histogramas
+CUBETAS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CUBETAS_BYTES = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+DIRECTORIO_PERFILES = 'perfiles'
+
+
+class Histograma:
+    """
+    Histograma acumulativo con cubetas fijas, como los de Prometheus
+    """
+    def __init__(self, cubetas):
+        self.cubetas = cubetas
+        self.conteos = [0] * (len(cubetas) + 1)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.conteos[bisect.bisect_left(self.cubetas, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+    def lineas(self, nombre, etiquetas):
+        acumulado = 0
+        for limite, conteo in zip(self.cubetas + ('+Inf',), self.conteos):
+            acumulado += conteo
+            yield f'{nombre}_bucket{{{etiquetas},le="{limite}"}} {acumulado}'
+        yield f'{nombre}_sum{{{etiquetas}}} {self.suma}'
+        yield f'{nombre}_count{{{etiquetas}}} {self.total}'
+
+
+def etiqueta(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricasApp:
+    """
+    Mide cada petición de una aplicación Flask: latencia total, tiempo de
+    renderizado de plantillas, tiempo restante (consultas a los datos) y
+    tamaño de la respuesta, por ruta. Opcionalmente perfila con cProfile una
+    fracción de las peticiones y guarda los perfiles de las más lentas.
+
+    Para las respuestas que se envían por partes se mide hasta que empieza el
+    envío y su tamaño no se conoce.
+
+    Args:
+        perfilar: Fracción de peticiones que se perfilan (0 lo desactiva)
+        max_perfiles: Perfiles de las peticiones más lentas que se conservan
+        directorio: Carpeta donde se guardan los perfiles (.pstats)
+    """
+    def __init__(self, perfilar=0.0, max_perfiles=10, directorio=DIRECTORIO_PERFILES):
+        self.perfilar = perfilar
+        self.max_perfiles = max_perfiles
+        self.directorio = directorio
+        self._candado = threading.Lock()
+        # Solo puede haber un perfilador activo a la vez
+        self._perfilando = threading.Lock()
+        self._contador = itertools.count()
+        # (ruta, método) -> histogramas; (ruta, método, estado) -> peticiones
+        self.latencia = {}
+        self.plantilla = {}
+        self.datos = {}
+        self.bytes = {}
+        self.peticiones = {}
+        # Montículo de (segundos, número, archivo) de los perfiles guardados
+        self.perfiles = []
+
+    def instalar(self, app):
+        app.before_request(self._antes)
+        app.after_request(self._despues)
+        app.teardown_request(self._terminar)
+        before_render_template.connect(self._antes_plantilla, app)
+        template_rendered.connect(self._despues_plantilla, app)
+        return self
+
+    def _antes(self):
+        g.metricas_plantilla = 0.0
+        g.metricas_perfil = None
+        if self.perfilar and random.random() < self.perfilar and self._perfilando.acquire(blocking=False):
+            g.metricas_perfil = cProfile.Profile()
+            g.metricas_perfil.enable()
+        g.metricas_inicio = time.perf_counter()
+
+    def _antes_plantilla(self, sender, template, context, **extra):
+        g.metricas_inicio_plantilla = time.perf_counter()
+
+    def _despues_plantilla(self, sender, template, context, **extra):
+        inicio = g.get('metricas_inicio_plantilla')
+        if inicio is not None:
+            g.metricas_plantilla += time.perf_counter() - inicio
+
+    def _despues(self, respuesta):
+        inicio = g.get('metricas_inicio')
+        if inicio is None:
+            return respuesta
+        duracion = time.perf_counter() - inicio
+        perfil = self._detener_perfil()
+        ruta = request.url_rule.rule if request.url_rule else 'sin_ruta'
+        clave = (ruta, request.method)
+        plantilla = g.get('metricas_plantilla', 0.0)
+        with self._candado:
+            self.latencia.setdefault(clave, Histograma(CUBETAS_SEGUNDOS)).observar(duracion)
+            self.plantilla.setdefault(clave, Histograma(CUBETAS_SEGUNDOS)).observar(plantilla)
+            self.datos.setdefault(clave, Histograma(CUBETAS_SEGUNDOS)).observar(max(duracion - plantilla, 0.0))
+            if not respuesta.is_streamed and respuesta.content_length is not None:
+                self.bytes.setdefault(clave, Histograma(CUBETAS_BYTES)).observar(respuesta.content_length)
+            estado = clave + (respuesta.status_code,)
+            self.peticiones[estado] = self.peticiones.get(estado, 0) + 1
+        if perfil is not None:
+            self._guardar_perfil(perfil, duracion, ruta)
+        return respuesta
+
+    def _detener_perfil(self):
+        perfil = g.get('metricas_perfil')
+        if perfil is not None:
+            perfil.disable()
+            g.metricas_perfil = None
+            self._perfilando.release()
+        return perfil
+
+    def _terminar(self, error=None):
+        # Si la vista lanzó una excepción after_request no se ejecuta
+        self._detener_perfil()
+
+    def _guardar_perfil(self, perfil, duracion, ruta):
+        # Se conservan solo los max_perfiles más lentos; el más rápido sale
+        with self._candado:
+            if len(self.perfiles) >= self.max_perfiles and duracion <= self.perfiles[0][0]:
+                return
+            numero = next(self._contador)
+            nombre = ''.join(c if c.isalnum() else '_' for c in ruta).strip('_') or 'inicio'
+            archivo = os.path.join(self.directorio, f"{nombre}_{duracion * 1000:.0f}ms_{numero}.pstats")
+            heapq.heappush(self.perfiles, (duracion, numero, archivo))
+            descartado = heapq.heappop(self.perfiles) if len(self.perfiles) > self.max_perfiles else None
+        os.makedirs(self.directorio, exist_ok=True)
+        pstats.Stats(perfil).dump_stats(archivo)
+        if descartado and os.path.exists(descartado[2]):
+            os.remove(descartado[2])
+        print(f"🔍 Perfil de {request.method} {request.path} ({duracion * 1000:.0f} ms) guardado en {archivo}")
+
+    def prometheus(self, adicionales=None):
+        """
+        Texto de exposición de Prometheus. adicionales es un diccionario
+        nombre -> (tipo, valor) con métricas sueltas (p. ej. de la caché)
+        """
+        lineas = []
+        with self._candado:
+            for nombre, tabla, descripcion in (
+                    ('app_peticion_segundos', self.latencia, 'Latencia total por ruta'),
+                    ('app_plantilla_segundos', self.plantilla, 'Tiempo de renderizado de plantillas'),
+                    ('app_datos_segundos', self.datos, 'Tiempo fuera de las plantillas (consultas a los datos)'),
+                    ('app_respuesta_bytes', self.bytes, 'Tamaño de las respuestas')):
+                lineas.append(f'# HELP {nombre} {descripcion}')
+                lineas.append(f'# TYPE {nombre} histogram')
+                for (ruta, metodo), histograma in sorted(tabla.items()):
+                    lineas.extend(histograma.lineas(nombre, f'ruta="{etiqueta(ruta)}",metodo="{metodo}"'))
+            lineas.append('# TYPE app_peticiones_total counter')
+            for (ruta, metodo, estado), total in sorted(self.peticiones.items()):
+                lineas.append(f'app_peticiones_total{{ruta="{etiqueta(ruta)}",metodo="{metodo}",estado="{estado}"}} {total}')
+        for nombre, (tipo, valor) in (adicionales or {}).items():
+            lineas.append(f'# TYPE {nombre} {tipo}')
+            lineas.append(f'{nombre} {valor}')
+        return '\n'.join(lineas) + '\n'
@@ -0,0 +1,237 @@
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Etapas que se miden por título
+ETAPAS = ['busqueda', 'parse_busqueda', 'revista', 'parse_revista', 'espera_tasa', 'pausa']
+
+
+def percentil(valores, p):
+    """
+    Percentil por rango más cercano de una lista de números (None si está vacía)
+    """
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[indice]
+
+
+class RegistroTitulo:
+    """
+    Métricas de un título: tiempo por etapa, bytes descargados, respuestas
+    servidas desde la caché, reintentos y estrategia que resolvió cada campo
+    """
+    def __init__(self, titulo):
+        self.titulo = titulo
+        self.inicio = time.time()
+        self.etapas = {}
+        self.bytes = 0
+        self.desde_cache = 0
+        self.reintentos = 0
+        self.hasta_encabezados = []
+        self.estrategias = {}
+        self.ok = False
+        self.error = None
+
+    @contextmanager
+    def etapa(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sumar(nombre, time.perf_counter() - inicio)
+
+    def sumar(self, nombre, segundos):
+        self.etapas[nombre] = self.etapas.get(nombre, 0.0) + segundos
+
+    def respuesta(self, respuesta):
+        """
+        Anota los datos de una respuesta HTTP (o de la caché)
+        """
+        self.bytes += len(respuesta.content)
+        if getattr(respuesta, 'desde_cache', False):
+            self.desde_cache += 1
+        elif getattr(respuesta, 'elapsed', None) is not None:
+            # Tiempo hasta recibir los encabezados: incluye DNS, conexión y servidor
+            self.hasta_encabezados.append(respuesta.elapsed.total_seconds())
+        espera = getattr(respuesta, 'espera_tasa', 0.0)
+        if espera:
+            self.sumar('espera_tasa', espera)
+
+    def to_dict(self):
+        return {
+            "titulo": self.titulo,
+            "inicio": self.inicio,
+            "ok": self.ok,
+            "etapas": self.etapas,
+            "bytes": self.bytes,
+            "desde_cache": self.desde_cache,
+            "reintentos": self.reintentos,
+            "hasta_encabezados": self.hasta_encabezados,
+            "estrategias": self.estrategias,
+            "error": self.error,
+        }
+
+
+class MetricasScrapper:
+    """
+    Acumula los registros por título y los escribe como JSON Lines.
+
+    Args:
+        ruta: Archivo .jsonl donde se anexa un registro por título (opcional)
+    """
+    def __init__(self, ruta=None):
+        self.ruta = ruta
+        self.registros = []
+        self.inicio = time.time()
+        self.pausas = 0.0
+        self._lock = threading.Lock()
+        self._archivo = open(ruta, 'a', encoding='utf-8') if ruta else None
+
+    def nuevo(self, titulo):
+        return RegistroTitulo(titulo)
+
+    def registrar(self, registro):
+        datos = registro.to_dict()
+        with self._lock:
+            self.registros.append(datos)
+            if self._archivo:
+                self._archivo.write(json.dumps(datos, ensure_ascii=False) + '\n')
+                self._archivo.flush()
+
+    def sumar_pausa(self, segundos):
+        """
+        Anota una pausa entre títulos que no pertenece a ningún registro
+        """
+        with self._lock:
+            self.pausas += segundos
+
+    def cerrar(self):
+        if self._archivo:
+            self._archivo.close()
+            self._archivo = None
+
+    def resumen(self, duracion=None):
+        resumen = resumir(self.registros, duracion if duracion is not None else time.time() - self.inicio)
+        resumen["pausas_entre_titulos"] = self.pausas
+        return resumen
+
+    def escribir_prometheus(self, ruta):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(formato_prometheus(self.resumen()))
+
+
+def resumir(registros, duracion=None):
+    """
+    Calcula p50/p95 por etapa, títulos por minuto, bytes y estrategias usadas
+    """
+    if duracion is None:
+        inicios = [r['inicio'] for r in registros]
+        duracion = (max(inicios) - min(inicios)) if len(inicios) > 1 else 0.0
+    etapas = {}
+    for nombre in ETAPAS + sorted({e for r in registros for e in r['etapas']} - set(ETAPAS)):
+        valores = [r['etapas'][nombre] for r in registros if nombre in r['etapas']]
+        if valores:
+            etapas[nombre] = {
+                "n": len(valores),
+                "total": sum(valores),
+                "p50": percentil(valores, 50),
+                "p95": percentil(valores, 95),
+            }
+    estrategias = {}
+    for r in registros:
+        for campo, estrategia in r['estrategias'].items():
+            conteo = estrategias.setdefault(campo, {})
+            conteo[str(estrategia)] = conteo.get(str(estrategia), 0) + 1
+    encabezados = [t for r in registros for t in r['hasta_encabezados']]
+    return {
+        "titulos": len(registros),
+        "exitosos": sum(1 for r in registros if r['ok']),
+        "duracion": duracion,
+        "titulos_por_minuto": len(registros) / duracion * 60 if duracion > 0 else None,
+        "bytes": sum(r['bytes'] for r in registros),
+        "desde_cache": sum(r['desde_cache'] for r in registros),
+        "reintentos": sum(r['reintentos'] for r in registros),
+        "hasta_encabezados": {"p50": percentil(encabezados, 50), "p95": percentil(encabezados, 95)},
+        "etapas": etapas,
+        "estrategias": estrategias,
+        "pausas_entre_titulos": 0.0,
+    }
+
+
+def formato_prometheus(resumen):
+    """
+    Convierte un resumen en texto de exposición de Prometheus
+    """
+    lineas = [
+        '# TYPE scrapper_titulos_total counter',
+        f'scrapper_titulos_total {resumen["titulos"]}',
+        '# TYPE scrapper_titulos_exitosos_total counter',
+        f'scrapper_titulos_exitosos_total {resumen["exitosos"]}',
+        '# TYPE scrapper_bytes_total counter',
+        f'scrapper_bytes_total {resumen["bytes"]}',
+        '# TYPE scrapper_respuestas_cache_total counter',
+        f'scrapper_respuestas_cache_total {resumen["desde_cache"]}',
+        '# TYPE scrapper_reintentos_total counter',
+        f'scrapper_reintentos_total {resumen["reintentos"]}',
+        '# TYPE scrapper_pausas_entre_titulos_segundos counter',
+        f'scrapper_pausas_entre_titulos_segundos {resumen["pausas_entre_titulos"]}',
+        '# TYPE scrapper_etapa_segundos summary',
+    ]
+    for nombre, datos in resumen['etapas'].items():
+        lineas.append(f'scrapper_etapa_segundos{{etapa="{nombre}",quantile="0.5"}} {datos["p50"]}')
+        lineas.append(f'scrapper_etapa_segundos{{etapa="{nombre}",quantile="0.95"}} {datos["p95"]}')
+        lineas.append(f'scrapper_etapa_segundos_sum{{etapa="{nombre}"}} {datos["total"]}')
+        lineas.append(f'scrapper_etapa_segundos_count{{etapa="{nombre}"}} {datos["n"]}')
+    lineas.append('# TYPE scrapper_estrategia_total counter')
+    for campo, conteo in resumen['estrategias'].items():
+        for estrategia, n in conteo.items():
+            lineas.append(f'scrapper_estrategia_total{{campo="{campo}",estrategia="{estrategia}"}} {n}')
+    return '\n'.join(lineas) + '\n'
+
+
+def imprimir_resumen(resumen):
+    def ms(valor):
+        return f"{valor * 1000:8.1f}" if valor is not None else "       -"
+
+    print("\n=== MÉTRICAS DEL SCRAPER ===")
+    print(f"Títulos: {resumen['titulos']} ({resumen['exitosos']} con datos)")
+    if resumen['titulos_por_minuto'] is not None:
+        print(f"Títulos por minuto: {resumen['titulos_por_minuto']:.1f}")
+    print(f"Bytes descargados: {resumen['bytes']}  Desde caché: {resumen['desde_cache']}  Reintentos: {resumen['reintentos']}")
+    if resumen['pausas_entre_titulos']:
+        print(f"Pausas entre títulos: {resumen['pausas_entre_titulos']:.1f} s")
+    print(f"Hasta encabezados (ms): p50 {ms(resumen['hasta_encabezados']['p50'])}  p95 {ms(resumen['hasta_encabezados']['p95'])}")
+    print(f"{'Etapa':<16}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}")
+    for nombre, datos in resumen['etapas'].items():
+        print(f"{nombre:<16}{ms(datos['p50']):>10}{ms(datos['p95']):>10}{datos['total']:>10.1f}")
+    for campo, conteo in resumen['estrategias'].items():
+        detalle = ', '.join(f"{e}: {n}" for e, n in sorted(conteo.items()))
+        print(f"Estrategias {campo}: {detalle}")
+
+
+def leer_jsonl(ruta):
+    registros = []
+    with open(ruta, encoding='utf-8') as f:
+        for linea in f:
+            if linea.strip():
+                registros.append(json.loads(linea))
+    return registros
+
+
+if __name__ == '__main__':
+    # Uso: python metricas_scrapper.py metricas.jsonl [salida.prom]
+    if len(sys.argv) < 2:
+        print("Uso: python metricas_scrapper.py metricas.jsonl [salida.prom]")
+        sys.exit(1)
+    resumen = resumir(leer_jsonl(sys.argv[1]))
+    imprimir_resumen(resumen)
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], 'w', encoding='utf-8') as f:
+            f.write(formato_prometheus(resumen))
+        print(f"Métricas Prometheus escritas en {os.path.abspath(sys.argv[2])}")
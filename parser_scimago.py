@@ -0,0 +1,895 @@
+import re
+import sys
+import time
+from bisect import bisect_right
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+from bs4.dammit import EntitySubstitution
+
+SCIMAGO_URL = "https://www.scimagojr.com"
+
+# 'rapido' usa el analizador de una sola pasada; 'bs4' la cascada original con BeautifulSoup
+MOTOR_POR_DEFECTO = 'rapido'
+
+
+def extraer_datos(html, journal_url, base_url=SCIMAGO_URL, motor=None, estrategias=None):
+    """
+    Extrae los campos de la página de una revista en Scimago
+
+    Args:
+        html: Texto de la página de la revista
+        journal_url: URL de la página (se usa para deducir el id del widget)
+        base_url: URL base para convertir enlaces relativos en absolutos
+        motor: 'rapido' o 'bs4'; por defecto MOTOR_POR_DEFECTO
+        estrategias: Diccionario opcional donde el motor rápido anota qué
+            estrategia resolvió cada campo
+
+    Returns:
+        Diccionario con h_index, subject_area, publisher, issn,
+        publication_type, widget_url y widget_html
+    """
+    if (motor or MOTOR_POR_DEFECTO) == 'bs4':
+        return extraer_con_bs4(html, journal_url, base_url)
+    return extraer_rapido(html, journal_url, base_url, estrategias)
+
+
+def extraer_con_bs4(html, journal_url, base_url=SCIMAGO_URL):
+    """
+    Cascada original de estrategias sobre BeautifulSoup. Se conserva como
+    referencia y para comparar resultados con el analizador rápido.
+    """
+    journal_soup = BeautifulSoup(html, 'html.parser')
+
+    # EXTRACCIÓN DE DATOS CON MÚLTIPLES ESTRATEGIAS
+
+    # 1. H-index - CORREGIDA LA EXTRACCIÓN
+    h_index = None
+
+    # Estrategia 1: Buscar el elemento específico con clase 'hindexnumber'
+    h_index_element = journal_soup.find('span', class_='hindexnumber')
+    if h_index_element:
+        h_index = h_index_element.text.strip()
+
+    # Estrategia 2: Buscar en celda con clase 'cellh'
+    if not h_index:
+        h_cell = journal_soup.select_one('.cellh')
+        if h_cell:
+            h_index = h_cell.text.strip()
+
+    # Estrategia 3: Buscar en toda la página para el h-index
+    if not h_index:
+        # Primero intentamos encontrar cualquier número que aparezca cerca de "H index"
+        h_section = journal_soup.find(string=re.compile(r'H[\s\-]*index', re.IGNORECASE))
+        if h_section:
+            parent = h_section.parent
+            if parent:
+                # Buscar números en el texto del padre
+                h_index_numbers = re.search(r'(\d+)', parent.text)
+                if h_index_numbers:
+                    h_index = h_index_numbers.group(1)
+
+    # Estrategia 4: Buscar en divs o spans que contengan "h-index" o "h index"
+    if not h_index:
+        h_divs = journal_soup.find_all(['div', 'span'], string=re.compile(r'[Hh][\s\-]*Index'))
+        for div in h_divs:
+            numbers = re.search(r'(\d+)', div.text)
+            if numbers:
+                h_index = numbers.group(1)
+                break
+            # También buscar en el elemento siguiente
+            next_elem = div.find_next()
+            if next_elem:
+                numbers = re.search(r'(\d+)', next_elem.text)
+                if numbers:
+                    h_index = numbers.group(1)
+                    break
+
+    # Estrategia 5: Último recurso, buscar en toda la página
+    if not h_index:
+        h_pattern = re.search(r'[Hh][\s\-]*Index:?\s*(\d+)', journal_soup.text)
+        if h_pattern:
+            h_index = h_pattern.group(1)
+
+    # 2. Áreas temáticas
+    subject_areas = []
+    # Múltiples estrategias para áreas temáticas
+    selectors = [
+        '.journalsubject .subjectarea span',
+        '.cellsubject span',
+        '.subject-area',
+        '.subjectarea'
+    ]
+
+    for selector in selectors:
+        elements = journal_soup.select(selector)
+        if elements:
+            subject_areas = [e.text.strip() for e in elements if e.text.strip()]
+            if subject_areas:
+                break
+
+    # Si no se encuentran áreas con selectores, buscar patrones en el texto
+    if not subject_areas:
+        subject_section = journal_soup.find(string=re.compile(r'Subject Area', re.IGNORECASE))
+        if subject_section:
+            parent = subject_section.parent
+            if parent:
+                # Buscar en los siguientes elementos hermanos
+                next_elements = parent.find_next_siblings()
+                for elem in next_elements[:3]:  # Revisar solo los próximos 3 elementos
+                    if elem.text.strip() and not re.match(r'Publisher|ISSN|Type', elem.text):
+                        areas = [area.strip() for area in elem.text.split(',')]
+                        subject_areas.extend([area for area in areas if area])
+                        if subject_areas:
+                            break
+
+    # 3. Editorial
+    publisher = None
+    publisher_selectors = [
+        'div.journalpublisher', 
+        '.cellpublisher', 
+        '.publisher'
+    ]
+
+    for selector in publisher_selectors:
+        element = journal_soup.select_one(selector)
+        if element and element.text.strip():
+            publisher = element.text.strip()
+            break
+
+    # Si no se encontró por selectores, buscar etiquetas con "Publisher"
+    if not publisher:
+        publisher_labels = journal_soup.find_all(['label', 'div', 'span'], string=re.compile(r'Publisher:', re.IGNORECASE))
+        for label in publisher_labels:
+            next_elem = label.find_next()
+            if next_elem and next_elem.text.strip():
+                publisher = next_elem.text.strip()
+                break
+            # O extraer del texto después de "Publisher:"
+            if ':' in label.text:
+                pub_text = label.text.split(':', 1)[1].strip()
+                if pub_text:
+                    publisher = pub_text
+                    break
+
+    # Si aún no se encuentra, buscar en texto completo
+    if not publisher:
+        publisher_pattern = re.search(r'Publisher:?\s*([^\n]+)', journal_soup.text)
+        if publisher_pattern:
+            publisher = publisher_pattern.group(1).strip()
+
+    # 4. ISSN
+    issn = None
+    issn_element = journal_soup.find('div', class_='issn')
+    if not issn_element:
+        issn_element = journal_soup.select_one('.journalissn')
+
+    if issn_element:
+        issn = issn_element.text.strip()
+        # Limpiar prefijo "ISSN:" si existe
+        if 'ISSN:' in issn:
+            issn = issn.split('ISSN:', 1)[1].strip()
+
+    # Si no se encuentra, buscar por text
+    if not issn:
+        issn_pattern = re.search(r'ISSN:?\s*([\d\-X]+)', journal_soup.text)
+        if issn_pattern:
+            issn = issn_pattern.group(1).strip()
+
+    # 5. Tipo de publicación - CORREGIDA LA EXTRACCIÓN
+    pub_type = None
+
+    # Estrategia 1: Usar selectores más específicos y expandidos
+    type_selectors = [
+        'div.publicationtype', 
+        '.celltype', 
+        '.type',
+        '.journal-type',
+        '.journal_type',
+        '.publication-type'
+    ]
+
+    for selector in type_selectors:
+        element = journal_soup.select_one(selector)
+        if element and element.text.strip():
+            pub_type = element.text.strip()
+            # Limpiar prefijo "Type:" si existe
+            if 'Type:' in pub_type:
+                pub_type = pub_type.split('Type:', 1)[1].strip()
+            break
+
+    # Estrategia 2: Buscar elementos que contengan "Type:" o "Publication Type:"
+    if not pub_type:
+        type_labels = journal_soup.find_all(
+            ['label', 'div', 'span', 'p', 'td'], 
+            string=re.compile(r'(Type|Publication Type):', re.IGNORECASE)
+        )
+        for label in type_labels:
+            # Intentar extraer del texto después de "Type:"
+            if ':' in label.text:
+                type_text = label.text.split(':', 1)[1].strip()
+                if type_text and not re.match(r'^\s*$', type_text):
+                    pub_type = type_text
+                    break
+            # O buscar en el siguiente elemento
+            next_elem = label.find_next()
+            if next_elem and next_elem.text.strip():
+                pub_type = next_elem.text.strip()
+                break
+
+    # Estrategia 3: Buscar en tablas o secciones específicas
+    if not pub_type:
+        # Buscar en filas de tabla que contengan "Type"
+        type_rows = journal_soup.find_all('tr')
+        for row in type_rows:
+            if re.search(r'Type', row.text, re.IGNORECASE):
+                cells = row.find_all('td')
+                if len(cells) >= 2:
+                    pub_type = cells[1].text.strip()
+                    break
+
+    # Estrategia 4: Búsqueda amplia en el texto
+    if not pub_type:
+        # Patrones comunes para tipo de publicación
+        type_patterns = [
+            r'Type:?\s*([^\n;]+)',
+            r'Publication Type:?\s*([^\n;]+)',
+            r'Document Type:?\s*([^\n;]+)'
+        ]
+
+        for pattern in type_patterns:
+            type_match = re.search(pattern, journal_soup.text, re.IGNORECASE)
+            if type_match:
+                pub_type = type_match.group(1).strip()
+                break
+
+    # 6. NUEVO: Extraer el widget de la revista
+    widget_url = None
+    widget_html = None
+
+    # Estrategia 1: Búsqueda directa de las clases específicas "imgwidget" o "widgetlegend"
+    img_widgets = journal_soup.find_all('img', class_=re.compile(r'imgwidget|widgetlegend', re.IGNORECASE))
+    for img in img_widgets:
+        src = img.get('src')
+        if src:
+            widget_url = src
+            # Si es una URL relativa, convertirla a absoluta
+            if widget_url and not widget_url.startswith('http'):
+                if widget_url.startswith('//'):
+                    widget_url = 'https:' + widget_url
+                elif widget_url.startswith('/'):
+                    widget_url = base_url + widget_url
+                else:
+                    widget_url = base_url + '/' + widget_url
+            widget_html = str(img)
+            break
+
+    # Estrategia 2: Buscar imágenes que contengan "journal_img.php?id=" en la URL
+    if not widget_url:
+        journal_imgs = journal_soup.find_all('img', src=re.compile(r'journal_img\.php\?id=', re.IGNORECASE))
+        for img in journal_imgs:
+            widget_url = img.get('src')
+            # Si es una URL relativa, convertirla a absoluta
+            if widget_url and not widget_url.startswith('http'):
+                if widget_url.startswith('//'):
+                    widget_url = 'https:' + widget_url
+                elif widget_url.startswith('/'):
+                    widget_url = base_url + widget_url
+                else:
+                    widget_url = base_url + '/' + widget_url
+            widget_html = str(img)
+            break
+
+    # Estrategia 3: Buscar imágenes con atributo alt que contenga "SCImago Journal & Country Rank"
+    if not widget_url:
+        rank_imgs = journal_soup.find_all('img', alt=re.compile(r'SCImago Journal (&|and) Country Rank', re.IGNORECASE))
+        for img in rank_imgs:
+            widget_url = img.get('src')
+            # Si es una URL relativa, convertirla a absoluta
+            if widget_url and not widget_url.startswith('http'):
+                if widget_url.startswith('//'):
+                    widget_url = 'https:' + widget_url
+                elif widget_url.startswith('/'):
+                    widget_url = base_url + widget_url
+                else:
+                    widget_url = base_url + '/' + widget_url
+            widget_html = str(img)
+            break
+
+    # Estrategia 4: Buscar elementos padre que contengan imágenes de widget
+    if not widget_url:
+        widget_containers = journal_soup.find_all(['div', 'span'], class_=re.compile(r'widget|rank|scimago', re.IGNORECASE))
+        for container in widget_containers:
+            img = container.find('img')
+            if img and img.get('src'):
+                widget_url = img.get('src')
+                # Si es una URL relativa, convertirla a absoluta
+                if widget_url and not widget_url.startswith('http'):
+                    if widget_url.startswith('//'):
+                        widget_url = 'https:' + widget_url
+                    elif widget_url.startswith('/'):
+                        widget_url = base_url + widget_url
+                    else:
+                        widget_url = base_url + '/' + widget_url
+                widget_html = str(img)
+                break
+
+    # Estrategia 5: Construir URL del widget basada en el ID de la revista (si se puede extraer)
+    if not widget_url:
+        # Intentar extraer el ID de la revista de la URL actual
+        journal_id_match = re.search(r'journalid=(\d+)', journal_url)
+        if journal_id_match:
+            journal_id = journal_id_match.group(1)
+            # Construir la URL del widget común de Scimago usando journal_img.php
+            widget_url = f"{base_url}/journal_img.php?id={journal_id}"
+        else:
+            # Intento adicional: buscar el ID en cualquier parte del HTML
+            any_id_match = re.search(r'[?&]id=(\d+)', journal_soup.text)
+            if any_id_match:
+                journal_id = any_id_match.group(1)
+                widget_url = f"{base_url}/journal_img.php?id={journal_id}"
+
+    return {
+        "h_index": h_index,
+        "subject_area": subject_areas,
+        "publisher": publisher,
+        "issn": issn,
+        "publication_type": pub_type,
+        "widget_url": widget_url,
+        "widget_html": widget_html,
+    }
+
+
+# --- Analizador rápido de una sola pasada ---
+
+# Reglas de BeautifulSoup (html.parser) que se reproducen para obtener los mismos resultados
+ELEMENTOS_VACIOS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem',
+    'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame',
+    'image', 'isindex', 'nextid', 'spacer',
+}
+PRESERVAN_ESPACIOS = {'pre', 'textarea'}
+CONTENEDORES_OCULTOS = {'script', 'style', 'template'}
+ATRIBUTOS_MULTIVALOR = {'class', 'accesskey', 'dropzone'}
+ESPACIOS_ASCII = ' \n\t\x0c\r'
+
+
+class Nodo:
+    __slots__ = ('tag', 'attrs', 'clases', 'padre', 'hijos', 'orden', 'ultimo', 'inicio', 'fin',
+                 'c_inicio', 'c_fin')
+
+    def __init__(self, tag, attrs, clases, padre, orden, inicio, c_inicio):
+        self.tag = tag
+        self.attrs = attrs
+        self.clases = clases
+        self.padre = padre
+        self.hijos = []
+        self.orden = orden
+        self.ultimo = orden
+        self.inicio = inicio
+        self.fin = inicio
+        self.c_inicio = c_inicio
+        self.c_fin = c_inicio
+
+
+class Cadena:
+    # tipo: None para texto normal; 'script', 'style' o 'template' para el
+    # contenido de esas etiquetas; 'otro' para comentarios y declaraciones
+    __slots__ = ('valor', 'padre', 'tipo')
+
+    def __init__(self, valor, padre, tipo):
+        self.valor = valor
+        self.padre = padre
+        self.tipo = tipo
+
+
+def _caracter_numerico(nombre):
+    base = 16 if nombre[:1] in ('x', 'X') else 10
+    try:
+        codigo = int(nombre[1:] if base == 16 else nombre, base)
+    except ValueError:
+        return '�'
+    if codigo < 256:
+        try:
+            return bytes([codigo]).decode('windows-1252')
+        except UnicodeDecodeError:
+            pass
+    try:
+        return chr(codigo)
+    except (ValueError, OverflowError):
+        return '�'
+
+
+class DocumentoHTML(HTMLParser):
+    """
+    Recorre el HTML una sola vez y construye un árbol ligero junto con índices
+    por etiqueta y por clase, de modo que cada estrategia de extracción es una
+    consulta a un índice y no un nuevo recorrido del documento.
+    """
+    def __init__(self, html):
+        super().__init__(convert_charrefs=False)
+        self.raiz = Nodo('[document]', {}, [], None, -1, 0, 0)
+        self.nodos = []
+        self.por_tag = {}
+        self.por_clase = {}
+        self.cadenas = []     # todas las cadenas, incluidos comentarios y scripts
+        self.visibles = []    # solo las que forman parte de .text
+        self._pila = [self.raiz]
+        self._datos = []
+        self._contenedores = []
+        self._preservan = 0
+        self._texto_total = None
+        self.feed(html)
+        self.close()
+        self._volcar()
+        while len(self._pila) > 1:
+            self._cerrar(self._pila.pop())
+        self.raiz.fin = len(self.visibles)
+        self.raiz.c_fin = len(self.cadenas)
+        self.raiz.ultimo = len(self.nodos) - 1
+
+    # Construcción
+
+    def _volcar(self):
+        if not self._datos:
+            return
+        valor = ''.join(self._datos)
+        self._datos = []
+        if not self._preservan and not valor.strip(ESPACIOS_ASCII):
+            valor = '\n' if '\n' in valor else ' '
+        self._agregar_cadena(valor, self._contenedores[-1] if self._contenedores else None)
+
+    def _agregar_cadena(self, valor, tipo):
+        cadena = Cadena(valor, self._pila[-1], tipo)
+        self._pila[-1].hijos.append(cadena)
+        self.cadenas.append(cadena)
+        if tipo is None:
+            self.visibles.append(valor)
+
+    def _cerrar(self, nodo):
+        nodo.fin = len(self.visibles)
+        nodo.c_fin = len(self.cadenas)
+        nodo.ultimo = len(self.nodos) - 1
+        if nodo.tag in CONTENEDORES_OCULTOS:
+            self._contenedores.pop()
+        if nodo.tag in PRESERVAN_ESPACIOS:
+            self._preservan -= 1
+
+    def handle_starttag(self, tag, attrs):
+        self._volcar()
+        atributos = {}
+        for nombre, valor in attrs:
+            atributos[nombre] = '' if valor is None else valor
+        clases = atributos['class'].split() if 'class' in atributos else []
+        padre = self._pila[-1]
+        nodo = Nodo(tag, atributos, clases, padre, len(self.nodos), len(self.visibles), len(self.cadenas))
+        padre.hijos.append(nodo)
+        self.nodos.append(nodo)
+        self.por_tag.setdefault(tag, []).append(nodo)
+        for clase in dict.fromkeys(clases):
+            self.por_clase.setdefault(clase, []).append(nodo)
+        if tag in ELEMENTOS_VACIOS:
+            return
+        self._pila.append(nodo)
+        if tag in CONTENEDORES_OCULTOS:
+            self._contenedores.append(tag)
+        if tag in PRESERVAN_ESPACIOS:
+            self._preservan += 1
+
+    def handle_endtag(self, tag):
+        self._volcar()
+        for i in range(len(self._pila) - 1, 0, -1):
+            if self._pila[i].tag == tag:
+                while len(self._pila) > i:
+                    self._cerrar(self._pila.pop())
+                break
+
+    def handle_data(self, data):
+        self._datos.append(data)
+
+    def handle_entityref(self, name):
+        caracter = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self._datos.append(caracter if caracter is not None else '&' + name)
+
+    def handle_charref(self, name):
+        self._datos.append(_caracter_numerico(name))
+
+    def handle_comment(self, data):
+        self._volcar()
+        self._agregar_cadena(data, 'otro')
+
+    def handle_decl(self, decl):
+        self._volcar()
+        self._agregar_cadena(decl[len('DOCTYPE '):] if decl.startswith('DOCTYPE ') else decl, 'otro')
+
+    def unknown_decl(self, data):
+        self._volcar()
+        if data.upper().startswith('CDATA['):
+            self._agregar_cadena(data[len('CDATA['):], None)
+        else:
+            self._agregar_cadena(data, 'otro')
+
+    def handle_pi(self, data):
+        self._volcar()
+        self._agregar_cadena(data, 'otro')
+
+    # Consultas
+
+    def texto(self, nodo=None):
+        if nodo is None or nodo is self.raiz:
+            if self._texto_total is None:
+                self._texto_total = ''.join(self.visibles)
+            return self._texto_total
+        if nodo.tag in CONTENEDORES_OCULTOS:
+            # Como en BeautifulSoup, el texto de <script>, <style> o <template> es su propio contenido
+            return ''.join(c.valor for c in self.cadenas[nodo.c_inicio:nodo.c_fin] if c.tipo == nodo.tag)
+        return ''.join(self.visibles[nodo.inicio:nodo.fin])
+
+    def cadena_unica(self, nodo):
+        # Equivalente a Tag.string: solo existe si hay un único hijo
+        while len(nodo.hijos) == 1:
+            hijo = nodo.hijos[0]
+            if isinstance(hijo, Cadena):
+                return hijo.valor
+            nodo = hijo
+        return None
+
+    def con_clase(self, clase, tags=None):
+        return [n for n in self.por_clase.get(clase, []) if tags is None or n.tag in tags]
+
+    def primero_con_clase(self, clase, tags=None):
+        for nodo in self.por_clase.get(clase, []):
+            if tags is None or nodo.tag in tags:
+                return nodo
+        return None
+
+    def con_tags(self, tags):
+        if len(tags) == 1:
+            return self.por_tag.get(tags[0], [])
+        nodos = [n for tag in tags for n in self.por_tag.get(tag, [])]
+        nodos.sort(key=lambda n: n.orden)
+        return nodos
+
+    def descendientes(self, nodo, tag):
+        lista = self.por_tag.get(tag, [])
+        inicio = bisect_right(lista, nodo.orden, key=lambda n: n.orden)
+        fin = bisect_right(lista, nodo.ultimo, key=lambda n: n.orden)
+        return lista[inicio:fin]
+
+    def tiene_ancestro_con_clase(self, nodo, clase):
+        nodo = nodo.padre
+        while nodo is not None:
+            if clase in nodo.clases:
+                return nodo
+            nodo = nodo.padre
+        return None
+
+    def siguiente_elemento(self, nodo):
+        siguiente = nodo.orden + 1
+        return self.nodos[siguiente] if siguiente < len(self.nodos) else None
+
+    def hermanos_siguientes(self, nodo):
+        if nodo.padre is None:
+            return []
+        hermanos = nodo.padre.hijos
+        return [h for h in hermanos[hermanos.index(nodo) + 1:] if isinstance(h, Nodo)]
+
+    def primera_cadena(self, patron):
+        for cadena in self.cadenas:
+            if patron.search(cadena.valor):
+                return cadena
+        return None
+
+    def con_cadena(self, tags, patron):
+        nodos = []
+        for nodo in self.con_tags(tags):
+            valor = self.cadena_unica(nodo)
+            if valor is not None and patron.search(valor):
+                nodos.append(nodo)
+        return nodos
+
+
+def _clase_coincide(nodo, patron):
+    return any(patron.search(c) for c in nodo.clases) or bool(patron.search(' '.join(nodo.clases)))
+
+
+def _url_absoluta(url, base_url):
+    # Si es una URL relativa, convertirla a absoluta
+    if url and not url.startswith('http'):
+        if url.startswith('//'):
+            url = 'https:' + url
+        elif url.startswith('/'):
+            url = base_url + url
+        else:
+            url = base_url + '/' + url
+    return url
+
+
+def _serializar(nodo):
+    # Mismo formato que str(tag) en BeautifulSoup: atributos ordenados y entidades mínimas
+    partes = ['<', nodo.tag]
+    for nombre, valor in sorted(nodo.attrs.items()):
+        if nombre in ATRIBUTOS_MULTIVALOR:
+            valor = ' '.join(valor.split())
+        valor = valor.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+        comilla = '"'
+        if '"' in valor:
+            if "'" in valor:
+                valor = valor.replace('"', '&quot;')
+            else:
+                comilla = "'"
+        partes.append(f' {nombre}={comilla}{valor}{comilla}')
+    if nodo.tag in ELEMENTOS_VACIOS:
+        partes.append('/>')
+    else:
+        partes.append('>')
+    return ''.join(partes)
+
+
+RE_H_INDEX_TEXTO = re.compile(r'H[\s\-]*index', re.IGNORECASE)
+RE_H_INDEX_ETIQUETA = re.compile(r'[Hh][\s\-]*Index')
+RE_NUMERO = re.compile(r'(\d+)')
+RE_AREA = re.compile(r'Subject Area', re.IGNORECASE)
+RE_PUBLISHER = re.compile(r'Publisher:', re.IGNORECASE)
+RE_TIPO = re.compile(r'(Type|Publication Type):', re.IGNORECASE)
+RE_WIDGET_CLASE = re.compile(r'imgwidget|widgetlegend', re.IGNORECASE)
+RE_WIDGET_SRC = re.compile(r'journal_img\.php\?id=', re.IGNORECASE)
+RE_WIDGET_ALT = re.compile(r'SCImago Journal (&|and) Country Rank', re.IGNORECASE)
+RE_WIDGET_CONTENEDOR = re.compile(r'widget|rank|scimago', re.IGNORECASE)
+
+
+def extraer_rapido(html, journal_url, base_url=SCIMAGO_URL, estrategias=None):
+    """
+    Aplica las mismas estrategias y en el mismo orden que extraer_con_bs4,
+    pero sobre los índices de DocumentoHTML construidos en una sola pasada.
+    Si se pasa el diccionario 'estrategias' se anota en él el número de la
+    estrategia que resolvió cada campo (None si ninguna).
+    """
+    doc = DocumentoHTML(html)
+    usadas = {}
+
+    # 1. H-index
+    h_index = None
+    nodo = doc.primero_con_clase('hindexnumber', ('span',))
+    if nodo:
+        h_index = doc.texto(nodo).strip()
+        usadas['h_index'] = 1
+    if not h_index:
+        nodo = doc.primero_con_clase('cellh')
+        if nodo:
+            h_index = doc.texto(nodo).strip()
+            usadas['h_index'] = 2
+    if not h_index:
+        cadena = doc.primera_cadena(RE_H_INDEX_TEXTO)
+        if cadena:
+            numeros = RE_NUMERO.search(doc.texto(cadena.padre))
+            if numeros:
+                h_index = numeros.group(1)
+                usadas['h_index'] = 3
+    if not h_index:
+        for nodo in doc.con_cadena(('div', 'span'), RE_H_INDEX_ETIQUETA):
+            numeros = RE_NUMERO.search(doc.texto(nodo))
+            if numeros:
+                h_index = numeros.group(1)
+                usadas['h_index'] = 4
+                break
+            siguiente = doc.siguiente_elemento(nodo)
+            if siguiente:
+                numeros = RE_NUMERO.search(doc.texto(siguiente))
+                if numeros:
+                    h_index = numeros.group(1)
+                    usadas['h_index'] = 4
+                    break
+    if not h_index:
+        h_pattern = re.search(r'[Hh][\s\-]*Index:?\s*(\d+)', doc.texto())
+        if h_pattern:
+            h_index = h_pattern.group(1)
+            usadas['h_index'] = 5
+
+    # 2. Áreas temáticas
+    subject_areas = []
+    selectores = [
+        [n for n in doc.por_tag.get('span', [])
+         if (a := doc.tiene_ancestro_con_clase(n, 'subjectarea')) and doc.tiene_ancestro_con_clase(a, 'journalsubject')],
+        [n for n in doc.por_tag.get('span', []) if doc.tiene_ancestro_con_clase(n, 'cellsubject')],
+        doc.con_clase('subject-area'),
+        doc.con_clase('subjectarea'),
+    ]
+    for numero, elementos in enumerate(selectores, start=1):
+        if elementos:
+            subject_areas = [doc.texto(e).strip() for e in elementos if doc.texto(e).strip()]
+            if subject_areas:
+                usadas['subject_area'] = numero
+                break
+    if not subject_areas:
+        cadena = doc.primera_cadena(RE_AREA)
+        if cadena:
+            for elem in doc.hermanos_siguientes(cadena.padre)[:3]:
+                texto = doc.texto(elem)
+                if texto.strip() and not re.match(r'Publisher|ISSN|Type', texto):
+                    areas = [area.strip() for area in texto.split(',')]
+                    subject_areas.extend([area for area in areas if area])
+                    if subject_areas:
+                        usadas['subject_area'] = 5
+                        break
+
+    # 3. Editorial
+    publisher = None
+    for numero, nodo in enumerate((doc.primero_con_clase('journalpublisher', ('div',)),
+                                   doc.primero_con_clase('cellpublisher'),
+                                   doc.primero_con_clase('publisher')), start=1):
+        if nodo and doc.texto(nodo).strip():
+            publisher = doc.texto(nodo).strip()
+            usadas['publisher'] = numero
+            break
+    if not publisher:
+        for etiqueta in doc.con_cadena(('label', 'div', 'span'), RE_PUBLISHER):
+            siguiente = doc.siguiente_elemento(etiqueta)
+            if siguiente and doc.texto(siguiente).strip():
+                publisher = doc.texto(siguiente).strip()
+                usadas['publisher'] = 4
+                break
+            texto = doc.texto(etiqueta)
+            if ':' in texto:
+                pub_text = texto.split(':', 1)[1].strip()
+                if pub_text:
+                    publisher = pub_text
+                    usadas['publisher'] = 4
+                    break
+    if not publisher:
+        publisher_pattern = re.search(r'Publisher:?\s*([^\n]+)', doc.texto())
+        if publisher_pattern:
+            publisher = publisher_pattern.group(1).strip()
+            usadas['publisher'] = 5
+
+    # 4. ISSN
+    issn = None
+    nodo = doc.primero_con_clase('issn', ('div',)) or doc.primero_con_clase('journalissn')
+    if nodo:
+        issn = doc.texto(nodo).strip()
+        if 'ISSN:' in issn:
+            issn = issn.split('ISSN:', 1)[1].strip()
+        usadas['issn'] = 1
+    if not issn:
+        issn_pattern = re.search(r'ISSN:?\s*([\d\-X]+)', doc.texto())
+        if issn_pattern:
+            issn = issn_pattern.group(1).strip()
+            usadas['issn'] = 2
+
+    # 5. Tipo de publicación
+    pub_type = None
+    for nodo in (doc.primero_con_clase('publicationtype', ('div',)),
+                 doc.primero_con_clase('celltype'),
+                 doc.primero_con_clase('type'),
+                 doc.primero_con_clase('journal-type'),
+                 doc.primero_con_clase('journal_type'),
+                 doc.primero_con_clase('publication-type')):
+        if nodo and doc.texto(nodo).strip():
+            pub_type = doc.texto(nodo).strip()
+            if 'Type:' in pub_type:
+                pub_type = pub_type.split('Type:', 1)[1].strip()
+            usadas['publication_type'] = 1
+            break
+    if not pub_type:
+        for etiqueta in doc.con_cadena(('label', 'div', 'span', 'p', 'td'), RE_TIPO):
+            texto = doc.texto(etiqueta)
+            if ':' in texto:
+                type_text = texto.split(':', 1)[1].strip()
+                if type_text and not re.match(r'^\s*$', type_text):
+                    pub_type = type_text
+                    usadas['publication_type'] = 2
+                    break
+            siguiente = doc.siguiente_elemento(etiqueta)
+            if siguiente and doc.texto(siguiente).strip():
+                pub_type = doc.texto(siguiente).strip()
+                usadas['publication_type'] = 2
+                break
+    if not pub_type:
+        for fila in doc.por_tag.get('tr', []):
+            if re.search(r'Type', doc.texto(fila), re.IGNORECASE):
+                celdas = doc.descendientes(fila, 'td')
+                if len(celdas) >= 2:
+                    pub_type = doc.texto(celdas[1]).strip()
+                    usadas['publication_type'] = 3
+                    break
+    if not pub_type:
+        for pattern in (r'Type:?\s*([^\n;]+)', r'Publication Type:?\s*([^\n;]+)', r'Document Type:?\s*([^\n;]+)'):
+            type_match = re.search(pattern, doc.texto(), re.IGNORECASE)
+            if type_match:
+                pub_type = type_match.group(1).strip()
+                usadas['publication_type'] = 4
+                break
+
+    # 6. Widget
+    widget_url = None
+    widget_html = None
+    imagenes = doc.por_tag.get('img', [])
+    for img in imagenes:
+        if _clase_coincide(img, RE_WIDGET_CLASE) and img.attrs.get('src'):
+            widget_url = _url_absoluta(img.attrs['src'], base_url)
+            widget_html = _serializar(img)
+            usadas['widget'] = 1
+            break
+    if not widget_url:
+        for img in imagenes:
+            if 'src' in img.attrs and RE_WIDGET_SRC.search(img.attrs['src']):
+                widget_url = _url_absoluta(img.attrs['src'], base_url)
+                widget_html = _serializar(img)
+                usadas['widget'] = 2
+                break
+    if not widget_url:
+        for img in imagenes:
+            if 'alt' in img.attrs and RE_WIDGET_ALT.search(img.attrs['alt']):
+                widget_url = _url_absoluta(img.attrs.get('src'), base_url)
+                widget_html = _serializar(img)
+                usadas['widget'] = 3
+                break
+    if not widget_url:
+        for contenedor in doc.con_tags(('div', 'span')):
+            if not _clase_coincide(contenedor, RE_WIDGET_CONTENEDOR):
+                continue
+            imagenes_contenedor = doc.descendientes(contenedor, 'img')
+            if imagenes_contenedor and imagenes_contenedor[0].attrs.get('src'):
+                img = imagenes_contenedor[0]
+                widget_url = _url_absoluta(img.attrs['src'], base_url)
+                widget_html = _serializar(img)
+                usadas['widget'] = 4
+                break
+    if not widget_url:
+        journal_id_match = re.search(r'journalid=(\d+)', journal_url)
+        if journal_id_match:
+            widget_url = f"{base_url}/journal_img.php?id={journal_id_match.group(1)}"
+            usadas['widget'] = 5
+        else:
+            any_id_match = re.search(r'[?&]id=(\d+)', doc.texto())
+            if any_id_match:
+                widget_url = f"{base_url}/journal_img.php?id={any_id_match.group(1)}"
+                usadas['widget'] = 5
+
+    if estrategias is not None:
+        valores = {'h_index': h_index, 'subject_area': subject_areas, 'publisher': publisher,
+                   'issn': issn, 'publication_type': pub_type, 'widget': widget_url}
+        for campo, valor in valores.items():
+            estrategias[campo] = usadas.get(campo) if valor else None
+
+    return {
+        "h_index": h_index,
+        "subject_area": subject_areas,
+        "publisher": publisher,
+        "issn": issn,
+        "publication_type": pub_type,
+        "widget_url": widget_url,
+        "widget_html": widget_html,
+    }
+
+
+def comparar(ruta_html, journal_url, repeticiones=20):
+    """
+    Compara ambos motores sobre una página guardada: verifica que den el
+    mismo resultado e imprime el tiempo medio de cada uno
+    """
+    with open(ruta_html, encoding='utf-8') as f:
+        html = f.read()
+    tiempos = {}
+    resultados = {}
+    for motor in ('bs4', 'rapido'):
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            resultados[motor] = extraer_datos(html, journal_url, motor=motor)
+        tiempos[motor] = (time.perf_counter() - inicio) / repeticiones
+    iguales = resultados['bs4'] == resultados['rapido']
+    print(f"bs4:    {tiempos['bs4'] * 1000:.1f} ms por página")
+    print(f"rapido: {tiempos['rapido'] * 1000:.1f} ms por página ({tiempos['bs4'] / tiempos['rapido']:.1f}x)")
+    print(f"Resultados idénticos: {'sí' if iguales else 'NO'}")
+    if not iguales:
+        for campo in resultados['bs4']:
+            if resultados['bs4'][campo] != resultados['rapido'][campo]:
+                print(f"  {campo}: bs4={resultados['bs4'][campo]!r} rapido={resultados['rapido'][campo]!r}")
+    return iguales
+
+
+if __name__ == '__main__':
+    # Uso: python parser_scimago.py [pagina.html] [url_de_la_revista]
+    ruta = sys.argv[1] if len(sys.argv) > 1 else 'journal_page.html'
+    url = sys.argv[2] if len(sys.argv) > 2 else f"{SCIMAGO_URL}/journalsearch.php?q=21971&tip=sid&clean=0"
+    sys.exit(0 if comparar(ruta, url) else 1)
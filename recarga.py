@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+import traceback
+
+
+def firma_archivo(ruta):
+    # Fecha de modificación y tamaño; None si el archivo no existe
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return estado.st_mtime_ns, estado.st_size
+
+
+class Vigilante:
+    """
+    Hilo en segundo plano que revisa periódicamente un archivo y, cuando
+    cambia, construye los datos nuevos fuera de las peticiones y los entrega
+    ya completos a al_cambiar.
+
+    Un cambio se procesa cuando la firma del archivo se mantiene igual durante
+    una revisión completa, para no leer un archivo a medio escribir. Si la
+    carga falla se conservan los datos anteriores y se vuelve a intentar con
+    el siguiente cambio.
+
+    Args:
+        ruta: Archivo a vigilar
+        cargar: Función cargar(ruta) que devuelve los datos nuevos
+        al_cambiar: Función que recibe los datos nuevos
+        intervalo: Segundos entre revisiones
+    """
+    def __init__(self, ruta, cargar, al_cambiar, intervalo=5.0):
+        self.ruta = ruta
+        self.cargar = cargar
+        self.al_cambiar = al_cambiar
+        self.intervalo = intervalo
+        self.recargas = 0
+        self._cargada = firma_archivo(ruta)
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._vigilar, name='vigilante-' + os.path.basename(ruta), daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+
+    def revisar(self):
+        """
+        Recarga si el archivo cambió respecto a la última carga. Devuelve True
+        si se entregaron datos nuevos.
+        """
+        firma = firma_archivo(self.ruta)
+        if firma is None or firma == self._cargada:
+            return False
+        inicio = time.perf_counter()
+        try:
+            datos = self.cargar(self.ruta)
+        except Exception as e:
+            print(f"⚠️ No se pudo recargar {self.ruta}: {e}")
+            traceback.print_exc()
+            # No se reintenta hasta que el archivo vuelva a cambiar
+            self._cargada = firma
+            return False
+        if firma_archivo(self.ruta) != firma:
+            # El archivo cambió mientras se cargaba: se descarta y se espera a que se estabilice
+            return False
+        self._cargada = firma
+        self.al_cambiar(datos)
+        self.recargas += 1
+        print(f"🔄 {self.ruta} recargado en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        return True
+
+    def _vigilar(self):
+        anterior = firma_archivo(self.ruta)
+        while not self._detener.wait(self.intervalo):
+            firma = firma_archivo(self.ruta)
+            # Solo se carga cuando la firma no cambió desde la revisión anterior
+            if firma == anterior:
+                self.revisar()
+            anterior = firma
@@ -1,14 +1,55 @@
+import bisect
+import json
+import sys
+
+from buscador import Buscador
+from sugerencias import Sugerencias
+
+TAMANO_NGRAMA = 3
+
+def normalizar_titulo(titulo):
+    # Misma normalización que usa /buscar: sin espacios y en minúsculas
+    return titulo.strip().lower().replace(" ", "")
+
+def normalizar_issn(issn):
+    return issn.strip().replace("-", "").upper()
+
+def ngramas(texto, n=TAMANO_NGRAMA):
+    return {texto[i:i + n] for i in range(len(texto) - n + 1)}
+
+def internar(valor):
+    # Editoriales, áreas y tipos se repiten mucho: se comparte una sola copia
+    return sys.intern(valor) if isinstance(valor, str) else valor
+
+def clave_titulo(revista):
+    return revista.title.strip().lower()
+
+def clave_h_index(revista):
+    # Mayor h-index primero; los valores no numéricos ("N/A") van al final
+    try:
+        return (0, -int(revista.h_index), clave_titulo(revista))
+    except (TypeError, ValueError):
+        return (1, 0, clave_titulo(revista))
+
+# Órdenes disponibles para recorrer el catálogo completo
+ORDENES = {
+    "titulo": clave_titulo,
+    "h_index": clave_h_index,
+}
 
 class Revista:
+    __slots__ = ("title", "url", "h_index", "subject_area", "publisher", "issn",
+                 "publication_type", "search_url", "widget_url", "widget_html")
+
     def __init__(self, title, url, h_index, subject_area, publisher,
                 issn, publication_type, search_url, widget_url, widget_html=None):
         self.title = title
         self.url = url
-        self.h_index = h_index
-        self.subject_area = subject_area
-        self.publisher = publisher
+        self.h_index = internar(h_index)
+        self.subject_area = internar(subject_area)
+        self.publisher = internar(publisher)
         self.issn = issn
-        self.publication_type = publication_type
+        self.publication_type = internar(publication_type)
         self.search_url = search_url
         self.widget_url = widget_url
         self.widget_html = widget_html
@@ -33,30 +74,194 @@ class Revista:
 class sistema_de_busqueda:
     def __init__(self):
         self.revista = []
+        self.titulos_normalizados = []
+        # n-grama -> posiciones (ordenadas) de las revistas cuyo título lo contiene
+        self.indice_ngramas = {}
+        # Tablas hash para consultas directas
+        self.por_titulo = {}
+        self.por_issn = {}
+        # letra inicial -> (títulos en minúsculas ordenados, revistas en el mismo orden)
+        self.por_letra = {}
+        # área -> posiciones de las revistas que la incluyen
+        self.por_area = {}
+        self._areas_ordenadas = None
+        # orden -> revistas ordenadas (se calcula una vez y se invalida al agregar)
+        self._ordenes = {}
+        # Índice BM25 con tolerancia a errores; se construye al primer uso
+        self._buscador = None
+        # Títulos con los que se construye el buscador (por defecto los de self.revista)
+        self.titulos_busqueda = None
+        # Autocompletado por prefijo; también se construye al primer uso
+        self._sugerencias = None
+        # h-index con los que se ordenan las sugerencias (por defecto los de self.revista)
+        self.h_indices_busqueda = None
     
     def agregar_revista(self, revista):
+        posicion = len(self.revista)
         self.revista.append(revista)
+        self._ordenes = {}
+        self._buscador = None
+        self._sugerencias = None
+        titulo = normalizar_titulo(revista.title)
+        self.titulos_normalizados.append(titulo)
+        for ngrama in ngramas(titulo):
+            self.indice_ngramas.setdefault(ngrama, []).append(posicion)
+
+        clave = revista.title.strip().lower()
+        self.por_titulo.setdefault(clave, revista)
+        for issn in (revista.issn or "").split(","):
+            issn = normalizar_issn(issn)
+            if issn:
+                self.por_issn.setdefault(issn, revista)
+        if clave:
+            claves, revistas = self.por_letra.setdefault(clave[0], ([], []))
+            indice = bisect.bisect_right(claves, clave)
+            claves.insert(indice, clave)
+            revistas.insert(indice, revista)
+
+        for area in (revista.subject_area or "").split(","):
+            area = area.strip()
+            if not area:
+                continue
+            if area not in self.por_area:
+                self.por_area[area] = []
+                self._areas_ordenadas = None
+            posiciones = self.por_area[area]
+            if not posiciones or posiciones[-1] != posicion:
+                posiciones.append(posicion)
+
+    def total(self):
+        return len(self.revista)
+
+    def areas(self):
+        if self._areas_ordenadas is None:
+            self._areas_ordenadas = sorted(self.por_area)
+        return self._areas_ordenadas
+
+    def ordenadas(self, orden="titulo"):
+        if orden not in self._ordenes:
+            self._ordenes[orden] = sorted(self.revista, key=ORDENES[orden])
+        return self._ordenes[orden]
+
+    def pagina(self, orden="titulo", inicio=0, cantidad=50):
+        # El orden ya está calculado: una página es solo un corte de la lista
+        return [revista.to_dict() for revista in self.ordenadas(orden)[inicio:inicio + cantidad]]
+
+    def contar_por_area(self):
+        return {area: len(self.por_area[area]) for area in self.areas()}
+
+    def obtener_por_titulo(self, titulo):
+        return self.por_titulo.get(titulo.strip().lower())
+
+    def obtener_por_issn(self, issn):
+        return self.por_issn.get(normalizar_issn(issn))
+
+    def obtener_varias_por_titulo(self, titulos):
+        # Diccionario de cada revista encontrada o None, en el orden de los títulos
+        revistas = (self.obtener_por_titulo(titulo) for titulo in titulos)
+        return [revista.to_dict() if revista else None for revista in revistas]
+
+    def obtener_varias_por_issn(self, issns):
+        revistas = (self.obtener_por_issn(issn) for issn in issns)
+        return [revista.to_dict() if revista else None for revista in revistas]
+
+    def _candidatos_por_titulo(self, consulta):
+        # Devuelve las posiciones cuyo título normalizado contiene la consulta normalizada
+        if len(consulta) < TAMANO_NGRAMA:
+            return [i for i, titulo in enumerate(self.titulos_normalizados) if consulta in titulo]
+        listas = []
+        for ngrama in ngramas(consulta):
+            lista = self.indice_ngramas.get(ngrama)
+            if not lista:
+                return []
+            listas.append(lista)
+        # Basta con verificar la lista más corta: todo resultado aparece en ella
+        menor = min(listas, key=len)
+        return [i for i in menor if consulta in self.titulos_normalizados[i]]
     
     def buscar_por_area(self, area_buscada):
-        revistas_encontradas = []
-        for revista in self.revista:
-            if area_buscada in [a.strip() for a in revista.subject_area.split(",")]:
-                revistas_encontradas.append(revista.to_dict())
-        return revistas_encontradas
+        return [self.revista[posicion].to_dict() for posicion in self.por_area.get(area_buscada, [])]
     
-    def buscar_por_titulo(self, titulo_buscado):
+    def buscar_por_titulo(self, titulo_buscado, ignorar_espacios=False):
         revistas_encontradas = []
-        for revista in self.revista:
-            if titulo_buscado.lower() in revista.title.lower():
+        for posicion in self._candidatos_por_titulo(normalizar_titulo(titulo_buscado)):
+            revista = self.revista[posicion]
+            if ignorar_espacios or titulo_buscado.lower() in revista.title.lower():
                 revistas_encontradas.append(revista.to_dict())
         return revistas_encontradas
     
+    def preparar_buscador(self):
+        if self._buscador is None:
+            titulos = self.titulos_busqueda
+            if titulos is None:
+                titulos = [revista.title for revista in self.revista]
+            self._buscador = Buscador(titulos)
+        return self._buscador
+
+    def buscador_listo(self):
+        return self._buscador is not None
+
+    def buscar_relevantes(self, consulta, limite=50):
+        # Sin acentos, por palabras y tolerando errores, de más a menos relevante
+        resultados = self.preparar_buscador().buscar(consulta, limite)
+        return [self.revista[posicion].to_dict() for posicion, _ in resultados]
+
+    def preparar_sugerencias(self):
+        if self._sugerencias is None:
+            titulos = self.titulos_busqueda
+            if titulos is None:
+                titulos = [revista.title for revista in self.revista]
+            h_indices = self.h_indices_busqueda
+            if h_indices is None:
+                h_indices = [revista.h_index for revista in self.revista]
+            self._sugerencias = Sugerencias(titulos, h_indices)
+        return self._sugerencias
+
+    def sugerencias_listas(self):
+        return self._sugerencias is not None
+
+    def sugerir(self, prefijo, cantidad=10):
+        # Títulos que empiezan con el prefijo, de mayor a menor h-index
+        revistas = [self.revista[posicion] for posicion in self.preparar_sugerencias().sugerir(prefijo, cantidad)]
+        return [{"title": revista.title, "h_index": revista.h_index} for revista in revistas]
+    
     def buscar_por_letra(self, letra_buscada):
+        prefijo = letra_buscada.lower()
+        if not prefijo:
+            return [revista.to_dict() for revista in self.revista]
+        claves, revistas = self.por_letra.get(prefijo[0], ([], []))
         revistas_encontradas = []
-        for revista in self.revista:
-            if revista.title.strip().lower().startswith(letra_buscada.lower()):
-                revistas_encontradas.append(revista.to_dict())
+        # Las claves están ordenadas: las coincidencias forman un bloque contiguo
+        for indice in range(bisect.bisect_left(claves, prefijo), len(claves)):
+            if not claves[indice].startswith(prefijo):
+                break
+            revistas_encontradas.append(revistas[indice].to_dict())
         return revistas_encontradas
 
+def revista_desde_dict(item):
+    # Convierte una entrada del JSON del scraper en Revista
+    return Revista(
+        title=item.get("title", ""),
+        url=item.get("url", ""),
+        h_index=item.get("h-index", "N/A"),
+        subject_area=",".join(item.get("subject_area", [])),
+        publisher=item.get("publisher", ""),
+        issn=item.get("issn", ""),
+        publication_type=item.get("publication_type", ""),
+        search_url=item.get("search_url", ""),
+        widget_url=item.get("widget_url", ""),
+        widget_html=item.get("widget_html", "")
+    )
+
+def cargar_json(ruta):
+    # El JSON solo se usa para construir las revistas, así cada revista queda
+    # en memoria una sola vez (dentro del sistema)
+    sistema = sistema_de_busqueda()
+    with open(ruta, encoding='utf-8') as f:
+        data = json.load(f)
+    for item in data:
+        sistema.agregar_revista(revista_desde_dict(item))
+    return sistema
+
 if __name__ == '__main__':
     sistema = sistema_de_busqueda()
\ No newline at end of file
@@ -0,0 +1,377 @@
+import json
+import os
+import sqlite3
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import revista_clases as rc
+from buscador import Buscador
+from sugerencias import Sugerencias
+
+# Motor de búsqueda alternativo a sistema_de_busqueda guardado en SQLite.
+# Las revistas, sus áreas e ISSN están en tablas normalizadas con índices y la
+# búsqueda por título usa una tabla FTS5 con tokenizador de trigramas, que
+# resuelve la misma búsqueda por subcadena que el índice de n-gramas en memoria.
+
+CAMPOS = rc.Revista.__slots__
+COLUMNAS = ", ".join(f"r.{campo}" for campo in CAMPOS)
+
+ESQUEMA = f"""
+CREATE TABLE meta (clave TEXT PRIMARY KEY, valor TEXT);
+CREATE TABLE revista (
+    id INTEGER PRIMARY KEY,
+    {", ".join(CAMPOS)},
+    clave TEXT NOT NULL,
+    normalizado TEXT NOT NULL,
+    h_num INTEGER
+);
+CREATE INDEX revista_clave ON revista (clave, id);
+CREATE INDEX revista_h_index ON revista (h_num IS NULL, h_num DESC, clave, id);
+CREATE TABLE area (id INTEGER PRIMARY KEY, nombre TEXT NOT NULL UNIQUE);
+CREATE TABLE revista_area (
+    area INTEGER NOT NULL REFERENCES area (id),
+    revista INTEGER NOT NULL REFERENCES revista (id),
+    PRIMARY KEY (area, revista)
+) WITHOUT ROWID;
+CREATE TABLE revista_issn (
+    issn TEXT NOT NULL,
+    revista INTEGER NOT NULL REFERENCES revista (id),
+    PRIMARY KEY (issn, revista)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE titulo_fts USING fts5(
+    normalizado, content='revista', content_rowid='id',
+    tokenize='trigram case_sensitive 1'
+);
+"""
+
+# Consultas fijas: el módulo sqlite3 guarda la sentencia preparada de cada
+# texto SQL por conexión, así que se reutilizan entre peticiones
+SQL_TITULO_FTS = f"""SELECT {COLUMNAS} FROM titulo_fts f JOIN revista r ON r.id = f.rowid
+                     WHERE titulo_fts MATCH ? ORDER BY r.id"""
+SQL_TITULO_CORTO = f"SELECT {COLUMNAS} FROM revista r WHERE instr(r.normalizado, ?) > 0 ORDER BY r.id"
+SQL_AREA = f"""SELECT {COLUMNAS} FROM area a JOIN revista_area ra ON ra.area = a.id
+               JOIN revista r ON r.id = ra.revista WHERE a.nombre = ? ORDER BY r.id"""
+SQL_LETRA = f"SELECT {COLUMNAS} FROM revista r WHERE r.clave >= ? AND r.clave < ? ORDER BY r.clave, r.id"
+SQL_TODAS = f"SELECT {COLUMNAS} FROM revista r ORDER BY r.id"
+SQL_POR_TITULO = f"SELECT {COLUMNAS} FROM revista r WHERE r.clave = ? ORDER BY r.id LIMIT 1"
+SQL_POR_ISSN = f"""SELECT {COLUMNAS} FROM revista_issn i JOIN revista r ON r.id = i.revista
+                   WHERE i.issn = ? ORDER BY r.id LIMIT 1"""
+# Búsquedas por lote: una sola consulta con la lista como arreglo JSON; cada
+# elemento toma la primera revista con esa clave, igual que SQL_POR_TITULO/ISSN
+SQL_LOTE_TITULOS = f"""SELECT c.key, {COLUMNAS} FROM json_each(?) c
+                        JOIN revista r ON r.id = (SELECT MIN(id) FROM revista WHERE clave = c.value)"""
+SQL_LOTE_ISSN = f"""SELECT c.key, {COLUMNAS} FROM json_each(?) c
+                     JOIN revista r ON r.id = (SELECT MIN(revista) FROM revista_issn WHERE issn = c.value)"""
+SQL_AREAS = "SELECT nombre FROM area ORDER BY nombre"
+SQL_CONTAR_AREAS = """SELECT a.nombre, COUNT(*) FROM area a JOIN revista_area ra ON ra.area = a.id
+                      GROUP BY a.id ORDER BY a.nombre"""
+SQL_TOTAL = "SELECT COUNT(*) FROM revista"
+SQL_TITULOS = "SELECT title FROM revista ORDER BY id"
+SQL_TITULOS_H_INDEX = "SELECT title, h_index FROM revista ORDER BY id"
+SQL_POR_ID = f"SELECT r.id, {COLUMNAS} FROM revista r WHERE r.id IN (SELECT value FROM json_each(?))"
+SQL_ORDENES = {
+    "titulo": f"SELECT {COLUMNAS} FROM revista r ORDER BY r.clave, r.id",
+    "h_index": f"SELECT {COLUMNAS} FROM revista r ORDER BY r.h_num IS NULL, r.h_num DESC, r.clave, r.id",
+}
+
+RUTA_SQLITE = 'revistas.db'
+# Conexiones abiertas como máximo por sistema; las consultas esperan turno si están todas ocupadas
+MAX_CONEXIONES = 8
+
+
+def h_index_numerico(h_index):
+    # Misma conversión que revista_clases.clave_h_index
+    try:
+        return int(h_index)
+    except (TypeError, ValueError):
+        return None
+
+
+class sistema_sqlite:
+    """
+    Sistema de búsqueda de solo lectura sobre una base SQLite generada con
+    construir(). Ofrece los mismos métodos de consulta que sistema_de_busqueda.
+    Las conexiones se reutilizan desde un grupo acotado: cada consulta toma
+    una libre (o abre otra si aún no se llegó al máximo, o espera) y la
+    devuelve al terminar, así el número de archivos abiertos no crece con los
+    hilos del servidor.
+
+    Args:
+        ruta: Archivo de la base de datos
+        max_conexiones: Conexiones abiertas como máximo
+    """
+    def __init__(self, ruta=RUTA_SQLITE, max_conexiones=MAX_CONEXIONES):
+        self.ruta = ruta
+        self.max_conexiones = max_conexiones
+        self._libres = queue.LifoQueue()
+        self._abiertas = 0
+        self._candado = threading.Lock()
+        self._buscador = None
+        self._sugerencias = None
+        self._titulos_h_index = None
+
+    @contextmanager
+    def _conexion(self):
+        try:
+            conexion = self._libres.get_nowait()
+        except queue.Empty:
+            with self._candado:
+                abrir = self._abiertas < self.max_conexiones
+                if abrir:
+                    self._abiertas += 1
+            if abrir:
+                # La conexión pasa de un hilo a otro, pero nunca la usan dos a la vez
+                conexion = sqlite3.connect(f"file:{self.ruta}?mode=ro", uri=True, check_same_thread=False)
+            else:
+                conexion = self._libres.get()
+        try:
+            yield conexion
+        finally:
+            self._libres.put(conexion)
+
+    def cerrar(self):
+        # Cierra las conexiones libres (p. ej. al reemplazar el sistema en una recarga)
+        while True:
+            try:
+                conexion = self._libres.get_nowait()
+            except queue.Empty:
+                return
+            conexion.close()
+            with self._candado:
+                self._abiertas -= 1
+
+    def _consultar(self, sql, parametros=()):
+        with self._conexion() as conexion:
+            return conexion.execute(sql, parametros).fetchall()
+
+    def _revistas(self, sql, parametros=()):
+        return [rc.Revista(*fila) for fila in self._consultar(sql, parametros)]
+
+    def _dicts(self, sql, parametros=()):
+        # Las consultas que devuelven diccionarios los arman directo de la fila,
+        # con las mismas claves y en el mismo orden que Revista.to_dict
+        return [dict(zip(CAMPOS, fila)) for fila in self._consultar(sql, parametros)]
+
+    def _revista(self, sql, parametros):
+        with self._conexion() as conexion:
+            fila = conexion.execute(sql, parametros).fetchone()
+        return rc.Revista(*fila) if fila else None
+
+    def total(self):
+        return self._consultar(SQL_TOTAL)[0][0]
+
+    def areas(self):
+        return [nombre for (nombre,) in self._consultar(SQL_AREAS)]
+
+    def contar_por_area(self):
+        return dict(self._consultar(SQL_CONTAR_AREAS))
+
+    def obtener_por_titulo(self, titulo):
+        return self._revista(SQL_POR_TITULO, (titulo.strip().lower(),))
+
+    def obtener_por_issn(self, issn):
+        return self._revista(SQL_POR_ISSN, (rc.normalizar_issn(issn),))
+
+    def _lote(self, sql, claves):
+        encontradas = {fila[0]: dict(zip(CAMPOS, fila[1:]))
+                       for fila in self._consultar(sql, (json.dumps(claves),))}
+        return [encontradas.get(i) for i in range(len(claves))]
+
+    def obtener_varias_por_titulo(self, titulos):
+        return self._lote(SQL_LOTE_TITULOS, [titulo.strip().lower() for titulo in titulos])
+
+    def obtener_varias_por_issn(self, issns):
+        return self._lote(SQL_LOTE_ISSN, [rc.normalizar_issn(issn) for issn in issns])
+
+    def ordenadas(self, orden="titulo"):
+        # Se recorre el cursor sin cargar todas las filas en memoria; la
+        # conexión vuelve al grupo cuando termina (o se cierra) el recorrido
+        with self._conexion() as conexion:
+            for fila in conexion.execute(SQL_ORDENES[orden]):
+                yield rc.Revista(*fila)
+
+    def pagina(self, orden="titulo", inicio=0, cantidad=50):
+        sql = SQL_ORDENES[orden] + " LIMIT ? OFFSET ?"
+        return self._dicts(sql, (cantidad, inicio))
+
+    def buscar_por_area(self, area_buscada):
+        return self._dicts(SQL_AREA, (area_buscada,))
+
+    def buscar_por_titulo(self, titulo_buscado, ignorar_espacios=False):
+        consulta = rc.normalizar_titulo(titulo_buscado)
+        if len(consulta) < rc.TAMANO_NGRAMA:
+            revistas = self._dicts(SQL_TITULO_CORTO, (consulta,))
+        else:
+            # Frase entre comillas: con trigramas equivale a buscar la subcadena
+            revistas = self._dicts(SQL_TITULO_FTS, ('"' + consulta.replace('"', '""') + '"',))
+        if not ignorar_espacios:
+            revistas = [r for r in revistas if titulo_buscado.lower() in r["title"].lower()]
+        return revistas
+
+    def preparar_buscador(self):
+        # El ranking se calcula en memoria con el mismo buscador que el motor en memoria
+        if self._buscador is None:
+            self._buscador = Buscador([titulo for (titulo,) in self._consultar(SQL_TITULOS)])
+        return self._buscador
+
+    def buscador_listo(self):
+        return self._buscador is not None
+
+    def buscar_relevantes(self, consulta, limite=50):
+        posiciones = [posicion for posicion, _ in self.preparar_buscador().buscar(consulta, limite)]
+        filas = {fila[0]: fila[1:] for fila in
+                 self._consultar(SQL_POR_ID, (json.dumps([p + 1 for p in posiciones]),))}
+        return [dict(zip(CAMPOS, filas[posicion + 1])) for posicion in posiciones]
+
+    def preparar_sugerencias(self):
+        # Los títulos y h-index quedan en memoria: una sugerencia no consulta la base
+        if self._sugerencias is None:
+            self._titulos_h_index = self._consultar(SQL_TITULOS_H_INDEX)
+            self._sugerencias = Sugerencias([titulo for titulo, _ in self._titulos_h_index],
+                                            [h_index for _, h_index in self._titulos_h_index])
+        return self._sugerencias
+
+    def sugerencias_listas(self):
+        return self._sugerencias is not None
+
+    def sugerir(self, prefijo, cantidad=10):
+        posiciones = self.preparar_sugerencias().sugerir(prefijo, cantidad)
+        return [dict(zip(("title", "h_index"), self._titulos_h_index[posicion])) for posicion in posiciones]
+
+    def buscar_por_letra(self, letra_buscada):
+        prefijo = letra_buscada.lower()
+        if not prefijo:
+            return self._dicts(SQL_TODAS)
+        # Las claves que empiezan con el prefijo forman un rango en el índice
+        return self._dicts(SQL_LETRA, (prefijo, prefijo + '\U0010ffff'))
+
+
+def construir(ruta_json, ruta=RUTA_SQLITE):
+    """
+    Genera la base de datos a partir del JSON del scraper. Se escribe en un
+    archivo temporal y se renombra al final, así las conexiones abiertas siguen
+    leyendo la versión anterior.
+    """
+    estado = os.stat(ruta_json)
+    with open(ruta_json, encoding='utf-8') as f:
+        data = json.load(f)
+
+    temporal = ruta + '.tmp'
+    if os.path.exists(temporal):
+        os.remove(temporal)
+    conexion = sqlite3.connect(temporal)
+    conexion.executescript(ESQUEMA)
+    areas = {}
+    with conexion:
+        for posicion, item in enumerate(data, start=1):
+            revista = rc.revista_desde_dict(item)
+            valores = [getattr(revista, campo) for campo in CAMPOS]
+            conexion.execute(
+                f"INSERT INTO revista (id, {', '.join(CAMPOS)}, clave, normalizado, h_num) "
+                f"VALUES (?, {', '.join('?' * len(CAMPOS))}, ?, ?, ?)",
+                [posicion, *valores, revista.title.strip().lower(),
+                 rc.normalizar_titulo(revista.title), h_index_numerico(revista.h_index)])
+            for area in (revista.subject_area or "").split(","):
+                area = area.strip()
+                if not area:
+                    continue
+                if area not in areas:
+                    areas[area] = len(areas) + 1
+                    conexion.execute("INSERT INTO area (id, nombre) VALUES (?, ?)", (areas[area], area))
+                conexion.execute("INSERT OR IGNORE INTO revista_area (area, revista) VALUES (?, ?)",
+                                 (areas[area], posicion))
+            for issn in (revista.issn or "").split(","):
+                issn = rc.normalizar_issn(issn)
+                if issn:
+                    conexion.execute("INSERT OR IGNORE INTO revista_issn (issn, revista) VALUES (?, ?)",
+                                     (issn, posicion))
+        conexion.execute("INSERT INTO titulo_fts (titulo_fts) VALUES ('rebuild')")
+        conexion.executemany("INSERT INTO meta (clave, valor) VALUES (?, ?)",
+                             [("origen_mtime", str(estado.st_mtime_ns)), ("origen_tamano", str(estado.st_size))])
+    conexion.execute("VACUUM")
+    conexion.close()
+    os.replace(temporal, ruta)
+    return len(data)
+
+
+def vigente(ruta, ruta_json):
+    """
+    Indica si la base existe y se generó a partir del JSON actual
+    """
+    if not os.path.exists(ruta):
+        return False
+    if not os.path.exists(ruta_json):
+        return True
+    try:
+        conexion = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True)
+        try:
+            meta = dict(conexion.execute("SELECT clave, valor FROM meta").fetchall())
+        finally:
+            conexion.close()
+    except sqlite3.DatabaseError:
+        return False
+    estado = os.stat(ruta_json)
+    return meta.get("origen_mtime") == str(estado.st_mtime_ns) and meta.get("origen_tamano") == str(estado.st_size)
+
+
+def cargar_sistema(ruta_json, ruta=RUTA_SQLITE):
+    # Regenera la base si el JSON cambió desde la última construcción
+    if not vigente(ruta, ruta_json):
+        construir(ruta_json, ruta)
+    return sistema_sqlite(ruta)
+
+
+def comparar(ruta_json, ruta=RUTA_SQLITE, repeticiones=20):
+    """
+    Compara tiempos y resultados del sistema en memoria y del sistema SQLite
+    """
+    inicio = time.perf_counter()
+    memoria = rc.cargar_json(ruta_json)
+    carga_memoria = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    construir(ruta_json, ruta)
+    construccion = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    sqlite = sistema_sqlite(ruta)
+    sqlite.total()
+    carga_sqlite = time.perf_counter() - inicio
+    print(f"Carga en memoria: {carga_memoria * 1000:.0f} ms  Construcción SQLite: {construccion * 1000:.0f} ms"
+          f"  Apertura SQLite: {carga_sqlite * 1000:.1f} ms  ({os.path.getsize(ruta)} bytes)")
+
+    area = memoria.areas()[0] if memoria.areas() else ""
+    consultas = [
+        ("titulo 'journal'", lambda s: s.buscar_por_titulo("journal", ignorar_espacios=True)),
+        ("titulo 'revista de'", lambda s: s.buscar_por_titulo("revista de", ignorar_espacios=True)),
+        ("titulo 'ac' (corto)", lambda s: s.buscar_por_titulo("ac", ignorar_espacios=True)),
+        ("titulo sin resultados", lambda s: s.buscar_por_titulo("zzqx", ignorar_espacios=True)),
+        (f"area '{area}'", lambda s: s.buscar_por_area(area)),
+        ("letra 'a'", lambda s: s.buscar_por_letra("a")),
+        ("prefijo 'acta'", lambda s: s.buscar_por_letra("acta")),
+        ("pagina h-index", lambda s: s.pagina("h_index", 500, 50)),
+        ("por titulo", lambda s: s.obtener_por_titulo(memoria.revista[len(memoria.revista) // 2].title).to_dict()),
+    ]
+    iguales = True
+    print(f"{'Consulta':<30}{'memoria ms':>12}{'sqlite ms':>12}{'resultados':>12}")
+    for nombre, consulta in consultas:
+        tiempos = []
+        for sistema in (memoria, sqlite):
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                resultado = consulta(sistema)
+            tiempos.append((time.perf_counter() - inicio) / repeticiones)
+        if consulta(memoria) != resultado:
+            iguales = False
+            print(f"⚠️ Resultados distintos en: {nombre}")
+        cantidad = len(resultado) if isinstance(resultado, list) else 1
+        print(f"{nombre:<30}{tiempos[0] * 1000:>12.2f}{tiempos[1] * 1000:>12.2f}{cantidad:>12}")
+    return iguales
+
+
+if __name__ == '__main__':
+    # Uso: python sistema_sqlite.py [Scimago.json] [revistas.db]
+    ruta_json = sys.argv[1] if len(sys.argv) > 1 else 'Scimago.json'
+    ruta = sys.argv[2] if len(sys.argv) > 2 else RUTA_SQLITE
+    sys.exit(0 if comparar(ruta_json, ruta) else 1)
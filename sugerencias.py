@@ -0,0 +1,107 @@
+import bisect
+import heapq
+import re
+import sys
+import time
+
+from buscador import plegar
+
+# Sugerencias que se precalculan por prefijo
+K_MAXIMO = 20
+# Los prefijos con más títulos que este umbral tienen sus mejores títulos
+# precalculados; los demás se ordenan al consultar (son pocos)
+UMBRAL = 64
+ESPACIOS = re.compile(r'\s+')
+FIN = '\U0010ffff'
+
+
+def normalizar_prefijo(texto):
+    # Sin acentos, en minúsculas y con los espacios repetidos reducidos a uno;
+    # se conserva un espacio final para distinguir "acta " de "actas"
+    return ESPACIOS.sub(' ', plegar(texto or '')).lstrip()
+
+
+def rango_h_index(h_index):
+    # Igual que revista_clases.clave_h_index: mayor h-index primero, "N/A" al final
+    try:
+        return (0, -int(h_index))
+    except (TypeError, ValueError):
+        return (1, 0)
+
+
+class Sugerencias:
+    """
+    Autocompletado por prefijo sobre un arreglo ordenado de títulos
+    normalizados. Equivale a un trie: cada prefijo es un rango contiguo del
+    arreglo y los prefijos con muchos títulos guardan sus K_MAXIMO mejores por
+    h-index, así ninguna consulta recorre más de UMBRAL títulos.
+
+    Args:
+        titulos: Títulos en el orden de las posiciones que devolverá sugerir()
+        h_indices: h-index de cada título, en el mismo orden
+    """
+    def __init__(self, titulos, h_indices):
+        pares = sorted((normalizar_prefijo(titulo).rstrip(), posicion) for posicion, titulo in enumerate(titulos))
+        self.claves = [clave for clave, _ in pares]
+        self.posiciones = [posicion for _, posicion in pares]
+        h_indices = list(h_indices)
+        # Rango global de cada elemento del arreglo: menor es mejor
+        orden = sorted(range(len(pares)), key=lambda i: (rango_h_index(h_indices[self.posiciones[i]]), i))
+        self.rango = [0] * len(pares)
+        for lugar, i in enumerate(orden):
+            self.rango[i] = lugar
+
+        self.mejores = {'': self._mejores(0, len(self.claves))}
+        pendientes = [(0, len(self.claves))]
+        profundidad = 1
+        while pendientes:
+            siguientes = []
+            for inicio, fin in pendientes:
+                i = inicio
+                while i < fin:
+                    if len(self.claves[i]) < profundidad:
+                        i += 1
+                        continue
+                    prefijo = self.claves[i][:profundidad]
+                    j = bisect.bisect_left(self.claves, prefijo + FIN, i, fin)
+                    if j - i > UMBRAL:
+                        self.mejores[prefijo] = self._mejores(i, j)
+                        siguientes.append((i, j))
+                    i = j
+            pendientes = siguientes
+            profundidad += 1
+
+    def _mejores(self, inicio, fin, k=K_MAXIMO):
+        return heapq.nsmallest(k, range(inicio, fin), key=self.rango.__getitem__)
+
+    def sugerir(self, prefijo, k=10):
+        """
+        Posiciones de hasta k títulos que empiezan con el prefijo, de mayor a menor h-index
+        """
+        prefijo = normalizar_prefijo(prefijo)
+        k = min(k, K_MAXIMO)
+        if prefijo in self.mejores:
+            indices = self.mejores[prefijo][:k]
+        else:
+            inicio = bisect.bisect_left(self.claves, prefijo)
+            fin = bisect.bisect_left(self.claves, prefijo + FIN, inicio)
+            indices = self._mejores(inicio, fin, k)
+        return [self.posiciones[i] for i in indices]
+
+
+if __name__ == '__main__':
+    # Uso: python sugerencias.py Scimago.json prefijo ...
+    import json
+    with open(sys.argv[1], encoding='utf-8') as f:
+        datos = json.load(f)
+    inicio = time.perf_counter()
+    sugerencias = Sugerencias([d.get("title", "") for d in datos], [d.get("h-index") for d in datos])
+    print(f"Índice de {len(datos)} títulos en {(time.perf_counter() - inicio) * 1000:.0f} ms "
+          f"({len(sugerencias.mejores)} prefijos precalculados)")
+    for prefijo in sys.argv[2:]:
+        inicio = time.perf_counter()
+        for _ in range(1000):
+            posiciones = sugerencias.sugerir(prefijo)
+        print(f"\n'{prefijo}' ({(time.perf_counter() - inicio) * 1000:.3f} µs por consulta)")
+        for posicion in posiciones:
+            print(f"  {datos[posicion].get('h-index')!s:>5}  {datos[posicion].get('title')}")
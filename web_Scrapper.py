@@ -4,28 +4,98 @@ import json
 import os
 import time
 import re
+import argparse
+from contextlib import nullcontext
+from descargas import Descargador, procesar_en_paralelo, USER_AGENT
+from cache_http import CacheHTTP
+from bitacora import BitacoraScrapper, clave_titulo, combinar
+from revista_clases import normalizar_issn
+import parser_scimago
+import emparejamiento
+from metricas_scrapper import MetricasScrapper, imprimir_resumen
 
-def scrape_scimago(journal_title):
+# Se puede apuntar a un servidor local para pruebas
+SCIMAGO_URL = "https://www.scimagojr.com"
+
+# Códigos HTTP que se consideran fallos transitorios y se reintentan
+CODIGOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+def scrape_scimago(journal_title, descargador=None, cache=None, metricas=None, reintentos=0, red=None):
     """
     Extrae información sobre una revista científica de Scimago
+
+    Args:
+        journal_title: Título de la revista a buscar
+        descargador: Descargador compartido (modo concurrente). Si se indica, la
+            tasa de peticiones la controla el descargador y no se guardan las
+            páginas de depuración.
+        cache: CacheHTTP opcional; las páginas se sirven desde disco si están
+            frescas y se revalidan con ETag/Last-Modified si no
+        metricas: MetricasScrapper opcional donde se anota el tiempo de cada
+            etapa, los bytes, los reintentos y la estrategia de cada campo
+        reintentos: Reintentos por petición ante errores de red, 429 o 5xx
+        red: Lista opcional donde se anota cada URL que se pidió a la red
+            (las páginas servidas desde la caché no se anotan)
     """
     # Convertir espacios para la URL de búsqueda
-    search_url = f"https://www.scimagojr.com/journalsearch.php?q={journal_title.replace(' ', '+')}"
+    search_url = f"{SCIMAGO_URL}/journalsearch.php?q={journal_title.replace(' ', '+')}"
+    registro = metricas.nuevo(journal_title) if metricas else None
+
+    def etapa(nombre):
+        return registro.etapa(nombre) if registro else nullcontext()
     
     try:
         # Añadir User-Agent para evitar ser bloqueado
         headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': USER_AGENT
         }
+
+        def peticion(url, extra):
+            if red is not None:
+                red.append(url)
+            if descargador:
+                return descargador.get(url, headers=extra)
+            return requests.get(url, headers={**headers, **(extra or {})})
+
+        def descargar(url, extra=None):
+            intento = 0
+            while True:
+                try:
+                    respuesta = peticion(url, extra)
+                    if respuesta.status_code not in CODIGOS_REINTENTABLES or intento >= reintentos:
+                        return respuesta
+                    print(f"Respuesta {respuesta.status_code} de {url}, reintentando...")
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    if intento >= reintentos:
+                        raise
+                    print(f"Error de red en {url} ({e}), reintentando...")
+                intento += 1
+                if registro:
+                    registro.reintentos += 1
+                # Espera exponencial entre reintentos: 1, 2, 4... segundos
+                time.sleep(2 ** (intento - 1))
+
+        def obtener(url, nombre):
+            inicio = time.perf_counter()
+            respuesta = cache.get(url, descargar) if cache else descargar(url)
+            if registro:
+                # El tiempo detenido por el limitador se anota aparte como 'espera_tasa'
+                espera = getattr(respuesta, 'espera_tasa', 0.0)
+                registro.sumar(nombre, time.perf_counter() - inicio - espera)
+                registro.respuesta(respuesta)
+            return respuesta
+
         print(f"Buscando '{journal_title}' en: {search_url}")
-        search_response = requests.get(search_url, headers=headers)
+        search_response = obtener(search_url, 'busqueda')
         search_response.raise_for_status()  # Verificar si la solicitud fue exitosa
         
         # Guardar la página de búsqueda para depuración
-        with open("search_page.html", "w", encoding="utf-8") as f:
-            f.write(search_response.text)
-        print("Página de búsqueda guardada en 'search_page.html' para depuración")
+        if not descargador:
+            with open("search_page.html", "w", encoding="utf-8") as f:
+                f.write(search_response.text)
+            print("Página de búsqueda guardada en 'search_page.html' para depuración")
         
+        inicio_parse = time.perf_counter()
         search_soup = BeautifulSoup(search_response.text, 'html.parser')
         
         # ESTRATEGIA 1: Buscar por clase específica
@@ -67,317 +137,39 @@ def scrape_scimago(journal_title):
         if href.startswith('http'):
             journal_url = href
         else:
-            journal_url = "https://www.scimagojr.com/" + href
+            journal_url = SCIMAGO_URL + "/" + href
+        if registro:
+            registro.sumar('parse_busqueda', time.perf_counter() - inicio_parse)
         
         print(f"Accediendo a: {journal_url}")
         
-        # Pequeña pausa para evitar bloqueos
-        time.sleep(2)
+        # Pequeña pausa para evitar bloqueos (en modo concurrente la controla el descargador;
+        # si la búsqueda salió de la caché no hubo petición previa)
+        if not descargador and not getattr(search_response, 'desde_cache', False):
+            with etapa('pausa'):
+                time.sleep(2)
         
         # Usar directamente la URL específica de la revista en lugar de la URL de búsqueda
-        journal_response = requests.get(journal_url, headers=headers)
+        journal_response = obtener(journal_url, 'revista')
         journal_response.raise_for_status()
         
         # Guardar la página de la revista para depuración
-        with open("journal_page.html", "w", encoding="utf-8") as f:
-            f.write(journal_response.text)
-        print("Página de la revista guardada en 'journal_page.html' para depuración")
-        
-        journal_soup = BeautifulSoup(journal_response.text, 'html.parser')
-        
-        # EXTRACCIÓN DE DATOS CON MÚLTIPLES ESTRATEGIAS
-        
-        # 1. H-index - CORREGIDA LA EXTRACCIÓN
-        h_index = None
-        
-        # Estrategia 1: Buscar el elemento específico con clase 'hindexnumber'
-        h_index_element = journal_soup.find('span', class_='hindexnumber')
-        if h_index_element:
-            h_index = h_index_element.text.strip()
-        
-        # Estrategia 2: Buscar en celda con clase 'cellh'
-        if not h_index:
-            h_cell = journal_soup.select_one('.cellh')
-            if h_cell:
-                h_index = h_cell.text.strip()
-        
-        # Estrategia 3: Buscar en toda la página para el h-index
-        if not h_index:
-            # Primero intentamos encontrar cualquier número que aparezca cerca de "H index"
-            h_section = journal_soup.find(string=re.compile(r'H[\s\-]*index', re.IGNORECASE))
-            if h_section:
-                parent = h_section.parent
-                if parent:
-                    # Buscar números en el texto del padre
-                    h_index_numbers = re.search(r'(\d+)', parent.text)
-                    if h_index_numbers:
-                        h_index = h_index_numbers.group(1)
-        
-        # Estrategia 4: Buscar en divs o spans que contengan "h-index" o "h index"
-        if not h_index:
-            h_divs = journal_soup.find_all(['div', 'span'], string=re.compile(r'[Hh][\s\-]*Index'))
-            for div in h_divs:
-                numbers = re.search(r'(\d+)', div.text)
-                if numbers:
-                    h_index = numbers.group(1)
-                    break
-                # También buscar en el elemento siguiente
-                next_elem = div.find_next()
-                if next_elem:
-                    numbers = re.search(r'(\d+)', next_elem.text)
-                    if numbers:
-                        h_index = numbers.group(1)
-                        break
-        
-        # Estrategia 5: Último recurso, buscar en toda la página
-        if not h_index:
-            h_pattern = re.search(r'[Hh][\s\-]*Index:?\s*(\d+)', journal_soup.text)
-            if h_pattern:
-                h_index = h_pattern.group(1)
-        
-        # 2. Áreas temáticas
-        subject_areas = []
-        # Múltiples estrategias para áreas temáticas
-        selectors = [
-            '.journalsubject .subjectarea span',
-            '.cellsubject span',
-            '.subject-area',
-            '.subjectarea'
-        ]
-        
-        for selector in selectors:
-            elements = journal_soup.select(selector)
-            if elements:
-                subject_areas = [e.text.strip() for e in elements if e.text.strip()]
-                if subject_areas:
-                    break
-        
-        # Si no se encuentran áreas con selectores, buscar patrones en el texto
-        if not subject_areas:
-            subject_section = journal_soup.find(string=re.compile(r'Subject Area', re.IGNORECASE))
-            if subject_section:
-                parent = subject_section.parent
-                if parent:
-                    # Buscar en los siguientes elementos hermanos
-                    next_elements = parent.find_next_siblings()
-                    for elem in next_elements[:3]:  # Revisar solo los próximos 3 elementos
-                        if elem.text.strip() and not re.match(r'Publisher|ISSN|Type', elem.text):
-                            areas = [area.strip() for area in elem.text.split(',')]
-                            subject_areas.extend([area for area in areas if area])
-                            if subject_areas:
-                                break
-        
-        # 3. Editorial
-        publisher = None
-        publisher_selectors = [
-            'div.journalpublisher', 
-            '.cellpublisher', 
-            '.publisher'
-        ]
-        
-        for selector in publisher_selectors:
-            element = journal_soup.select_one(selector)
-            if element and element.text.strip():
-                publisher = element.text.strip()
-                break
-        
-        # Si no se encontró por selectores, buscar etiquetas con "Publisher"
-        if not publisher:
-            publisher_labels = journal_soup.find_all(['label', 'div', 'span'], string=re.compile(r'Publisher:', re.IGNORECASE))
-            for label in publisher_labels:
-                next_elem = label.find_next()
-                if next_elem and next_elem.text.strip():
-                    publisher = next_elem.text.strip()
-                    break
-                # O extraer del texto después de "Publisher:"
-                if ':' in label.text:
-                    pub_text = label.text.split(':', 1)[1].strip()
-                    if pub_text:
-                        publisher = pub_text
-                        break
-        
-        # Si aún no se encuentra, buscar en texto completo
-        if not publisher:
-            publisher_pattern = re.search(r'Publisher:?\s*([^\n]+)', journal_soup.text)
-            if publisher_pattern:
-                publisher = publisher_pattern.group(1).strip()
-        
-        # 4. ISSN
-        issn = None
-        issn_element = journal_soup.find('div', class_='issn')
-        if not issn_element:
-            issn_element = journal_soup.select_one('.journalissn')
-            
-        if issn_element:
-            issn = issn_element.text.strip()
-            # Limpiar prefijo "ISSN:" si existe
-            if 'ISSN:' in issn:
-                issn = issn.split('ISSN:', 1)[1].strip()
-        
-        # Si no se encuentra, buscar por text
-        if not issn:
-            issn_pattern = re.search(r'ISSN:?\s*([\d\-X]+)', journal_soup.text)
-            if issn_pattern:
-                issn = issn_pattern.group(1).strip()
-        
-        # 5. Tipo de publicación - CORREGIDA LA EXTRACCIÓN
-        pub_type = None
-        
-        # Estrategia 1: Usar selectores más específicos y expandidos
-        type_selectors = [
-            'div.publicationtype', 
-            '.celltype', 
-            '.type',
-            '.journal-type',
-            '.journal_type',
-            '.publication-type'
-        ]
-        
-        for selector in type_selectors:
-            element = journal_soup.select_one(selector)
-            if element and element.text.strip():
-                pub_type = element.text.strip()
-                # Limpiar prefijo "Type:" si existe
-                if 'Type:' in pub_type:
-                    pub_type = pub_type.split('Type:', 1)[1].strip()
-                break
-        
-        # Estrategia 2: Buscar elementos que contengan "Type:" o "Publication Type:"
-        if not pub_type:
-            type_labels = journal_soup.find_all(
-                ['label', 'div', 'span', 'p', 'td'], 
-                string=re.compile(r'(Type|Publication Type):', re.IGNORECASE)
-            )
-            for label in type_labels:
-                # Intentar extraer del texto después de "Type:"
-                if ':' in label.text:
-                    type_text = label.text.split(':', 1)[1].strip()
-                    if type_text and not re.match(r'^\s*$', type_text):
-                        pub_type = type_text
-                        break
-                # O buscar en el siguiente elemento
-                next_elem = label.find_next()
-                if next_elem and next_elem.text.strip():
-                    pub_type = next_elem.text.strip()
-                    break
-        
-        # Estrategia 3: Buscar en tablas o secciones específicas
-        if not pub_type:
-            # Buscar en filas de tabla que contengan "Type"
-            type_rows = journal_soup.find_all('tr')
-            for row in type_rows:
-                if re.search(r'Type', row.text, re.IGNORECASE):
-                    cells = row.find_all('td')
-                    if len(cells) >= 2:
-                        pub_type = cells[1].text.strip()
-                        break
-        
-        # Estrategia 4: Búsqueda amplia en el texto
-        if not pub_type:
-            # Patrones comunes para tipo de publicación
-            type_patterns = [
-                r'Type:?\s*([^\n;]+)',
-                r'Publication Type:?\s*([^\n;]+)',
-                r'Document Type:?\s*([^\n;]+)'
-            ]
-            
-            for pattern in type_patterns:
-                type_match = re.search(pattern, journal_soup.text, re.IGNORECASE)
-                if type_match:
-                    pub_type = type_match.group(1).strip()
-                    break
-        
-        # 6. NUEVO: Extraer el widget de la revista
-        widget_url = None
-        widget_html = None
-        
-        # Estrategia 1: Búsqueda directa de las clases específicas "imgwidget" o "widgetlegend"
-        img_widgets = journal_soup.find_all('img', class_=re.compile(r'imgwidget|widgetlegend', re.IGNORECASE))
-        for img in img_widgets:
-            src = img.get('src')
-            if src:
-                widget_url = src
-                # Si es una URL relativa, convertirla a absoluta
-                if widget_url and not widget_url.startswith('http'):
-                    if widget_url.startswith('//'):
-                        widget_url = 'https:' + widget_url
-                    elif widget_url.startswith('/'):
-                        widget_url = 'https://www.scimagojr.com' + widget_url
-                    else:
-                        widget_url = 'https://www.scimagojr.com/' + widget_url
-                widget_html = str(img)
-                print(f"Widget encontrado por clase 'imgwidget/widgetlegend': {widget_url}")
-                break
-        
-        # Estrategia 2: Buscar imágenes que contengan "journal_img.php?id=" en la URL
-        if not widget_url:
-            journal_imgs = journal_soup.find_all('img', src=re.compile(r'journal_img\.php\?id=', re.IGNORECASE))
-            for img in journal_imgs:
-                widget_url = img.get('src')
-                # Si es una URL relativa, convertirla a absoluta
-                if widget_url and not widget_url.startswith('http'):
-                    if widget_url.startswith('//'):
-                        widget_url = 'https:' + widget_url
-                    elif widget_url.startswith('/'):
-                        widget_url = 'https://www.scimagojr.com' + widget_url
-                    else:
-                        widget_url = 'https://www.scimagojr.com/' + widget_url
-                widget_html = str(img)
-                print(f"Widget encontrado por URL 'journal_img.php': {widget_url}")
-                break
-        
-        # Estrategia 3: Buscar imágenes con atributo alt que contenga "SCImago Journal & Country Rank"
-        if not widget_url:
-            rank_imgs = journal_soup.find_all('img', alt=re.compile(r'SCImago Journal (&|and) Country Rank', re.IGNORECASE))
-            for img in rank_imgs:
-                widget_url = img.get('src')
-                # Si es una URL relativa, convertirla a absoluta
-                if widget_url and not widget_url.startswith('http'):
-                    if widget_url.startswith('//'):
-                        widget_url = 'https:' + widget_url
-                    elif widget_url.startswith('/'):
-                        widget_url = 'https://www.scimagojr.com' + widget_url
-                    else:
-                        widget_url = 'https://www.scimagojr.com/' + widget_url
-                widget_html = str(img)
-                print(f"Widget encontrado por alt text 'SCImago Journal & Country Rank': {widget_url}")
-                break
-        
-        # Estrategia 4: Buscar elementos padre que contengan imágenes de widget
-        if not widget_url:
-            widget_containers = journal_soup.find_all(['div', 'span'], class_=re.compile(r'widget|rank|scimago', re.IGNORECASE))
-            for container in widget_containers:
-                img = container.find('img')
-                if img and img.get('src'):
-                    widget_url = img.get('src')
-                    # Si es una URL relativa, convertirla a absoluta
-                    if widget_url and not widget_url.startswith('http'):
-                        if widget_url.startswith('//'):
-                            widget_url = 'https:' + widget_url
-                        elif widget_url.startswith('/'):
-                            widget_url = 'https://www.scimagojr.com' + widget_url
-                        else:
-                            widget_url = 'https://www.scimagojr.com/' + widget_url
-                    widget_html = str(img)
-                    print(f"Widget encontrado en contenedor: {widget_url}")
-                    break
-        
-        # Estrategia 5: Construir URL del widget basada en el ID de la revista (si se puede extraer)
-        if not widget_url:
-            # Intentar extraer el ID de la revista de la URL actual
-            journal_id_match = re.search(r'journalid=(\d+)', journal_url)
-            if journal_id_match:
-                journal_id = journal_id_match.group(1)
-                # Construir la URL del widget común de Scimago usando journal_img.php
-                widget_url = f"https://www.scimagojr.com/journal_img.php?id={journal_id}"
-                print(f"Widget URL construida a partir del ID: {widget_url}")
-            else:
-                # Intento adicional: buscar el ID en cualquier parte del HTML
-                any_id_match = re.search(r'[?&]id=(\d+)', journal_soup.text)
-                if any_id_match:
-                    journal_id = any_id_match.group(1)
-                    widget_url = f"https://www.scimagojr.com/journal_img.php?id={journal_id}"
-                    print(f"Widget URL construida a partir de ID encontrado en el HTML: {widget_url}")
+        if not descargador:
+            with open("journal_page.html", "w", encoding="utf-8") as f:
+                f.write(journal_response.text)
+            print("Página de la revista guardada en 'journal_page.html' para depuración")
+        
+        # EXTRACCIÓN DE DATOS (ver parser_scimago para las estrategias de cada campo)
+        with etapa('parse_revista'):
+            campos = parser_scimago.extraer_datos(journal_response.text, journal_url, SCIMAGO_URL,
+                                                  estrategias=registro.estrategias if registro else None)
+        h_index = campos["h_index"]
+        subject_areas = campos["subject_area"]
+        publisher = campos["publisher"]
+        issn = campos["issn"]
+        pub_type = campos["publication_type"]
+        widget_url = campos["widget_url"]
+        widget_html = campos["widget_html"]
         
         # Crear diccionario con los datos encontrados
         data = {
@@ -390,7 +182,8 @@ def scrape_scimago(journal_title):
             "publication_type": pub_type,
             "search_url": search_url,
             "widget_url": widget_url,
-            "widget_html": widget_html
+            "widget_html": widget_html,
+            "scraped_at": time.time()
         }
         
         # Imprimir resumen para verificación
@@ -406,24 +199,197 @@ def scrape_scimago(journal_title):
         print(f"Widget HTML: {'Encontrado' if widget_html else 'No encontrado'}")
         print("---------------------\n")
         
+        if registro:
+            registro.ok = True
         return data
         
     except requests.exceptions.RequestException as e:
         print(f"Error al acceder a Scimago: {e}")
+        if registro:
+            registro.error = str(e)
         return None
     except Exception as e:
         print(f"Error inesperado: {e}")
+        if registro:
+            registro.error = str(e)
         import traceback
         traceback.print_exc()
         return None
+    finally:
+        if registro:
+            metricas.registrar(registro)
+
+def extraer_issn(value):
+    """
+    Devuelve el ISSN de una entrada del JSON de entrada si lo trae
+    """
+    if isinstance(value, dict):
+        for ik in ["issn", "ISSN", "Issn"]:
+            if value.get(ik):
+                return value[ik]
+    return None
 
-def process_journals_from_json(input_json_path, output_json_path):
+def issns(texto):
+    """
+    Separa y normaliza la lista de ISSN de un registro ("10225528, 15729028")
+    """
+    return [issn for issn in (normalizar_issn(i) for i in (texto or '').split(',')) if issn]
+
+class IndiceExistentes:
+    """
+    Tablas hash de las revistas ya obtenidas, por título normalizado y por ISSN,
+    para saber en tiempo constante si un título de entrada ya está resuelto.
+    Con parejas (título de entrada -> título de Scimago, de emparejamiento.py)
+    también se reconocen los títulos escritos de otra forma.
+    """
+    def __init__(self, revistas=(), parejas=None):
+        self.por_titulo = {}
+        self.por_issn = {}
+        self.parejas = {clave_titulo(titulo): scimago for titulo, scimago in (parejas or {}).items()}
+        for revista in revistas:
+            self.agregar(revista)
+
+    def agregar(self, revista):
+        self.por_titulo[clave_titulo(revista.get('title'))] = revista
+        for issn in issns(revista.get('issn')):
+            self.por_issn[issn] = revista
+
+    def buscar(self, titulo, issn=None):
+        revista = self.por_titulo.get(clave_titulo(titulo))
+        if revista is None and clave_titulo(titulo) in self.parejas:
+            revista = self.por_titulo.get(clave_titulo(self.parejas[clave_titulo(titulo)]))
+        if revista is None:
+            for clave in issns(issn):
+                revista = self.por_issn.get(clave)
+                if revista is not None:
+                    break
+        return revista
+
+def es_reciente(revista, max_edad):
+    """
+    Indica si un registro guardado puede reutilizarse. Sin max_edad todo
+    registro existente vale; con max_edad (segundos) los registros sin fecha
+    o más antiguos se vuelven a consultar.
+    """
+    if max_edad is None:
+        return True
+    fecha = revista.get('scraped_at')
+    return fecha is not None and time.time() - fecha < max_edad
+
+def extraer_titulo(key, value):
+    """
+    Obtiene el título de una revista a partir de una entrada del JSON de entrada
+    """
+    # Opción 1: El valor directamente es el título
+    if isinstance(value, str):
+        return value
+    
+    # Opción 2: El título está dentro de un diccionario bajo alguna clave común
+    if isinstance(value, dict):
+        # Posibles claves para el título
+        title_keys = ["titulo", "Titulo", "TITULO", "title", "Title", "TITLE", "TABULADOR"]
+        
+        for tk in title_keys:
+            if tk in value:
+                return value[tk] or key
+    
+    # Si no encontramos título, usamos la clave como título
+    return key
+
+def scrape_secuencial(titulos, **opciones):
+    """
+    Procesa los títulos uno por uno con pausas fijas entre revistas
+
+    Args:
+        titulos: Títulos a consultar
+        **opciones: cache, metricas y reintentos, que se pasan a scrape_scimago
+    """
+    metricas = opciones.get('metricas')
+    for journal_title in titulos:
+        print(f"Obteniendo datos de Scimago para '{journal_title}'...")
+        red = []
+        info = scrape_scimago(journal_title, red=red, **opciones)
+        yield journal_title, info
+        if red:
+            # Pausa para evitar sobrecargar el servidor; si todas las páginas
+            # salieron de la caché no hubo peticiones y no hace falta esperar
+            time.sleep(3)
+            if metricas:
+                metricas.sumar_pausa(3)
+
+def scrape_concurrente(titulos, trabajadores, peticiones_por_segundo, limite_por_host, **opciones):
+    """
+    Procesa los títulos en varios hilos que comparten una sesión y un límite de tasa
+
+    Args:
+        **opciones: cache, metricas y reintentos, que se pasan a scrape_scimago
+    """
+    descargador = Descargador(peticiones_por_segundo=peticiones_por_segundo,
+                              limite_por_host=limite_por_host,
+                              conexiones=trabajadores)
+    try:
+        yield from procesar_en_paralelo(titulos, lambda titulo: scrape_scimago(titulo, descargador, **opciones), trabajadores)
+    finally:
+        descargador.cerrar()
+
+def cargar_salida(output_json_path):
+    """
+    Carga las revistas ya guardadas en el archivo de salida (lista vacía si no existe)
+    """
+    existing_data = []
+    if os.path.exists(output_json_path):
+        try:
+            with open(output_json_path, 'r', encoding='utf-8') as f:
+                existing_data = json.load(f)
+                # Si no es una lista, convertirlo en una lista
+                if not isinstance(existing_data, list):
+                    existing_data = [existing_data]
+            print(f"Archivo de salida existente cargado con {len(existing_data)} revistas.")
+        except json.JSONDecodeError:
+            print("El archivo JSON de salida está corrupto. Creando uno nuevo.")
+            existing_data = []
+        except Exception as e:
+            print(f"Error al cargar archivo de salida: {e}")
+            existing_data = []
+    return existing_data
+
+def compactar_salida(output_json_path):
+    """
+    Incorpora al JSON de salida las revistas pendientes en la bitácora
+    """
+    bitacora = BitacoraScrapper(output_json_path)
+    datos = bitacora.compactar(cargar_salida(output_json_path))
+    print(f"Bitácora compactada: {len(datos)} revistas en {output_json_path}")
+
+def process_journals_from_json(input_json_path, output_json_path, trabajadores=1,
+                               peticiones_por_segundo=0.5, limite_por_host=2, cache=None,
+                               reanudar=False, max_edad=None, metricas=None, reintentos=0,
+                               emparejar=True, ruta_emparejamiento=emparejamiento.RUTA_EMPAREJAMIENTO):
     """
     Lee títulos de revistas desde un archivo JSON y ejecuta el scraper para cada uno
     
     Args:
         input_json_path: Ruta al archivo JSON con los títulos de revistas
         output_json_path: Ruta donde guardar los resultados del scraping
+        trabajadores: Número de hilos; con 1 se procesa secuencialmente como antes
+        peticiones_por_segundo: Tasa global de peticiones en modo concurrente
+        limite_por_host: Peticiones simultáneas por host en modo concurrente
+        cache: CacheHTTP opcional para reutilizar páginas ya descargadas
+        reanudar: Si es True también se saltan los títulos que la bitácora marca
+            como procesados sin éxito en una ejecución anterior
+        max_edad: Segundos tras los cuales un registro existente se vuelve a
+            consultar; None reutiliza cualquier registro existente
+        metricas: MetricasScrapper opcional para medir cada título
+        reintentos: Reintentos por petición ante errores transitorios
+        emparejar: Si es True, antes de consultar Scimago se buscan los títulos
+            pendientes entre las revistas existentes por similitud (erratas,
+            abreviaturas, "&" por "and"...) y solo se consultan los que no
+            tienen pareja
+        ruta_emparejamiento: Parejas guardadas por emparejamiento.py que se
+            reutilizan si el archivo existe
+
+    Cada resultado se anexa a una bitácora JSON Lines junto al archivo de
+    salida; el JSON final se reescribe una sola vez al terminar.
     """
     print(f"Leyendo revistas desde: {input_json_path}")
     
@@ -443,88 +409,80 @@ def process_journals_from_json(input_json_path, output_json_path):
         os.makedirs(os.path.dirname(output_json_path), exist_ok=True)
         
         # Cargar datos existentes del archivo de salida o crear lista vacía
-        existing_data = []
-        if os.path.exists(output_json_path):
-            try:
-                with open(output_json_path, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
-                    # Si no es una lista, convertirlo en una lista
-                    if not isinstance(existing_data, list):
-                        existing_data = [existing_data]
-                print(f"Archivo de salida existente cargado con {len(existing_data)} revistas.")
-            except json.JSONDecodeError:
-                print("El archivo JSON de salida está corrupto. Creando uno nuevo.")
-                existing_data = []
-            except Exception as e:
-                print(f"Error al cargar archivo de salida: {e}")
-                existing_data = []
+        existing_data = cargar_salida(output_json_path)
+        
+        # Revistas que quedaron en la bitácora de una ejecución interrumpida
+        bitacora = BitacoraScrapper(output_json_path)
+        anteriores = bitacora.registros()
+        if anteriores:
+            print(f"Bitácora con {len(anteriores)} revistas de una ejecución anterior.")
+            existing_data = combinar(existing_data, anteriores)
+        procesados = bitacora.procesados() if reanudar else set()
+        existentes = IndiceExistentes(existing_data, emparejamiento.cargar(ruta_emparejamiento))
         
         # Contador para estadísticas
         processed_count = 0
         success_count = 0
         
-        # Procesar cada título de revista en el JSON
+        # Reunir los títulos pendientes de cada entrada del JSON
+        pendientes = []
         for key, value in journals_data.items():
-            # Buscar el título en diferentes posibles ubicaciones/formatos
-            journal_title = None
+            journal_title = extraer_titulo(key, value)
             
-            # Opción 1: El valor directamente es el título
-            if isinstance(value, str):
-                journal_title = value
-            
-            # Opción 2: El título está dentro de un diccionario bajo alguna clave común
-            elif isinstance(value, dict):
-                # Posibles claves para el título
-                title_keys = ["titulo", "Titulo", "TITULO", "title", "Title", "TITLE", "TABULADOR"]
-                
-                for tk in title_keys:
-                    if tk in value:
-                        journal_title = value[tk]
-                        break
-            
-            # Si no encontramos título, usamos la clave como título
-            if not journal_title:
-                journal_title = key
+            if clave_titulo(journal_title) in procesados:
+                processed_count += 1
+                continue
                 
             print(f"\nProcesando revista: '{journal_title}'")
             processed_count += 1
             
-            # Verificar si la revista ya existe en los datos de salida
-            journal_exists = False
-            for existing_journal in existing_data:
-                if existing_journal.get('title', '').lower() == journal_title.lower():
-                    print(f"La revista '{journal_title}' ya existe en el archivo de salida. Saltando...")
-                    journal_exists = True
-                    success_count += 1  # Contamos como exitoso aunque se salte
-                    break
-            
-            if journal_exists:
+            # Verificar si la revista ya existe en los datos de salida (por título o ISSN)
+            existente = existentes.buscar(journal_title, extraer_issn(value))
+            if existente is not None and es_reciente(existente, max_edad):
+                print(f"La revista '{journal_title}' ya existe en el archivo de salida. Saltando...")
+                success_count += 1  # Contamos como exitoso aunque se salte
                 continue
-                
-            # Ejecutar el scraper para esta revista
-            print(f"Obteniendo datos de Scimago para '{journal_title}'...")
-            info = scrape_scimago(journal_title)
             
-            # Si se obtuvieron datos, añadirlos al archivo de salida
-            if info:
-                existing_data.append(info)
-                success_count += 1
-                print(f"Revista '{journal_title}' añadida al archivo de salida.")
-                
-                # Cada 5 revistas, guardamos los resultados parciales
-                if processed_count % 5 == 0:
-                    with open(output_json_path, 'w', encoding='utf-8') as f:
-                        json.dump(existing_data, f, indent=4, ensure_ascii=False)
-                    print(f"Guardado parcial: {processed_count} revistas procesadas, {success_count} exitosas.")
-                
-                # Pausa para evitar sobrecargar el servidor
-                time.sleep(3)
-            else:
-                print(f"No se pudo obtener información para '{journal_title}'.")
+            pendientes.append((journal_title, extraer_issn(value)))
+        
+        # Los títulos sin coincidencia exacta se resuelven por similitud
+        # contra las revistas existentes antes de salir a la red
+        if emparejar and pendientes and existing_data:
+            emparejador = emparejamiento.Emparejador(existing_data)
+            sin_pareja = []
+            for journal_title, issn in pendientes:
+                pareja = emparejador.resolver(journal_title, issn)
+                if pareja is not None and es_reciente(emparejador.revistas[pareja[0]], max_edad):
+                    print(f"La revista '{journal_title}' corresponde a "
+                          f"'{emparejador.revistas[pareja[0]].get('title')}' ({pareja[2]}, {pareja[1]}). Saltando...")
+                    success_count += 1
+                else:
+                    sin_pareja.append((journal_title, issn))
+            pendientes = sin_pareja
+        pendientes = [journal_title for journal_title, _ in pendientes]
+        
+        # Ejecutar el scraper para las revistas pendientes
+        opciones = {"cache": cache, "metricas": metricas, "reintentos": reintentos}
+        if trabajadores > 1:
+            print(f"Modo concurrente: {trabajadores} hilos, {peticiones_por_segundo} peticiones/s, {limite_por_host} por host")
+            resultados = scrape_concurrente(pendientes, trabajadores, peticiones_por_segundo, limite_por_host, **opciones)
+        else:
+            resultados = scrape_secuencial(pendientes, **opciones)
+        
+        try:
+            for journal_title, info in resultados:
+                # Cada resultado se anexa a la bitácora en cuanto llega
+                bitacora.registrar(journal_title, info)
+                if info:
+                    success_count += 1
+                    print(f"Revista '{journal_title}' añadida a la bitácora.")
+                else:
+                    print(f"No se pudo obtener información para '{journal_title}'.")
+        finally:
+            bitacora.cerrar()
         
         # Guardar todos los resultados al finalizar
-        with open(output_json_path, 'w', encoding='utf-8') as f:
-            json.dump(existing_data, f, indent=4, ensure_ascii=False)
+        bitacora.compactar(existing_data)
         
         print(f"\n=== RESUMEN FINAL ===")
         print(f"Total de revistas procesadas: {processed_count}")
@@ -544,39 +502,75 @@ def main():
     """
     Función principal para ejecutar el scraper
     """
-    # Rutas de los archivos
-    input_json_path = os.path.join("datos", "json", "revistas.json")
-    output_json_path = os.path.join("datos", "json", "Scimago.json")
+    parser = argparse.ArgumentParser(description="Obtiene información de Scimago para las revistas de un archivo JSON")
+    parser.add_argument("--input", default=os.path.join("datos", "json", "revistas.json"),
+                        help="Archivo JSON de entrada (por defecto datos/json/revistas.json)")
+    parser.add_argument("--output", default=os.path.join("datos", "json", "Scimago.json"),
+                        help="Archivo JSON de salida (por defecto datos/json/Scimago.json)")
+    parser.add_argument("--trabajadores", type=int, default=1,
+                        help="Número de hilos de descarga (1 = secuencial)")
+    parser.add_argument("--tasa", type=float, default=0.5,
+                        help="Peticiones por segundo permitidas en modo concurrente")
+    parser.add_argument("--por-host", type=int, default=2,
+                        help="Peticiones simultáneas por host en modo concurrente")
+    parser.add_argument("--cache", metavar="DIRECTORIO",
+                        help="Guarda las páginas descargadas en este directorio y las reutiliza")
+    parser.add_argument("--cache-ttl", type=float, default=30,
+                        help="Días que una página en caché se usa sin revalidar")
+    parser.add_argument("--cache-max-mb", type=int, default=2048,
+                        help="Tamaño máximo de la caché en MB")
+    parser.add_argument("--offline", action="store_true",
+                        help="No accede a la red: solo usa páginas de la caché")
+    parser.add_argument("--max-edad", type=float,
+                        help="Días tras los cuales una revista ya guardada se vuelve a consultar")
+    parser.add_argument("--parser", choices=["rapido", "bs4"], default=parser_scimago.MOTOR_POR_DEFECTO,
+                        help="Analizador de la página de cada revista")
+    parser.add_argument("--reanudar", action="store_true",
+                        help="Continúa una ejecución interrumpida sin repetir títulos ya intentados")
+    parser.add_argument("--reintentos", type=int, default=0,
+                        help="Reintentos por petición ante errores de red, 429 o 5xx")
+    parser.add_argument("--metricas", metavar="ARCHIVO.jsonl",
+                        help="Anota métricas por título en este archivo y escribe un resumen .prom al terminar")
+    parser.add_argument("--sin-emparejar", action="store_true",
+                        help="Consulta todos los títulos sin coincidencia exacta, sin buscarlos por similitud")
+    parser.add_argument("--compactar", action="store_true",
+                        help="Solo incorpora la bitácora pendiente al JSON de salida y termina")
+    args = parser.parse_args()
+
+    parser_scimago.MOTOR_POR_DEFECTO = args.parser
+
+    if args.compactar:
+        compactar_salida(args.output)
+        return
+
+    cache = None
+    if args.cache or args.offline:
+        cache = CacheHTTP(args.cache or os.path.join("datos", "cache_http"),
+                          ttl=args.cache_ttl * 24 * 3600,
+                          max_bytes=args.cache_max_mb * 1024 * 1024,
+                          offline=args.offline)
+
+    metricas = MetricasScrapper(args.metricas) if args.metricas else None
     
     print(f"Iniciando procesamiento de revistas desde archivo JSON...")
-    print(f"Archivo de entrada: {input_json_path}")
-    print(f"Archivo de salida: {output_json_path}")
+    print(f"Archivo de entrada: {args.input}")
+    print(f"Archivo de salida: {args.output}")
     
     # Procesar las revistas desde el archivo JSON
-    process_journals_from_json(input_json_path, output_json_path)
+    process_journals_from_json(args.input, args.output, trabajadores=args.trabajadores,
+                               peticiones_por_segundo=args.tasa, limite_por_host=args.por_host, cache=cache,
+                               reanudar=args.reanudar,
+                               max_edad=args.max_edad * 24 * 3600 if args.max_edad is not None else None,
+                               metricas=metricas, reintentos=args.reintentos,
+                               emparejar=not args.sin_emparejar)
+
+    if metricas:
+        metricas.cerrar()
+        imprimir_resumen(metricas.resumen())
+        ruta_prom = os.path.splitext(args.metricas)[0] + '.prom'
+        metricas.escribir_prometheus(ruta_prom)
+        print(f"Métricas guardadas en {args.metricas} y {ruta_prom}")
 
 # Punto de entrada principal
 if __name__ == "__main__":
-    import sys
-    
-    # Comprobar si se proporcionaron argumentos adicionales
-    if len(sys.argv) > 1:
-        # Si hay argumentos, verificar si son rutas personalizadas
-        if sys.argv[1] == "--input" and len(sys.argv) >= 3:
-            input_path = sys.argv[2]
-            output_path = os.path.join("datos", "json", "Scimago.json")  # Salida por defecto
-            
-            # Si también hay ruta de salida personalizada
-            if len(sys.argv) >= 5 and sys.argv[3] == "--output":
-                output_path = sys.argv[4]
-                
-            print(f"Usando ruta de entrada personalizada: {input_path}")
-            print(f"Usando ruta de salida personalizada: {output_path}")
-            process_journals_from_json(input_path, output_path)
-        else:
-            print("Uso: python web_Scrapper.py [--input ruta_entrada.json] [--output ruta_salida.json]")
-            print("Por defecto se usará 'datos/json/revistas.json' como entrada y 'datos/json/Scimago.json' como salida.")
-            main()
-    else:
-        # Ejecutar con rutas predeterminadas
-        main()
\ No newline at end of file
+    main()
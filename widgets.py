@@ -0,0 +1,162 @@
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from cache_http import CacheHTTP
+from descargas import Descargador, procesar_en_paralelo
+
+WIDGET_URL = 'https://www.scimagojr.com/journal_img.php?id={}'
+DIRECTORIO_WIDGETS = os.path.join('datos', 'widgets')
+# Las imágenes se revalidan con Scimago una vez por semana
+TTL_WIDGETS = 7 * 24 * 3600
+MAX_BYTES_WIDGETS = 256 * 1024 * 1024
+# Segundos antes de volver a intentar un widget cuya descarga falló
+REINTENTO_FALLIDOS = 3600
+# Descargas en espera como máximo; las que no caben se piden en otra visita
+MAX_PENDIENTES = 1000
+FIRMAS_IMAGEN = ((b'\x89PNG', 'image/png'), (b'GIF8', 'image/gif'), (b'\xff\xd8', 'image/jpeg'))
+
+
+def id_widget(widget_url):
+    # journal_img.php?id=21971 -> '21971'; None si la URL no es de un widget
+    if not widget_url:
+        return None
+    valores = parse_qs(urlparse(widget_url).query).get('id', [])
+    return valores[0] if valores and valores[0].isdigit() else None
+
+
+def tipo_imagen(contenido, tipo=None):
+    if tipo and tipo.startswith('image/'):
+        return tipo
+    for firma, tipo_firma in FIRMAS_IMAGEN:
+        if contenido.startswith(firma):
+            return tipo_firma
+    return 'application/octet-stream'
+
+
+class CacheWidgets:
+    """
+    Copia local de las imágenes de widget de Scimago. Las imágenes se guardan
+    en una CacheHTTP (por hash del contenido, con límite de tamaño y ttl) y se
+    descargan en hilos en segundo plano: la aplicación solo lee del disco y,
+    si una imagen falta o está vencida, la pide a los hilos.
+
+    Args:
+        directorio: Carpeta de la caché de imágenes
+        ttl: Segundos que una imagen se sirve sin revalidarla
+        max_bytes: Tamaño máximo de las imágenes guardadas
+        trabajadores: Hilos de descarga
+        peticiones_por_segundo: Tasa máxima de peticiones a Scimago
+    """
+    def __init__(self, directorio=DIRECTORIO_WIDGETS, ttl=TTL_WIDGETS, max_bytes=MAX_BYTES_WIDGETS,
+                 trabajadores=4, peticiones_por_segundo=4.0):
+        self.cache = CacheHTTP(directorio, ttl=ttl, max_bytes=max_bytes)
+        self.trabajadores = trabajadores
+        self.peticiones_por_segundo = peticiones_por_segundo
+        self.descargadas = 0
+        self._descargador = None
+        self._cola = queue.Queue(MAX_PENDIENTES)
+        self._pendientes = set()
+        self._fallidos = {}
+        self._hilos = []
+        self._lock = threading.Lock()
+
+    def _obtener_descargador(self):
+        with self._lock:
+            if self._descargador is None:
+                self._descargador = Descargador(peticiones_por_segundo=self.peticiones_por_segundo,
+                                                limite_por_host=self.trabajadores,
+                                                conexiones=self.trabajadores)
+            return self._descargador
+
+    def leer(self, id_widget):
+        """
+        Imagen guardada como (contenido, tipo) o None, sin acceder a la red.
+        Si falta o está vencida se pide en segundo plano.
+        """
+        url = WIDGET_URL.format(id_widget)
+        respuesta = self.cache.leer(url)
+        if respuesta is None or not self.cache.vigente(url):
+            self.solicitar(id_widget)
+        if respuesta is None:
+            return None
+        return respuesta.content, tipo_imagen(respuesta.content, respuesta.headers.get('Content-Type'))
+
+    def descargar(self, id_widget):
+        """
+        Descarga (o revalida) la imagen de un widget; devuelve True si quedó guardada
+        """
+        descargador = self._obtener_descargador()
+        try:
+            respuesta = self.cache.get(WIDGET_URL.format(id_widget),
+                                       lambda url, headers: descargador.get(url, headers=headers))
+        except Exception as e:
+            print(f"⚠️ No se pudo descargar el widget {id_widget}: {e}")
+            respuesta = None
+        correcta = respuesta is not None and respuesta.status_code in (200, 304)
+        with self._lock:
+            if correcta:
+                self._fallidos.pop(id_widget, None)
+                self.descargadas += 1
+            else:
+                self._fallidos[id_widget] = time.monotonic()
+        return correcta
+
+    def solicitar(self, id_widget):
+        # Encola la descarga salvo que ya esté pendiente, haya fallado hace
+        # poco o la cola esté llena
+        with self._lock:
+            if id_widget in self._pendientes or len(self._pendientes) >= MAX_PENDIENTES:
+                return
+            fallo = self._fallidos.get(id_widget)
+            if fallo is not None and time.monotonic() - fallo < REINTENTO_FALLIDOS:
+                return
+            self._pendientes.add(id_widget)
+            if not self._hilos:
+                self._hilos = [threading.Thread(target=self._trabajar, name=f'widgets-{i}', daemon=True)
+                               for i in range(self.trabajadores)]
+                for hilo in self._hilos:
+                    hilo.start()
+            # Cada pendiente ocupa un lugar en la cola, así que nunca se bloquea
+            self._cola.put_nowait(id_widget)
+
+    def _trabajar(self):
+        while True:
+            id_widget = self._cola.get()
+            try:
+                self.descargar(id_widget)
+            finally:
+                with self._lock:
+                    self._pendientes.discard(id_widget)
+
+    def precargar(self, widget_urls):
+        """
+        Descarga en paralelo todas las imágenes que falten o estén vencidas.
+        Devuelve (descargadas, fallidas).
+        """
+        ids = {id_widget(url) for url in widget_urls} - {None}
+        faltantes = sorted(i for i in ids if not self.cache.vigente(WIDGET_URL.format(i)))
+        correctas = fallidas = 0
+        for _, correcta in procesar_en_paralelo(faltantes, self.descargar, self.trabajadores):
+            if correcta:
+                correctas += 1
+            else:
+                fallidas += 1
+        return correctas, fallidas
+
+
+if __name__ == '__main__':
+    # Uso: python widgets.py [Scimago.json] [trabajadores]
+    ruta_json = sys.argv[1] if len(sys.argv) > 1 else 'Scimago.json'
+    trabajadores = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with open(ruta_json, encoding='utf-8') as f:
+        urls = [item.get('widget_url') for item in json.load(f)]
+    widgets = CacheWidgets(trabajadores=trabajadores)
+    inicio = time.perf_counter()
+    correctas, fallidas = widgets.precargar(urls)
+    print(f"✅ {correctas} widgets descargados, {fallidas} con error, en {time.perf_counter() - inicio:.1f} s "
+          f"({DIRECTORIO_WIDGETS})")